@@ -1,16 +1,19 @@
 import streamlit as st
 import pandas as pd
 import os
-import subprocess
 import json
-import tempfile
 import time
-import threading
-import signal
-from pathlib import Path
 from datetime import datetime
-import plotly.express as px
 import plotly.graph_objects as go
+from normalize import normalize_listings
+from scraper_runner import CAPTCHA_SOLVED, ELEMENT_SELECTED
+from browser_daemon import BrowserDaemon
+from listing_store import ListingStore
+from result_cache import ResultCache, format_age
+from exporter import EXPORT_FORMATS, Exporter, available_formats, parquet_available, static_url
+from detail_cache import DetailCache
+import job_manager
+import timing
 
 # Set page configuration
 st.set_page_config(
@@ -21,6 +24,30 @@ st.set_page_config(
 )
 
 
+# Extraction engines supported by the scraper
+EXTRACTION_ENGINES = {
+    "__NEXT_DATA__ JSON (fast)": "next-data",
+    "DOM selectors": "dom",
+}
+
+# Request blocking profiles supported by the scraper
+BLOCK_PROFILES = {
+    "Data only (fastest)": "data",
+    "No images or media": "lean",
+    "Full render (debugging)": "full",
+}
+
+# Debug screenshot policies supported by the scraper
+ARTIFACT_POLICIES = {
+    "On errors only": "on-error",
+    "Off": "off",
+    "Viewport JPEGs": "viewport",
+    "Full-page PNGs": "full",
+}
+
+# Seconds between reruns while a scrape job is running
+JOB_POLL_INTERVAL = 1
+
 # Define color scheme
 COLOR_THEME = {
     "primary": "#4285F4",    # Google Blue
@@ -37,6 +64,41 @@ COLOR_THEME = {
 
 
 
+# One warm browser shared by every session and run of this server
+@st.cache_resource
+def get_browser_daemon():
+    return BrowserDaemon()
+
+# Result cache shared by every session, so analysts reuse each other's recent scrapes
+@st.cache_resource
+def get_result_cache():
+    return ResultCache()
+
+# Export files shared by every session, reused when the same data is exported again
+@st.cache_resource
+def get_exporter():
+    return Exporter()
+
+# Persistent listing store shared by every session of this server
+@st.cache_resource
+def get_listing_store():
+    return ListingStore()
+
+# Listing detail pages cached across sessions, so each one is loaded once per TTL
+@st.cache_resource
+def get_detail_cache():
+    return DetailCache()
+
+# Background scrape jobs shared by every session of this server
+@st.cache_resource
+def get_job_manager():
+    return job_manager.JobManager(
+        store=get_listing_store(),
+        cache=get_result_cache(),
+        daemon=get_browser_daemon(),
+        detail_cache=get_detail_cache()
+    )
+
 # Initialize session state for storing data
 if 'data' not in st.session_state:
     st.session_state.data = None
@@ -46,8 +108,6 @@ if 'debug_info' not in st.session_state:
     st.session_state.debug_info = None
 if 'scraping_in_progress' not in st.session_state:
     st.session_state.scraping_in_progress = False
-if 'scraper_process' not in st.session_state:
-    st.session_state.scraper_process = None
 if 'captcha_detected' not in st.session_state:
     st.session_state.captcha_detected = False
 if 'element_selection_mode' not in st.session_state:
@@ -56,16 +116,16 @@ if 'captcha_solved' not in st.session_state:
     st.session_state.captcha_solved = False
 if 'element_selected' not in st.session_state:
     st.session_state.element_selected = False
-if 'temp_file' not in st.session_state:
-    st.session_state.temp_file = None
-if "scraper_running" not in st.session_state:
-    st.session_state.scraper_running = False
-if "last_scrape_results" not in st.session_state:
-    st.session_state.last_scrape_results = None
-if "all_scrape_results" not in st.session_state:
-    st.session_state.all_scrape_results = []
-if "scrape_history" not in st.session_state:
-    st.session_state.scrape_history = []
+if "job_id" not in st.session_state:
+    st.session_state.job_id = None
+if "job_ids" not in st.session_state:
+    st.session_state.job_ids = []
+if "results_job_id" not in st.session_state:
+    st.session_state.results_job_id = None
+if "batch_id" not in st.session_state:
+    st.session_state.batch_id = None
+if "prepared_export" not in st.session_state:
+    st.session_state.prepared_export = None
 
 # App title
 st.markdown("""
@@ -98,6 +158,12 @@ with st.sidebar:
     st.header("Debug Info")
     if st.button("Show Debug Info"):
         st.json(st.session_state.debug_info)
+        # Memory held by the server for all sessions, and the budgets keeping it flat
+        st.subheader("Memory")
+        st.json(get_job_manager().memory_report())
+    
+    st.header("Performance")
+    show_performance = st.checkbox("Show phase timings", help="Where the last scrape spent its time, per phase and tab")
 
 # Main content
 st.header("Enter Yad2 URL")
@@ -115,308 +181,427 @@ with st.expander("Scraper Settings", expanded=False):
     with col2:
         save_to_history = st.checkbox("Save results to history", value=True, 
                                      help="Save the results to history for later analysis")
+    engine_label = st.selectbox(
+        "Extraction engine",
+        list(EXTRACTION_ENGINES.keys()),
+        help="Read listings from the page's embedded __NEXT_DATA__ JSON, or walk the rendered DOM"
+    )
+    engine = EXTRACTION_ENGINES[engine_label]
+    concurrency = st.number_input(
+        "Parallel tabs", min_value=1, max_value=8, value=1,
+        help="Fetch up to this many result pages at once in separate browser tabs; results are merged in page order"
+    )
+    block_profile_label = st.selectbox(
+        "Request blocking",
+        list(BLOCK_PROFILES.keys()),
+        help="Skip images, fonts, ads and analytics that listing extraction does not need"
+    )
+    block_profile = BLOCK_PROFILES[block_profile_label]
+    artifacts_label = st.selectbox(
+        "Debug screenshots",
+        list(ARTIFACT_POLICIES.keys()),
+        help="Which screenshots the scraper saves; full-page PNGs are slow on long result pages"
+    )
+    artifacts = ARTIFACT_POLICIES[artifacts_label]
+    reuse_browser = st.checkbox(
+        "Reuse warm browser", value=True,
+        help="Keep one browser running between scrapes and open a fresh context per run instead of launching a new browser"
+    )
+    incremental = st.checkbox(
+        "Incremental (stop at already-seen listings)", value=False,
+        help="Stop paginating at the first page whose listings are all already in the store with the same price"
+    )
+    col1, col2 = st.columns(2)
+    with col1:
+        enrich = st.checkbox(
+            "Load listing details", value=False,
+            help="Open each new or re-priced listing's page for elevator, parking, balcony, description, "
+                 "seller type and publish date; details are cached for a week"
+        )
+    with col2:
+        detail_concurrency = st.number_input("Detail tabs", min_value=1, max_value=6, value=2)
+    col1, col2 = st.columns(2)
+    with col1:
+        use_cache = st.checkbox(
+            "Use cached results", value=True,
+            help="Return results of the same search (ignoring the page parameter) with the same page count without opening a browser"
+        )
+    with col2:
+        cache_ttl = st.number_input("Cache lifetime (minutes)", min_value=1, max_value=24 * 60, value=30)
 
 # Start scraping button
 start_button = st.button(
     "Start Scraping",
-    disabled=st.session_state.scraper_running,
-    help="Click to start scraping the provided URL"
+    help="Click to start scraping the provided URL; it runs in the background and more than one scrape can run at a time"
 )
 
+# Batch mode: many searches queued at once with the settings above
+with st.expander("Batch Scrape", expanded=False):
+    batch_text = st.text_area(
+        "Yad2 search URLs, one per line",
+        help="Lines starting with # are ignored"
+    )
+    batch_file = st.file_uploader("...or upload a .txt/.csv file of URLs", type=["txt", "csv"])
+    batch_button = st.button(
+        "Start Batch",
+        help="Queue one scrape per URL; a few run at once and scrapes of the same site are spaced out"
+    )
+
 # Create placeholders for dynamic content
 status_card = st.empty()
 interactive_card = st.empty()
 results_card = st.empty()
 
-# Function to create a temporary file for communication
-def create_temp_file(signal):
-    try:
-        # Create a temporary file with the signal
-        temp_file = tempfile.NamedTemporaryFile(delete=False, mode='w', suffix='.txt')
-        temp_file.write(signal)
-        temp_file.close()
-        print(f"Created temporary file for signal '{signal}' at {temp_file.name}")
-        return temp_file.name
-    except Exception as e:
-        print(f"Error creating temporary file: {e}")
+# Function to send a control command to the job shown in this session
+def send_scraper_command(command):
+    job = get_current_job()
+    if job is None:
+        print(f"No running scraper to send '{command}' to")
         return None
+    
+    # Wait briefly for the scraper to acknowledge the command
+    command_id = job.send(command)
+    if command_id is not None:
+        print(f"Scraper acknowledged '{command}' (id {command_id})")
+    return command_id
 
 # Function to handle captcha solved button
 def on_captcha_solved():
-    try:
-        # Create a temporary file to signal that captcha is solved
-        temp_file = create_temp_file("captcha_solved")
-        if temp_file:
-            st.session_state.captcha_comm_file = temp_file
-            st.session_state.captcha_solved = True
-            print(f"Created captcha solved signal file: {temp_file}")
-        else:
-            print("Failed to create captcha solved signal file")
-    except Exception as e:
-        print(f"Error in on_captcha_solved: {e}")
+    if send_scraper_command(CAPTCHA_SOLVED) is not None:
+        st.session_state.captcha_solved = True
 
 # Function to handle element selected button
 def on_element_selected():
-    try:
-        # Create a temporary file to signal that element is selected
-        temp_file = create_temp_file("element_selected")
-        if temp_file:
-            st.session_state.element_comm_file = temp_file
-            st.session_state.element_selected = True
-            print(f"Created element selected signal file: {temp_file}")
+    if send_scraper_command(ELEMENT_SELECTED) is not None:
+        st.session_state.element_selected = True
+
+# Function to cancel the job shown in this session
+def on_cancel_job():
+    job = get_current_job()
+    if job is not None:
+        job.cancel()
+
+# Function to look up the job this session is showing
+def get_current_job():
+    if st.session_state.job_id is None:
+        return None
+    return get_job_manager().get(st.session_state.job_id)
+
+# Function to format a metric value, showing N/A when there is nothing to average
+def format_metric(value, pattern):
+    if pd.isna(value):
+        return "N/A"
+    return pattern.format(value)
+
+# Function to show the listings received so far while the scraper is still running
+def render_live_results(records, pages_done):
+    live_df = normalize_listings(pd.DataFrame(records))
+    with results_card.container():
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Listings so far", len(live_df))
+        col2.metric("Pages scraped", pages_done)
+        col3.metric("Average Price", format_metric(live_df['price_numeric'].mean(), "₪{:,.0f}"))
+        st.dataframe(live_df)
+
+# Function to show a finished result set with stats, the table and a download button
+def show_results(df, message):
+    # Create results card
+    results_card.markdown('', unsafe_allow_html=True)
+
+    # Display the results
+    results_card.success(message)
+
+    # Quick stats
+    col1, col2, col3 = results_card.columns(3)
+
+    with col1:
+        avg_price = df['price_numeric'].mean()
+        st.metric("Average Price", format_metric(avg_price, "₪{:,.0f}"))
+
+    with col2:
+        avg_rooms = df['rooms_numeric'].mean()
+        st.metric("Average Rooms", format_metric(avg_rooms, "{:.1f}"))
+
+    with col3:
+        avg_size = df['size_numeric'].mean()
+        st.metric("Average Size", format_metric(avg_size, "{:.1f} m²"))
+
+    # Display the dataframe
+    print("Debug: About to display dataframe with", len(df), "rows")
+    st.dataframe(df)
+
+    # Close results card
+    results_card.markdown('', unsafe_allow_html=True)
+
+    # Show a message to navigate to analytics
+    st.info("Open the Analytics page in the sidebar for market statistics across every scrape saved to history!")
+
+# Function to show a running job's progress, CAPTCHA prompt and live results
+def render_running_job(job):
+    with status_card.container():
+        if job.status == job_manager.CAPTCHA:
+            st.warning(job.message)
         else:
-            print("Failed to create element selected signal file")
-    except Exception as e:
-        print(f"Error in on_element_selected: {e}")
-
-# Function to run the scraper
-def run_scraper(url, max_pages=3):
-    # Create a temporary file for the output
-    output_dir = tempfile.mkdtemp()
-    output_path = os.path.join(output_dir, "yad2_listings.csv")
+            st.info(job.message)
+        st.progress(job.progress)
+        st.button("Cancel", key=f"cancel_{job.id}", on_click=on_cancel_job,
+                  help="Stop after the page being scraped; listings scraped so far are kept")
     
-    # Create a temporary file for communication
-    comm_file = os.path.join(output_dir, "comm.txt")
+    if job.status == job_manager.CAPTCHA:
+        with interactive_card.container():
+            st.warning(f"CAPTCHA detected on page {job.captcha_page}! Please solve it in the browser window.")
+            # Reruns keep happening while the job runs, so this click is delivered right away
+            st.button(
+                "I've Solved the CAPTCHA",
+                key=f"captcha_{job.id}_{job.captcha_page}",
+                on_click=on_captcha_solved,
+                help="Click this button after solving the CAPTCHA in the browser window"
+            )
     
-    # Get the path to the interactive scraper
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    scraper_path = os.path.join(script_dir, "interactive_scraper.js")
+    live_records = job.live_records()
+    if live_records:
+        render_live_results(live_records, job.pages_done)
+
+# Function to show a finished job's outcome and results
+def render_finished_job(job):
+    if job.status == job_manager.DONE:
+        status_card.success(
+            f"Served from cache, scraped {format_age(job.cached_age)} ago" if job.cached_age is not None
+            else "Scraping completed successfully!"
+        )
+    elif job.status == job_manager.CANCELLED:
+        status_card.warning(job.message)
+    else:
+        status_card.error(job.message)
     
-    # Check if the scraper exists
-    if not os.path.exists(scraper_path):
-        st.error(f"Scraper not found at {scraper_path}")
-        return None, None
+    # Report what request blocking saved
+    network = job.debug_info.get("network")
+    if network and network.get("blocked"):
+        st.caption(
+            f"Request blocking ({network['profile']}): {network['blocked']} of {network['requests']} requests blocked, "
+            f"~{network['estimated_bytes_saved'] / 1e6:.1f} MB saved, {network['bytes_loaded'] / 1e6:.1f} MB loaded"
+        )
     
-    # Run the scraper
-    cmd = ["node", scraper_path, url, output_path, comm_file, str(max_pages)]
+    # Report what incremental mode found and where it stopped
+    incremental_stats = job.debug_info.get("incremental")
+    if incremental_stats:
+        stopped = incremental_stats.get("stopped_at_page")
+        st.caption(
+            f"Incremental: {incremental_stats['new']} new, {incremental_stats['updated']} updated, "
+            f"{incremental_stats['unchanged']} unchanged"
+            + (f"; stopped after page {stopped} of {job.max_pages}" if stopped else "")
+        )
     
-    # Print the command for debugging
-    print(f"Running command: {' '.join(cmd)}")
+    # Report how many detail pages were loaded versus served from the detail cache
+    enrichment = job.debug_info.get("enrichment")
+    if enrichment:
+        st.caption(
+            f"Listing details: {enrichment['saved']} pages loaded, {enrichment['failed']} failed, "
+            f"{enrichment['cached']} cached"
+            + (f", {enrichment['skipped']} over the per-run limit" if enrichment.get("skipped") else "")
+        )
+
+    # Report what changed since the listings were last stored, with the changed listings on demand
+    changes = job.debug_info.get("changes")
+    if changes:
+        st.caption(
+            f"Since the last scrape: {changes['new']} new, {changes['removed']} removed, "
+            f"{changes['price_changed']} price changes, {changes['attributes_changed']} edited"
+        )
+        if job.scrape_id is not None and any(changes[change] for change in ("removed", "price_changed", "attributes_changed")):
+            with st.expander("Changed listings"):
+                changed = get_listing_store().scrape_changes(job.scrape_id)
+                st.dataframe(changed[changed["change"] != "new"], use_container_width=True)
+
+    if job.df is None:
+        results_card.error("No results found. The scraper may have failed.")
+        return
     
-    # Run the command
-    result = subprocess.Popen(
-        cmd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-        bufsize=1,
-        universal_newlines=True
-    )
+    # Make the job's results this session's latest results once; the session keeps only the id
+    if st.session_state.results_job_id != job.id:
+        st.session_state.results_job_id = job.id
+        st.session_state.prepared_export = None
     
-    return result, output_path
+    if job.cached_age is not None:
+        show_results(job.df, f"Loaded {len(job.df)} cached listings (scraped {format_age(job.cached_age)} ago)")
+    else:
+        show_results(job.df, job.message)
 
-# Handle start button click
+# Handle start button click: the scrape runs in the background, this rerun returns right away
+scrape_options = {
+    "engine": engine,
+    "concurrency": concurrency,
+    "block_profile": block_profile,
+    "artifacts": artifacts,
+    "reuse_browser": reuse_browser,
+    "incremental": incremental,
+    "enrich": enrich,
+    "detail_concurrency": detail_concurrency,
+    "save_to_history": save_to_history,
+    "use_cache": use_cache,
+    "cache_ttl": cache_ttl * 60,
+}
 if start_button:
-    st.session_state.scraper_running = True
     st.session_state.captcha_solved = False
     st.session_state.element_selection_mode = False
-    st.session_state.debug_info = {"stdout": [], "stderr": []}
-    
-    # Create status card
-    status_card.markdown('', unsafe_allow_html=True)
-    status_placeholder = status_card.empty()
-    status_placeholder.info("Starting the scraper...")
-    
-    # Run the scraper
-    result, output_path = run_scraper(url, max_pages)
-    
-    if not result:
-        status_placeholder.error("Failed to start the scraper")
-        st.session_state.scraper_running = False
-        status_card.markdown('', unsafe_allow_html=True)
+    job = get_job_manager().submit(url, max_pages, **scrape_options)
+    st.session_state.job_id = job.id
+    st.session_state.job_ids.append(job.id)
+
+# Handle batch button click
+if batch_button:
+    batch_source = batch_text
+    if batch_file is not None:
+        batch_source += "\n" + batch_file.getvalue().decode("utf-8", errors="replace")
+    batch_urls = job_manager.parse_url_list(batch_source)
+    if not batch_urls:
+        st.error("No Yad2 URLs found in the batch input")
     else:
-        status_placeholder.info("Scraper started. Browser window should open shortly...")
+        batch = get_job_manager().submit_batch(batch_urls, max_pages, **scrape_options)
+        st.session_state.batch_id = batch.id
+        st.session_state.job_ids.extend(job.id for job in batch.jobs)
+
+# Show the current job; while it runs, the script reruns on a short timer to poll it
+current_job = get_current_job()
+if current_job is not None:
+    st.session_state.debug_info = current_job.debug_snapshot()
+    if current_job.active:
+        render_running_job(current_job)
+    else:
+        render_finished_job(current_job)
+
+# Function to show where a job spent its time: per-phase table, waterfall and trace download
+def render_performance(job):
+    spans = job.debug_info.get("timings", [])
+    with st.expander("Performance", expanded=True):
+        if not spans:
+            st.info("No timings recorded yet")
+            return
+        
+        st.dataframe(timing.phase_summary(spans))
+        postprocess_ms = job.debug_info.get("postprocess_ms")
+        if postprocess_ms:
+            st.caption("Post-processing: " + ", ".join(f"{step} {ms:.0f} ms" for step, ms in postprocess_ms.items()))
         
-        # Create interactive card
-        interactive_card.markdown('', unsafe_allow_html=True)
-        interactive_placeholder = interactive_card.empty()
+        # Waterfall: one row per tab, one bar per span, colored by phase
+        spans_df = timing.spans_frame(spans)
+        spans_df["row"] = spans_df["tab"].map(lambda tab: "main tab" if tab == 0 else f"tab {tab}")
+        fig = go.Figure()
+        for name, group in spans_df.groupby("name"):
+            fig.add_trace(go.Bar(
+                name=name,
+                y=group["row"],
+                x=group["duration_ms"],
+                base=group["start_ms"],
+                orientation="h",
+                customdata=group["page"],
+                hovertemplate="%{fullData.name}, page %{customdata}: %{x:.0f} ms<extra></extra>"
+            ))
+        fig.update_layout(barmode="overlay", xaxis_title="ms since launch", height=150 + 40 * spans_df["row"].nunique())
+        st.plotly_chart(fig, use_container_width=True)
         
-        # Process stdout
-        for line in iter(result.stdout.readline, ''):
-            st.session_state.debug_info["stdout"].append(line)
-            
-            # Check for captcha
-            if "CAPTCHA detected" in line:
-                st.session_state.captcha_solved = False
-                interactive_placeholder.warning("CAPTCHA detected! Please solve it in the browser window.")
-                
-                # Add a button for the user to indicate they've solved the captcha
-                captcha_button = interactive_placeholder.button(
+        st.download_button(
+            label="Download trace (chrome://tracing, Perfetto)",
+            data=json.dumps(timing.chrome_trace(spans)),
+            file_name=f"scraper_trace_{job.id}.json",
+            mime="application/json"
+        )
+
+if show_performance and current_job is not None:
+    render_performance(current_job)
+
+# List this session's jobs when there is more than one
+session_jobs = [job for job in map(get_job_manager().get, st.session_state.job_ids) if job is not None]
+if len(session_jobs) > 1:
+    with st.expander("Scrape Jobs", expanded=any(job.active for job in session_jobs)):
+        st.dataframe(pd.DataFrame([job.summary() for job in session_jobs]))
+        job_ids = [job.id for job in session_jobs]
+        shown_job = st.selectbox(
+            "Show job", job_ids,
+            index=job_ids.index(st.session_state.job_id) if st.session_state.job_id in job_ids else len(job_ids) - 1
+        )
+        if shown_job != st.session_state.job_id:
+            st.session_state.job_id = shown_job
+            st.rerun()
+
+# Show the current batch: per-search progress, then the merged, tagged dataset
+current_batch = get_job_manager().get_batch(st.session_state.batch_id) if st.session_state.batch_id else None
+if current_batch is not None:
+    st.subheader(f"Batch {current_batch.id}")
+    counts = current_batch.counts()
+    st.progress(current_batch.progress)
+    st.caption(", ".join(f"{count} {status}" for status, count in counts.items()))
+    st.dataframe(pd.DataFrame([job.summary() for job in current_batch.jobs]))
+    
+    if current_batch.active:
+        st.button("Cancel batch", key=f"cancel_{current_batch.id}", on_click=current_batch.cancel)
+        # Jobs waiting on a CAPTCHA are listed with their own buttons
+        for job in current_batch.jobs:
+            if job.status == job_manager.CAPTCHA:
+                st.warning(f"{job.id}: CAPTCHA on page {job.captcha_page} of {job.url}")
+                st.button(
                     "I've Solved the CAPTCHA",
-                    key="captcha_button",
-                    help="Click this button after solving the CAPTCHA in the browser window"
-                )
-                
-                if captcha_button:
-                    on_captcha_solved()
-                    
-                status_placeholder.warning("Waiting for you to solve the CAPTCHA...")
-            
-            # Check for captcha solved
-            if "Captcha solved successfully" in line:
-                st.session_state.captcha_solved = True
-                interactive_placeholder.empty()
-                status_placeholder.success("CAPTCHA solved! Proceeding with scraping...")
-            
-            # Check for element selection mode
-            if "INTERACTIVE ELEMENT SELECTION" in line:
-                st.session_state.element_selection_mode = True
-                interactive_placeholder.warning("Please select a listing element in the browser window.")
-                
-                # Add a button for the user to indicate they've selected an element
-                element_button = interactive_placeholder.button(
-                    "I've Selected an Element",
-                    key="element_button",
-                    help="Click this button after selecting a listing element in the browser window"
+                    key=f"captcha_{job.id}_{job.captcha_page}",
+                    on_click=job.send, args=(CAPTCHA_SOLVED,)
                 )
-                
-                if element_button:
-                    on_element_selected()
-                    
-                status_placeholder.warning("Waiting for you to select a listing element...")
-            
-            # Check for element selected
-            if "Selected element information:" in line:
-                st.session_state.element_selection_mode = False
-                interactive_placeholder.empty()
-                status_placeholder.success("Element selected! Extracting listings...")
-            
-            # Update status for other important messages
-            if "Extracting listings" in line:
-                status_placeholder.info("Extracting listings from the page...")
-            
-            if "Successfully scraped" in line and "listings" in line:
-                status_placeholder.success("Scraping completed successfully!")
-            
-            # Check for page navigation
-            if "Scraping page" in line:
-                page_num = line.split("page")[1].split("...")[0].strip()
-                status_placeholder.info(f"Scraping page {page_num}...")
-            
-            if "Next page found" in line:
-                status_placeholder.info("Moving to next page...")
-        
-        # Process stderr
-        for line in iter(result.stderr.readline, ''):
-            st.session_state.debug_info["stderr"].append(line)
-        
-        # Wait for process to complete
-        result.wait()
-        
-        # Close interactive card
-        interactive_card.markdown('', unsafe_allow_html=True)
-        
-        # Check for debug files
-        debug_dir = os.path.dirname(output_path)
-        
-        # Look for screenshots
-        for filename in os.listdir(debug_dir):
-            if filename.endswith('.png') and (
-                filename.startswith('page_loaded') or 
-                filename.startswith('captcha') or 
-                filename.startswith('after_captcha') or
-                filename.startswith('selected_element')
-            ):
-                st.session_state.debug_info[filename] = os.path.join(debug_dir, filename)
-        
-        # Check if the output file exists
-        if os.path.exists(output_path):
+    else:
+        merged = current_batch.merged()
+        if merged is None:
+            st.error("No search in this batch returned listings")
+        else:
+            # Make the merged results this session's latest results once
+            if st.session_state.results_job_id != current_batch.id:
+                st.session_state.results_job_id = current_batch.id
+                st.session_state.prepared_export = None
+            st.success(f"Batch finished: {len(merged)} listings from {merged['source_url'].nunique()} searches")
+            st.dataframe(merged)
+
+# Export the last results; files are only written when asked for
+last_results = get_job_manager().results(st.session_state.results_job_id)
+if last_results is not None and (current_job is None or not current_job.active) \
+        and (current_batch is None or not current_batch.active):
+    st.subheader("Export Results")
+    col1, col2 = st.columns(2)
+    with col1:
+        export_format = st.selectbox(
+            "Export format", available_formats(),
+            help="Gzipped or plain CSV, Parquet or JSON lines"
+        )
+        if not parquet_available():
+            st.caption("Parquet export needs pyarrow installed (`pip install -r requirements.txt`).")
+    with col2:
+        just_prepared = st.button("Prepare export")
+        if just_prepared:
             try:
-                # Read the CSV file
-                df = pd.read_csv(output_path)
-                
-                # Add timestamp and URL to the dataframe
-                df['timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                df['source_url'] = url
-                
-                # Store in session state
-                st.session_state.last_scrape_results = df
-                
-                # Add to history if enabled
-                if save_to_history:
-                    st.session_state.all_scrape_results.append(df)
-                    
-                    # Add to scrape history
-                    history_entry = {
-                        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                        "url": url,
-                        "count": len(df),
-                        "max_pages": max_pages,
-                        "output_path": output_path
-                    }
-                    st.session_state.scrape_history.append(history_entry)
-                
-                # Create results card
-                results_card.markdown('', unsafe_allow_html=True)
-                
-                # Display the results
-                results_card.success(f"Successfully scraped {len(df)} listings!")
-                
-                # Quick stats
-                col1, col2, col3 = results_card.columns(3)
-                
-                # Clean price data for analysis
-                df['price_numeric'] = df['Price'].str.extract(r'([\d,]+)').replace(',', '', regex=True).astype(float)
-                
-                with col1:
-                    avg_price = df['price_numeric'].mean()
-                    st.metric("Average Price", f"₪{avg_price:,.0f}")
-                
-                with col2:
-                    if 'Rooms' in df.columns:
-                        # Extract numeric rooms value
-                        df['rooms_numeric'] = df['Rooms'].str.extract(r'([\d\.]+)').astype(float)
-                        avg_rooms = df['rooms_numeric'].mean()
-                        st.metric("Average Rooms", f"{avg_rooms:.1f}")
-                
-                with col3:
-                    if 'Size' in df.columns:
-                        # Extract numeric size value
-                        df['size_numeric'] = df['Size'].str.extract(r'([\d\.]+)').astype(float)
-                        avg_size = df['size_numeric'].mean()
-                        st.metric("Average Size", f"{avg_size:.1f} m²")
-                
-                # Display the dataframe
-                print("Debug: About to display dataframe with", len(df), "rows")
-                st.dataframe(df)
-                
-                # Download button
-                csv = df.to_csv(index=False)
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                results_card.download_button(
-                    label="Download CSV",
-                    data=csv,
-                    file_name=f"yad2_listings_{timestamp}.csv",
-                    mime="text/csv"
-                )
-                
-                # Close results card
-                results_card.markdown('', unsafe_allow_html=True)
-                
-                # Show a message to navigate to analytics
-                st.info("Navigate to the Analytics page to see more insights from your data!")
-                
-            except Exception as e:
-                results_card.error(f"Error reading results: {e}")
+                st.session_state.prepared_export = get_exporter().export(last_results, export_format)
+            except (ImportError, OSError, ValueError) as e:
+                st.error(f"Export failed: {e}")
+    
+    prepared = st.session_state.prepared_export
+    if prepared is not None and prepared.format == export_format and os.path.exists(prepared.path):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        file_name = f"yad2_listings_{timestamp}.{EXPORT_FORMATS[export_format][0]}"
+        label = f"Download {export_format} ({prepared.bytes / 1e6:.1f} MB)"
+        link = static_url(prepared.path)
+        if link is not None:
+            # The browser fetches the file from disk; reruns never read it
+            st.markdown(f'<a href="{link}" download="{file_name}">⬇️ {label}</a>', unsafe_allow_html=True)
+        elif just_prepared:
+            # Exports outside the static directory go through Streamlit, read once on the rerun that prepared them
+            with open(prepared.path, "rb") as export_file:
+                st.download_button(label=label, data=export_file.read(), file_name=file_name, mime=prepared.mime)
         else:
-            results_card.error("No results found. The scraper may have failed.")
-        
-        # Close status card
-        status_card.markdown('', unsafe_allow_html=True)
-        
-        # Reset the scraper running state
-        st.session_state.scraper_running = False
+            st.caption("Click \"Prepare export\" again to download this file.")
 
-# Show recent history if available
-if st.session_state.scrape_history and len(st.session_state.scrape_history) > 0:
+# Show recent history from the persistent store
+history_df = get_listing_store().scrape_history(limit=20)
+if not history_df.empty:
     st.markdown('', unsafe_allow_html=True)
     st.subheader("Recent Scraping History")
     
-    # Create a dataframe from history
-    history_df = pd.DataFrame(st.session_state.scrape_history)
-    
     # Display the history
     st.dataframe(history_df[["timestamp", "url", "count", "max_pages"]])
+    st.caption(f"{get_listing_store().count():,} unique listings stored")
     
     st.markdown('', unsafe_allow_html=True)
 
@@ -426,4 +611,9 @@ st.markdown("""
 <div style="text-align: center; color: #757575; font-size: 0.8rem;">
     © 2023 Yad2 Real Estate Scraper | Not affiliated with Yad2.co.il
 
-""", unsafe_allow_html=True) 
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+# Keep polling while the shown job or batch is running
+if (current_job is not None and current_job.active) or (current_batch is not None and current_batch.active):
+    time.sleep(JOB_POLL_INTERVAL)
+    st.rerun()
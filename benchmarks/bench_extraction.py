@@ -0,0 +1,151 @@
+"""Benchmark __NEXT_DATA__ extraction against the DOM selector path.
+
+The selector path is what ``extractListings`` in interactive_scraper.js does
+inside the browser: build a DOM, find ``itemDataContentBox`` cards and read
+their price/heading/info-line children. Here it is reproduced with the
+standard library HTML parser so both paths can be timed on the same checked-in
+fixture without a browser. The browser version is slower still, since it also
+pays for ``page.evaluate`` round trips and a live layout tree.
+
+Usage:
+    python benchmarks/bench_extraction.py [fixture.html] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from html.parser import HTMLParser
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from next_data import extract_listings  # noqa: E402
+
+# Hashed class names the DOM scraper depends on
+CARD_CLASS = "item-data-content_itemDataContentBox__gvAC2"
+HEADING_CLASS = "item-data-content_heading__tphH4"
+INFO_LINE_CLASS = "item-data-content_itemInfoLine__AeoPP"
+FIRST_LINE_CLASS = "item-data-content_first__oi7xM"
+
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input",
+             "link", "meta", "source", "track", "wbr"}
+
+
+class SelectorPathParser(HTMLParser):
+    """Mimic the card walk of extractListings over a streamed document."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.listings = []
+        self.stack = []
+        self.card_depth = None
+        self.field = None
+        self.field_depth = None
+        self.current = None
+        self.last_href = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = (attrs.get("class") or "").split()
+
+        # Remember the closest enclosing link, like the ancestor walk does
+        if tag == "a" and attrs.get("href"):
+            self.last_href = attrs["href"]
+
+        if tag not in VOID_TAGS:
+            self.stack.append(tag)
+        depth = len(self.stack)
+
+        if CARD_CLASS in classes:
+            self.card_depth = depth
+            self.current = {"title": "", "price": "", "address": "", "details": "",
+                            "url": self.last_href or "N/A"}
+            return
+
+        if self.card_depth is None or self.field is not None:
+            return
+
+        if attrs.get("data-testid") == "price":
+            self.field = "price"
+        elif HEADING_CLASS in classes:
+            self.field = "title"
+        elif INFO_LINE_CLASS in classes:
+            self.field = "address" if FIRST_LINE_CLASS in classes else "details"
+        if self.field:
+            self.field_depth = depth
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS or not self.stack:
+            return
+        depth = len(self.stack)
+        self.stack.pop()
+
+        if self.field is not None and depth == self.field_depth:
+            self.field = None
+        if self.card_depth is not None and depth == self.card_depth:
+            self.listings.append(self._finish(self.current))
+            self.card_depth = None
+            self.current = None
+
+    def handle_data(self, data):
+        if self.field is not None:
+            self.current[self.field] += data
+
+    @staticmethod
+    def _finish(card):
+        parts = [part.strip() for part in card["details"].split("•")]
+        parts += ["N/A"] * (3 - len(parts))
+        return {
+            "title": card["title"].strip() or "N/A",
+            "price": card["price"].strip() or "N/A",
+            "address": card["address"].strip() or "N/A",
+            "rooms": parts[0] or "N/A",
+            "floor": parts[1] or "N/A",
+            "size": parts[2] or "N/A",
+            "url": card["url"],
+        }
+
+
+def extract_with_selectors(html):
+    parser = SelectorPathParser()
+    parser.feed(html)
+    parser.close()
+    return parser.listings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixture", nargs="?", default=os.path.join(ROOT, "page-source.html"))
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with open(args.fixture, "r", encoding="utf-8") as f:
+        html = f.read()
+
+    next_data_listings = extract_listings(html)
+    selector_listings = extract_with_selectors(html)
+
+    print(f"Fixture: {args.fixture} ({len(html) / 1024:.0f} KB)")
+    print(f"__NEXT_DATA__ listings: {len(next_data_listings)}")
+    print(f"Selector listings:      {len(selector_listings)}")
+
+    # Both paths should agree on the listings they found
+    mismatches = sum(
+        1 for fast, slow in zip(next_data_listings, selector_listings)
+        if fast["Price"] != slow["price"]
+    )
+    print(f"Price mismatches:       {mismatches}")
+
+    results = {}
+    for name, func in (("__NEXT_DATA__", extract_listings), ("selectors", extract_with_selectors)):
+        seconds = min(timeit.repeat(lambda: func(html), number=args.repeat, repeat=3)) / args.repeat
+        results[name] = seconds
+        print(f"{name:<14} {seconds * 1000:8.2f} ms/page")
+
+    if results["__NEXT_DATA__"] > 0:
+        print(f"Speedup: {results['selectors'] / results['__NEXT_DATA__']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Micro-benchmark of normalize.normalize_listings against the old inline parsing.
+
+The old path is what app.py used to do per scrape: three ``str.extract`` calls
+producing float64 columns, with every other column left as Python strings.
+Rows are synthesized from the shapes of the strings Yad2 actually renders.
+
+Usage:
+    python benchmarks/bench_normalize.py [--rows 200000] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from normalize import normalize_listings  # noqa: E402
+
+CITIES = ["חיפה", "תל אביב יפו", "ירושלים", "טבריה", "עומר", "באר שבע", "רמת גן", "נתניה"]
+NEIGHBORHOODS = ["הדר עליון", "לב העיר", "שיכון ב", "קטמון הישנה", "שאר העיר", "צפון יפו", "נווה שאנן"]
+PROPERTY_TYPES = ["דירה", "דירת גן", "גג/ פנטהאוז", "דופלקס"]
+
+
+def make_rows(count, seed=0):
+    rng = np.random.default_rng(seed)
+    prices = rng.integers(300, 8000, count) * 1000
+    rooms = rng.choice([1.5, 2, 2.5, 3, 3.5, 4, 4.5, 5, 6], count)
+    floors = rng.integers(-1, 20, count)
+    totals = floors + rng.integers(0, 10, count)
+    sizes = rng.integers(30, 250, count)
+
+    price_text = pd.Series([f"{p:,} ₪" for p in prices])
+    price_text[rng.random(count) < 0.05] = "לא צוין מחיר"
+    floor_text = pd.Series([
+        "קומה ‎קרקע‏" if f == 0 else f"קומה ‎{f}‏ מתוך {t}" for f, t in zip(floors, totals)
+    ])
+
+    return pd.DataFrame({
+        "Title": [f"רחוב {i % 500} {i % 40}" for i in range(count)],
+        "Price": price_text,
+        "Address": [
+            f"{PROPERTY_TYPES[i % 4]}, {NEIGHBORHOODS[i % 7]}, {CITIES[i % 8]}" for i in range(count)
+        ],
+        "Rooms": [f"{r:g} חדרים" for r in rooms],
+        "Floor": floor_text,
+        "Size": [f"{s} מ״ר" for s in sizes],
+        "URL": [f"https://www.yad2.co.il/realestate/item/{i:08x}" for i in range(count)],
+        "timestamp": "2024-12-12 10:00:00",
+    })
+
+
+def legacy_parse(df):
+    df = df.copy()
+    df['price_numeric'] = df['Price'].str.extract(r'([\d,]+)').replace(',', '', regex=True).astype(float)
+    df['rooms_numeric'] = df['Rooms'].str.extract(r'([\d\.]+)').astype(float)
+    df['size_numeric'] = df['Size'].str.extract(r'([\d\.]+)').astype(float)
+    return df
+
+
+def timed(func, df, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(df)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_rows(args.rows)
+    print(f"Rows: {len(df):,}")
+
+    legacy_seconds, legacy = timed(legacy_parse, df, args.repeat)
+    new_seconds, normalized = timed(normalize_listings, df, args.repeat)
+
+    # Memory of the parsed columns alone; the new path also parses floor and location
+    legacy_columns = ["price_numeric", "rooms_numeric", "size_numeric"]
+    typed_columns = legacy_columns + ["floor_numeric", "total_floors", "price_per_sqm",
+                                      "property_type", "neighborhood", "city", "listing_id", "timestamp"]
+    legacy_raw = ["Address", "Floor", "URL", "timestamp"]
+
+    legacy_bytes = legacy[legacy_columns + legacy_raw].memory_usage(deep=True, index=False).sum()
+    new_bytes = normalized[typed_columns].memory_usage(deep=True, index=False).sum()
+
+    print(f"{'inline str.extract':<22} {legacy_seconds:8.3f} s   {legacy_bytes / 1e6:8.1f} MB (3 numeric + raw location/floor/url/timestamp)")
+    print(f"{'normalize_listings':<22} {new_seconds:8.3f} s   {new_bytes / 1e6:8.1f} MB (all typed columns)")
+    print(f"Rows/s: {len(df) / new_seconds:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""End-to-end scraper throughput against the local stand-in server.
+
+Starts benchmarks/standin_server.py and runs interactive_scraper.js against it
+(headless, through scraper_runner like the app does). CAPTCHAs are
+acknowledged automatically. The run is followed by the Python
+post-processing (load_results + normalize_listings). Reports pages/s,
+listings/s, p50/p95 per-page latency, and peak RSS of the scraper process
+tree (node + Chromium) and of this Python process.
+
+Each run is saved as JSON under benchmarks/results/ so versions can be
+compared with --compare.
+
+Usage:
+    python benchmarks/bench_scraper.py [--pages 10] [--latency-ms 200] [--concurrency 1]
+        [--engine next-data] [--captcha-pages 3] [--runs 3] [--label name] [--compare old.json]
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import scraper_events  # noqa: E402
+from job_manager import load_results  # noqa: E402
+from normalize import normalize_listings  # noqa: E402
+from scraper_runner import CAPTCHA_SOLVED, run_scraper  # noqa: E402
+from standin_server import StandInConfig, StandInServer, parse_pages  # noqa: E402
+from timing import phase_summary  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Seconds between RSS samples of the scraper process tree
+RSS_SAMPLE_INTERVAL = 0.1
+
+# Metrics shown in reports and comparisons: key -> (label, higher is better)
+METRICS = {
+    "pages_per_s": ("pages/s", True),
+    "listings_per_s": ("listings/s", True),
+    "page_p50_ms": ("page p50 ms", False),
+    "page_p95_ms": ("page p95 ms", False),
+    "scrape_s": ("scrape s", False),
+    "postprocess_s": ("post-process s", False),
+    "scraper_peak_rss_mb": ("scraper peak RSS MB", False),
+    "python_peak_rss_mb": ("python peak RSS MB", False),
+}
+
+
+def tree_rss_bytes(pid):
+    """Resident memory of ``pid`` and all its descendants (Linux /proc), or None."""
+    children = {}
+    rss = {}
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    try:
+        names = os.listdir("/proc")
+    except OSError:
+        return None
+    for name in names:
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            with open(f"/proc/{name}/statm") as f:
+                rss[int(name)] = int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(int(fields[1]), []).append(int(name))
+
+    total = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        total += rss.get(current, 0)
+        stack.extend(children.get(current, []))
+    return total
+
+
+class RssSampler:
+    """Tracks the peak RSS of a process tree on a background thread."""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = tree_rss_bytes(self.pid)
+            if rss:
+                self.peak = max(self.peak, rss)
+            self._stop.wait(RSS_SAMPLE_INTERVAL)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_once(server, args):
+    """One scrape of the stand-in plus post-processing; returns its metrics."""
+    page_ms = []
+    spans = []
+    captchas = 0
+    errors = []
+    files = []
+
+    start = time.perf_counter()
+    run = run_scraper(
+        server.search_url(), args.pages, args.engine,
+        concurrency=args.concurrency,
+        block_profile=args.block_profile,
+        artifacts="off",
+        headless=not args.show_browser
+    )
+    with RssSampler(run.process.pid) as sampler:
+        while not run.finished:
+            for kind, item in run.poll(timeout=0.1):
+                if kind != "event":
+                    continue
+                if item.event == scraper_events.PAGE and item.status == "done":
+                    page_ms.append(item.get("elapsed_ms", 0))
+                elif item.event == scraper_events.CAPTCHA and item.status in ("detected", "retry"):
+                    # Stand in for the user; the CAPTCHA page reloads into the real one
+                    captchas += 1
+                    run.send(CAPTCHA_SOLVED)
+                elif item.event == scraper_events.ERROR:
+                    errors.append(item.get("message"))
+                elif item.event == scraper_events.RESULT:
+                    files = item.get("files") or []
+                elif item.event == scraper_events.TIMING:
+                    spans.append(item.to_dict())
+        run.wait()
+    scrape_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    df = load_results(run.output_path, args.engine, files=files)
+    listings = 0
+    if df is not None:
+        df["source_url"] = server.search_url()
+        listings = len(normalize_listings(df))
+    postprocess_s = time.perf_counter() - start
+
+    return {
+        "pages": len(page_ms),
+        "listings": listings,
+        "captchas": captchas,
+        "errors": errors,
+        "scrape_s": scrape_s,
+        "postprocess_s": postprocess_s,
+        "pages_per_s": len(page_ms) / scrape_s if scrape_s else 0,
+        "listings_per_s": listings / (scrape_s + postprocess_s) if listings else 0,
+        "page_p50_ms": percentile(page_ms, 0.5),
+        "page_p95_ms": percentile(page_ms, 0.95),
+        "scraper_peak_rss_mb": sampler.peak / 1e6,
+        # ru_maxrss is in kilobytes on Linux
+        "python_peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3,
+        # Per-phase p50/p95 from the scraper's timing spans
+        "phases": phase_summary(spans)[["count", "p50_ms", "p95_ms", "max_ms"]].to_dict(orient="index") if spans else {},
+    }
+
+
+def summarize(runs):
+    """Median of every metric across runs."""
+    summary = {}
+    for key in METRICS:
+        values = [run[key] for run in runs if run.get(key) is not None]
+        summary[key] = statistics.median(values) if values else None
+    return summary
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(summary, baseline=None):
+    for key, (label, higher_is_better) in METRICS.items():
+        value = summary.get(key)
+        line = f"{label:<22} {value:10.2f}" if value is not None else f"{label:<22} {'n/a':>10}"
+        old = baseline.get(key) if baseline else None
+        if value is not None and old:
+            change = (value - old) / old * 100
+            better = change > 0 if higher_is_better else change < 0
+            line += f"   was {old:10.2f}  ({change:+.1f}%{', better' if better else ''})"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--captcha-pages", default="", help="Comma-separated pages that get a CAPTCHA first")
+    parser.add_argument("--captcha-rate", type=float, default=0.0)
+    parser.add_argument("--error-pages", default="")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--engine", choices=["next-data", "dom"], default="next-data")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--block-profile", choices=["data", "lean", "full"], default="data")
+    parser.add_argument("--show-browser", action="store_true")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--label", default="")
+    parser.add_argument("--compare", help="Earlier result JSON to compare against")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    config = StandInConfig(
+        pages=args.pages, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        captcha_pages=parse_pages(args.captcha_pages), captcha_rate=args.captcha_rate,
+        error_pages=parse_pages(args.error_pages), error_rate=args.error_rate,
+    )
+
+    runs = []
+    with StandInServer(config) as server:
+        print(f"Stand-in: {args.pages} pages, {args.latency_ms:.0f}±{args.jitter_ms:.0f} ms at {server.base_url}")
+        for index in range(args.runs):
+            result = run_once(server, args)
+            runs.append(result)
+            print(f"run {index + 1}: {result['pages']} pages, {result['listings']} listings, "
+                  f"{result['scrape_s']:.2f}s, {result['captchas']} CAPTCHAs, {len(result['errors'])} errors")
+
+    summary = summarize(runs)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["summary"]
+    print()
+    print_report(summary, baseline)
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        revision = git_revision()
+        name = "-".join(part for part in (stamp, revision, args.label) if part) + ".json"
+        path = os.path.join(RESULTS_DIR, name)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "revision": revision,
+                "label": args.label,
+                "timestamp": stamp,
+                "config": {key: value for key, value in vars(args).items() if key not in ("compare", "no_save")},
+                "summary": summary,
+                "runs": runs,
+            }, f, indent=2)
+        print(f"\nSaved {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Local stand-in for Yad2 search pages, built from the checked-in fixtures.
+
+Serves ``page-source.html`` for every results page with synthetic pagination:
+listing tokens get a per-page suffix so each page holds distinct listings,
+``__NEXT_DATA__`` reports the configured page count, and a "next page" link is
+added to every page but the last. Third-party scripts and absolute Yad2 links
+are stripped or pointed back at the server, so a scrape never leaves the
+machine.
+
+Latency (with jitter) is added to every results page. CAPTCHAs
+(``page-content.html``) and error pages (``error-page.html``) can be injected
+on chosen pages or at random. An injected CAPTCHA page reloads itself after a
+moment, and the reload gets the real page, as if someone had solved it.
+
+Usage:
+    python benchmarks/standin_server.py [--port 8765] [--pages 10] [--latency-ms 200]
+"""
+
+import argparse
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RESULTS_FIXTURE = os.path.join(ROOT, "page-source.html")
+CAPTCHA_FIXTURE = os.path.join(ROOT, "page-content.html")
+ERROR_FIXTURE = os.path.join(ROOT, "error-page.html")
+
+# Path the scraper is pointed at
+SEARCH_PATH = "/realestate/forsale"
+
+TOKEN_PATTERN = re.compile(r'"token":"([A-Za-z0-9]+)"')
+PAGINATION_PATTERN = re.compile(r'"pagination":\{[^}]*\}')
+EXTERNAL_TAG_PATTERN = re.compile(
+    r'<script[^>]*\ssrc="https?://[^"]*"[^>]*>\s*</script>|<link[^>]*\shref="https?://[^"]*"[^>]*/?>'
+)
+NEXT_PAGE_LABEL = "עבור לעמוד הבא"
+
+# Reload shortly after a CAPTCHA is shown; the next request is served the real page
+CAPTCHA_AUTO_SOLVE = "<script>setTimeout(() => location.reload(), 1000)</script>"
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+class StandInConfig:
+    """What the stand-in serves; shared by every request handler."""
+
+    def __init__(self, pages=10, latency_ms=0, jitter_ms=0, captcha_pages=(), captcha_rate=0.0,
+                 error_pages=(), error_rate=0.0, seed=0):
+        self.pages = pages
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.captcha_pages = set(captcha_pages)
+        self.captcha_rate = captcha_rate
+        self.error_pages = set(error_pages)
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+
+        self.results_html = EXTERNAL_TAG_PATTERN.sub("", _read(RESULTS_FIXTURE))
+        self.tokens = sorted(set(TOKEN_PATTERN.findall(self.results_html)))
+        self.captcha_html = _read(CAPTCHA_FIXTURE).replace("</body>", CAPTCHA_AUTO_SOLVE + "</body>")
+        self.error_html = _read(ERROR_FIXTURE)
+
+        # Counters read by the benchmark
+        self.lock = threading.Lock()
+        self.captchas_served = 0
+        self.errors_served = 0
+        self.requests = 0
+        self._challenged = set()
+
+    def delay(self):
+        if self.latency_ms or self.jitter_ms:
+            with self.lock:
+                jitter = self.random.uniform(-self.jitter_ms, self.jitter_ms)
+            time.sleep(max(0.0, self.latency_ms + jitter) / 1000)
+
+    def challenge(self, page_number):
+        """Return "captcha", "error" or None for this request of ``page_number``."""
+        with self.lock:
+            self.requests += 1
+            # Each page is challenged at most once; its reload gets through
+            if page_number not in self._challenged:
+                if page_number in self.captcha_pages or self.random.random() < self.captcha_rate:
+                    self._challenged.add(page_number)
+                    self.captchas_served += 1
+                    return "captcha"
+            if page_number in self.error_pages or self.random.random() < self.error_rate:
+                self.errors_served += 1
+                return "error"
+        return None
+
+    def results_page(self, page_number, base_url, query):
+        html = self.results_html
+        # Distinct listings per page: suffix every token with the page number
+        for token in self.tokens:
+            html = html.replace(token, f"{token}p{page_number}")
+        html = PAGINATION_PATTERN.sub(
+            f'"pagination":{{"total":{len(self.tokens) * self.pages},"totalPages":{self.pages}}}', html
+        )
+        html = html.replace("https://www.yad2.co.il", base_url)
+
+        if page_number < self.pages:
+            query = {key: values[-1] for key, values in query.items()}
+            query["page"] = str(page_number + 1)
+            href = SEARCH_PATH + "?" + "&amp;".join(f"{key}={value}" for key, value in query.items())
+            html = html.replace("</body>", f'<a aria-label="{NEXT_PAGE_LABEL}" href="{href}">next</a></body>')
+        return html
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    config = None
+
+    def do_GET(self):
+        address = urlsplit(self.path)
+        if address.path.rstrip("/") != SEARCH_PATH:
+            # Next.js chunks, images and the like: not needed for extraction
+            self.send_error(404)
+            return
+
+        query = parse_qs(address.query)
+        page_number = int(query.get("page", ["1"])[-1])
+        self.config.delay()
+
+        challenge = self.config.challenge(page_number)
+        if challenge == "captcha":
+            self._send(200, self.config.captcha_html)
+        elif challenge == "error":
+            self._send(503, self.config.error_html)
+        elif page_number > self.config.pages:
+            self._send(404, self.config.error_html)
+        else:
+            base_url = f"http://{self.headers.get('Host')}"
+            self._send(200, self.config.results_page(page_number, base_url, query))
+
+    def _send(self, status, html):
+        body = html.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer:
+    """Runs the stand-in on a background thread; use as a context manager."""
+
+    def __init__(self, config, host="127.0.0.1", port=0):
+        handler = type("Handler", (StandInHandler,), {"config": config})
+        self.config = config
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def search_url(self, **params):
+        query = "&".join(f"{key}={value}" for key, value in {"propertyGroup": "apartments", **params}.items())
+        return f"{self.base_url}{SEARCH_PATH}?{query}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def parse_pages(value):
+    return {int(page) for page in value.split(",") if page.strip()} if value else set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--captcha-pages", default="", help="Comma-separated pages that get a CAPTCHA first")
+    parser.add_argument("--captcha-rate", type=float, default=0.0)
+    parser.add_argument("--error-pages", default="", help="Comma-separated pages that always fail")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    config = StandInConfig(
+        pages=args.pages, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        captcha_pages=parse_pages(args.captcha_pages), captcha_rate=args.captcha_rate,
+        error_pages=parse_pages(args.error_pages), error_rate=args.error_rate,
+    )
+    with StandInServer(config, port=args.port) as server:
+        print(f"Serving {args.pages} pages at {server.search_url()}")
+        try:
+            server.thread.join()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
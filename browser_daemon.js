@@ -0,0 +1,49 @@
+const puppeteer = require("puppeteer");
+
+// Long-lived Chromium shared by scraper runs. interactive_scraper.js connects to it
+// with --browser-ws=<endpoint> and opens a fresh browser context per run instead of
+// launching (and cold-starting) a new browser every time.
+
+// Function to print one JSON line for browser_daemon.py
+function emitEvent(event, fields = {}) {
+    console.log(JSON.stringify({ event, ts: Date.now(), ...fields }));
+}
+
+async function startDaemon() {
+    // Launch browser in visible mode, with the same settings as the scraper
+    const browser = await puppeteer.launch({
+        headless: false, // Visible browser so user can solve CAPTCHAs
+        args: [
+            "--no-sandbox",
+            "--disable-setuid-sandbox",
+            "--window-size=1920,1080",
+        ],
+        defaultViewport: {
+            width: 1920,
+            height: 1080,
+        },
+    });
+
+    emitEvent("ready", { ws_endpoint: browser.wsEndpoint(), pid: browser.process().pid });
+
+    // Exit when Chromium goes away so the Python side notices and restarts us
+    browser.on("disconnected", () => {
+        emitEvent("error", { message: "Browser disconnected", fatal: true });
+        process.exit(1);
+    });
+
+    // Close the browser cleanly when asked to stop
+    const shutdown = async () => {
+        browser.removeAllListeners("disconnected");
+        await browser.close().catch(() => {});
+        process.exit(0);
+    };
+    process.on("SIGTERM", shutdown);
+    process.on("SIGINT", shutdown);
+}
+
+startDaemon().catch(error => {
+    console.error("Error starting browser daemon:", error);
+    emitEvent("error", { message: error.message, fatal: true });
+    process.exit(1);
+});
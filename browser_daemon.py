@@ -0,0 +1,127 @@
+"""Keep one warm Chromium running and hand its endpoint to scraper runs.
+
+browser_daemon.js launches Chromium once and prints its DevTools WebSocket
+endpoint. Scraper runs connect to that endpoint and open a new browser context
+instead of paying a full browser cold start each time. The daemon is health
+checked before every run and restarted automatically if it died.
+"""
+
+import json
+import os
+import subprocess
+import threading
+import time
+import urllib.request
+from urllib.parse import urlparse
+
+from scraper_events import parse_event
+
+# Path of the Node daemon next to this module
+DAEMON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "browser_daemon.js")
+
+# Seconds to wait for Chromium to come up
+STARTUP_TIMEOUT = 60
+
+# Seconds allowed for a health check request
+HEALTH_CHECK_TIMEOUT = 2
+
+
+class BrowserDaemon:
+    """Owns the browser_daemon.js process and its DevTools endpoint."""
+
+    def __init__(self, startup_timeout=STARTUP_TIMEOUT):
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self.ws_endpoint = None
+        self.restarts = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Launch the daemon and wait until it reports its endpoint."""
+        if not os.path.exists(DAEMON_PATH):
+            raise FileNotFoundError(f"Browser daemon not found at {DAEMON_PATH}")
+
+        print(f"Starting browser daemon: node {DAEMON_PATH}")
+        self.process = subprocess.Popen(
+            ["node", DAEMON_PATH],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1
+        )
+
+        # Read events until the daemon is ready; the deadline is enforced by a timer
+        timer = threading.Timer(self.startup_timeout, self.process.kill)
+        timer.start()
+        error = "exited before it was ready"
+        try:
+            for line in iter(self.process.stdout.readline, ''):
+                event = parse_event(line)
+                if event is None:
+                    continue
+                if event.event == "ready":
+                    self.ws_endpoint = event.get("ws_endpoint")
+                    break
+                if event.event == "error":
+                    error = event.get("message")
+                    break
+        finally:
+            timer.cancel()
+
+        if not self.ws_endpoint:
+            self.stop()
+            raise RuntimeError(f"Browser daemon failed to start: {error}")
+
+        # Keep draining stdout so the daemon never blocks on a full pipe
+        threading.Thread(target=self._drain, daemon=True).start()
+        print(f"Browser daemon ready at {self.ws_endpoint}")
+        return self.ws_endpoint
+
+    def _drain(self):
+        for _ in iter(self.process.stdout.readline, ''):
+            pass
+
+    def is_healthy(self):
+        """True if the daemon process is alive and Chromium answers on its DevTools port."""
+        if self.process is None or self.process.poll() is not None or not self.ws_endpoint:
+            return False
+
+        address = urlparse(self.ws_endpoint)
+        try:
+            with urllib.request.urlopen(
+                f"http://{address.hostname}:{address.port}/json/version",
+                timeout=HEALTH_CHECK_TIMEOUT
+            ) as response:
+                return json.load(response).get("webSocketDebuggerUrl") is not None
+        except (OSError, ValueError):
+            return False
+
+    def ensure_running(self):
+        """Return a live endpoint, (re)starting the daemon if needed."""
+        with self._lock:
+            if self.is_healthy():
+                return self.ws_endpoint
+
+            if self.process is not None:
+                print("Browser daemon is not healthy, restarting it")
+                self.restarts += 1
+                self.stop()
+            return self.start()
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
+        self.ws_endpoint = None
+
+    def status(self):
+        return {
+            "running": self.process is not None and self.process.poll() is None,
+            "ws_endpoint": self.ws_endpoint,
+            "restarts": self.restarts,
+            "checked_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
@@ -0,0 +1,60 @@
+// CAPTCHA detection rules shared by interactive_scraper.js and its tests.
+// Nothing here touches Puppeteer: findCaptchaMarker runs inside a page
+// (page.evaluate), classifyCaptcha combines its answer with the tab's URL and
+// document status.
+
+// CAPTCHA markers. Detection only looks for these, never at the page text, which
+// mentions "robots" and loads a hidden reCAPTCHA frame on ordinary results pages
+const CAPTCHA_SELECTORS = [
+    'iframe[src*="hcaptcha.com"][src*="frame=checkbox"]',
+    'iframe[src*="hcaptcha.com"][src*="frame=challenge"]',
+    'iframe[src*="/recaptcha/api2/anchor"]',
+    'iframe[src*="/recaptcha/api2/bframe"]',
+    'iframe[src*="challenges.cloudflare.com"]',
+    ".h-captcha",
+    ".g-recaptcha",
+    ".captcha-wrapper",
+    ".security-error",
+];
+const CAPTCHA_TITLES = ["shieldsquare captcha", "אבטחת אתר"];
+// Bot-wall redirect targets
+const CAPTCHA_URL_PATTERN = /^https?:\/\/([^/]+\.)?perfdrive\.com\/|^https?:\/\/[^/?#]+\/captcha\b/i;
+// Document statuses a bot wall is served with; error statuses (5xx) are never a CAPTCHA
+const CAPTCHA_STATUS_CODES = [403, 429];
+
+// Function to tell whether the URL and status alone decide, without reading the page
+function decidedWithoutPage(url, status) {
+    return status >= 500 || CAPTCHA_URL_PATTERN.test(url || "");
+}
+
+// Function to combine what gave a CAPTCHA away: "redirect", the in-page marker,
+// "status_NNN" for a bot-wall status without a marker, or null
+function classifyCaptcha({ url = "", status = null, marker = null }) {
+    if (status >= 500) return null;
+    if (CAPTCHA_URL_PATTERN.test(url || "")) return "redirect";
+    if (marker || !CAPTCHA_STATUS_CODES.includes(status)) return marker;
+    return `status_${status}`;
+}
+
+// Function run inside the page: one title check and one selector query, limited to visible elements
+function findCaptchaMarker(selectors, titles) {
+    const title = document.title.toLowerCase();
+    if (titles.some(text => title.includes(text))) return "title";
+
+    for (const element of document.querySelectorAll(selectors.join(","))) {
+        if (element.getClientRects().length > 0) {
+            return element.tagName === "IFRAME" ? "challenge_iframe" : "challenge_widget";
+        }
+    }
+    return null;
+}
+
+module.exports = {
+    CAPTCHA_SELECTORS,
+    CAPTCHA_TITLES,
+    CAPTCHA_URL_PATTERN,
+    CAPTCHA_STATUS_CODES,
+    classifyCaptcha,
+    decidedWithoutPage,
+    findCaptchaMarker,
+};
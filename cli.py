@@ -0,0 +1,170 @@
+"""Run a scrape from the command line, without Streamlit.
+
+Usage:
+    python -m cli scrape URL [--pages N] [--out PATH] [--format parquet] [--captcha fail|wait]
+
+The scrape goes through the same job pipeline as the app (job_manager.ScrapeJob):
+the scraper run, loading, timestamping, source_url tagging and normalization.
+Nobody is there to click "I've Solved the CAPTCHA", so a CAPTCHA either fails
+the run right away or is waited on for a bounded time (e.g. for someone to
+solve it over remote debugging); the run continues as soon as it clears.
+
+Exit codes: 0 success, 1 scrape failed, found nothing or could not be written,
+2 bad arguments (including Parquet output without a Parquet engine),
+3 blocked by a CAPTCHA, 130 interrupted.
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+import job_manager
+from exporter import EXPORT_FORMATS, format_for_path, parquet_available, write_export
+from detail_cache import DetailCache
+from listing_store import DEFAULT_STORE_PATH, ListingStore
+from timing import write_chrome_trace
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_CAPTCHA = 3
+EXIT_INTERRUPTED = 130
+
+# Seconds a CAPTCHA may stay unsolved with --captcha=wait
+DEFAULT_CAPTCHA_TIMEOUT = 300
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Headless Yad2 scraper")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scrape = commands.add_parser("scrape", help="Scrape one Yad2 search and write the results to a file")
+    scrape.add_argument("url", help="Yad2 search URL")
+    scrape.add_argument("--pages", type=int, default=3, help="Maximum pages to scrape (default: 3)")
+    scrape.add_argument("--out", default="yad2_listings.csv.gz", help="Output file (default: yad2_listings.csv.gz)")
+    scrape.add_argument("--format", choices=list(EXPORT_FORMATS),
+                        help="Output format; inferred from --out when omitted")
+    scrape.add_argument("--engine", choices=["next-data", "dom"], default="next-data")
+    scrape.add_argument("--concurrency", type=int, default=1, help="Parallel tabs")
+    scrape.add_argument("--block-profile", choices=["data", "lean", "full"], default="data")
+    scrape.add_argument("--artifacts", choices=["off", "on-error", "viewport", "full"], default="on-error")
+    scrape.add_argument("--captcha", choices=["fail", "wait"], default="fail",
+                        help="On a CAPTCHA: fail right away, or wait up to --captcha-timeout seconds")
+    scrape.add_argument("--captcha-timeout", type=float, default=DEFAULT_CAPTCHA_TIMEOUT)
+    scrape.add_argument("--show-browser", action="store_true", help="Open a browser window instead of running headless")
+    scrape.add_argument("--store", nargs="?", const=DEFAULT_STORE_PATH,
+                        help="Also upsert the results into the listing store (default path when no value)")
+    scrape.add_argument("--incremental", action="store_true",
+                        help="Stop at the first page without new listings; needs --store")
+    scrape.add_argument("--enrich", action="store_true",
+                        help="Also load each new or re-priced listing's detail page (cached in the detail cache)")
+    scrape.add_argument("--detail-concurrency", type=int, default=2, help="Detail pages loaded at once")
+    scrape.add_argument("--trace", help="Write per-phase timings as a Chrome trace-event JSON file")
+    return parser
+
+
+def scrape(args):
+    fmt = args.format or format_for_path(args.out)
+    if fmt is None:
+        print(f"Cannot tell the format of {args.out}; pass --format", file=sys.stderr)
+        return EXIT_USAGE
+    # Fail before scraping rather than after it
+    if fmt == "parquet" and not parquet_available():
+        print("Parquet output needs pyarrow or fastparquet installed; use another --format", file=sys.stderr)
+        return EXIT_USAGE
+    if args.incremental and not args.store:
+        print("--incremental needs --store", file=sys.stderr)
+        return EXIT_USAGE
+
+    store = ListingStore(args.store) if args.store else None
+    job = job_manager.ScrapeJob(
+        "cli", args.url, args.pages,
+        {
+            "engine": args.engine,
+            "concurrency": args.concurrency,
+            "block_profile": args.block_profile,
+            "artifacts": args.artifacts,
+            "reuse_browser": False,
+            "headless": not args.show_browser,
+            # Nobody sends CAPTCHA_SOLVED here; with --captcha wait the scraper watches for it to clear
+            "captcha_watch": args.captcha == "wait",
+            "incremental": args.incremental,
+            "enrich": args.enrich,
+            "detail_concurrency": args.detail_concurrency,
+            "save_to_history": store is not None,
+            "use_cache": False,
+        },
+        store=store,
+        detail_cache=DetailCache() if args.enrich else None
+    )
+
+    worker = threading.Thread(target=job.run, daemon=True)
+    worker.start()
+
+    captcha_since = None
+    blocked = False
+    last_message = None
+    try:
+        while worker.is_alive():
+            if job.message != last_message:
+                print(job.message, file=sys.stderr)
+                last_message = job.message
+
+            if job.status == job_manager.CAPTCHA:
+                captcha_since = captcha_since or time.time()
+                waited = time.time() - captcha_since
+                if args.captcha == "fail" or waited > args.captcha_timeout:
+                    print(f"CAPTCHA on page {job.captcha_page} not solved, giving up", file=sys.stderr)
+                    blocked = True
+                    job.cancel()
+                    worker.join()
+                    break
+            else:
+                captcha_since = None
+            worker.join(timeout=0.5)
+    except KeyboardInterrupt:
+        print("Interrupted, stopping the scraper...", file=sys.stderr)
+        job.cancel()
+        worker.join(timeout=30)
+        return EXIT_INTERRUPTED
+
+    print(job.message, file=sys.stderr)
+
+    changes = job.debug_info.get("changes")
+    if changes:
+        print(
+            f"Since the last scrape: {changes['new']} new, {changes['removed']} removed, "
+            f"{changes['price_changed']} price changes, {changes['attributes_changed']} edited",
+            file=sys.stderr
+        )
+
+    if args.trace:
+        write_chrome_trace(job.debug_info.get("timings", []), args.trace)
+        print(f"Wrote timing trace to {args.trace}", file=sys.stderr)
+
+    # Whatever was scraped before a CAPTCHA or cancel is still written out
+    if job.df is not None:
+        try:
+            write_export(job.df, fmt, args.out)
+        except (ImportError, OSError) as e:
+            print(f"Could not write {args.out}: {e}", file=sys.stderr)
+            return EXIT_FAILED
+        print(f"Wrote {len(job.df)} listings to {args.out}", file=sys.stderr)
+
+    if blocked:
+        return EXIT_CAPTCHA
+    if job.status != job_manager.DONE:
+        return EXIT_FAILED
+    return EXIT_OK
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "scrape":
+        return scrape(args)
+    return EXIT_USAGE
+
+
+if __name__ == "__main__":
+    sys.exit(main())
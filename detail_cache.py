@@ -0,0 +1,127 @@
+"""On-disk cache of listing detail pages, keyed by Yad2 listing id.
+
+Elevator, parking, balcony, description, seller type and publish date only
+appear on a listing's own page, so enriching a scrape costs one page load per
+listing. The cache keeps the parsed fields of every detail page with the price
+the listing had when it was fetched. A later scrape only loads the detail
+pages of listings that are not cached, whose entry is older than the TTL, or
+whose price has changed since.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from next_data import DETAIL_FIELDS
+
+# Default location of the cache, overridable with YAD2_DETAIL_CACHE_PATH
+DEFAULT_DETAIL_CACHE_PATH = os.environ.get(
+    "YAD2_DETAIL_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "details.db")
+)
+
+# Seconds a detail page is reused before it is loaded again
+DEFAULT_DETAIL_TTL = 7 * 24 * 3600
+
+DETAIL_COLUMNS = list(DETAIL_FIELDS)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS details (
+    listing_id TEXT PRIMARY KEY,
+    price INTEGER,
+    fetched_at REAL NOT NULL,
+    payload TEXT NOT NULL
+);
+"""
+
+
+def merge_details(df, details):
+    """Left-join detail columns onto listings by ``listing_id``, with typed columns."""
+    if details is None or details.empty or "listing_id" not in df.columns:
+        return df
+
+    details = details.drop_duplicates("listing_id", keep="last").astype({"listing_id": df["listing_id"].dtype})
+    df = df.drop(columns=[column for column in DETAIL_COLUMNS if column in df.columns])
+    df = df.merge(details, on="listing_id", how="left")
+
+    for column in ("elevator", "parking", "balcony"):
+        # Listings without cached details keep NA rather than False
+        df[column] = df[column].map(lambda value: pd.NA if value is None or pd.isna(value) else bool(value)) \
+            .astype("boolean")
+    df["description"] = df["description"].astype("string")
+    df["seller_type"] = df["seller_type"].astype("category")
+    df["published_at"] = pd.to_datetime(df["published_at"], errors="coerce", utc=True).dt.tz_localize(None)
+    return df
+
+
+class DetailCache:
+    """Thread-safe SQLite cache of parsed detail pages."""
+
+    def __init__(self, path=DEFAULT_DETAIL_CACHE_PATH, ttl=DEFAULT_DETAIL_TTL):
+        self.path = path
+        self.ttl = ttl
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def fresh_prices(self):
+        """Map of listing id -> price at fetch time for entries younger than the TTL."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT listing_id, price FROM details WHERE fetched_at > ?", (time.time() - self.ttl,)
+            ).fetchall()
+        return dict(rows)
+
+    def put_many(self, records, prices=None):
+        """Store parsed detail records; ``prices`` maps listing id -> current price."""
+        prices = prices or {}
+        now = time.time()
+        rows = [
+            (
+                record["listing_id"],
+                prices.get(record["listing_id"]),
+                now,
+                json.dumps({column: record.get(column) for column in DETAIL_COLUMNS}, ensure_ascii=False),
+            )
+            for record in records
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO details (listing_id, price, fetched_at, payload) VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def get_many(self, listing_ids):
+        """Cached details of ``listing_ids`` as a DataFrame, expired entries included."""
+        listing_ids = [str(listing_id) for listing_id in listing_ids if listing_id is not None and not pd.isna(listing_id)]
+        rows = []
+        with self._lock:
+            # Stay under SQLite's limit on bound parameters
+            for start in range(0, len(listing_ids), 500):
+                chunk = listing_ids[start:start + 500]
+                rows.extend(self._conn.execute(
+                    f"SELECT listing_id, payload FROM details WHERE listing_id IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall())
+        return pd.DataFrame(
+            [{"listing_id": listing_id, **json.loads(payload)} for listing_id, payload in rows],
+            columns=["listing_id"] + DETAIL_COLUMNS
+        )
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM details").fetchone()[0]
@@ -0,0 +1,163 @@
+"""Serialize result DataFrames to export files on demand.
+
+Exports are written straight to disk, in chunks where the format allows, and
+named by a hash of the DataFrame's content. Exporting the same data again in
+the same format, from any session, reuses the file that is already there
+instead of serializing it a second time.
+"""
+
+import hashlib
+import importlib.util
+import os
+import threading
+from dataclasses import dataclass
+
+import pandas as pd
+
+# Streamlit serves this directory at app/static/ (enableStaticServing in .streamlit/config.toml)
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+# Default location of export files, inside the static directory so they download from disk
+DEFAULT_EXPORT_DIR = os.environ.get("YAD2_EXPORT_DIR", os.path.join(STATIC_DIR, "exports"))
+
+# Total size of export files kept before the oldest are deleted
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+# Rows serialized per chunk for formats written piece by piece
+CHUNK_ROWS = 50000
+
+# Format key -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "csv.gz": ("csv.gz", "application/gzip"),
+    "csv": ("csv", "text/csv"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+    "jsonl": ("jsonl", "application/x-ndjson"),
+}
+
+
+@dataclass
+class ExportFile:
+    """An export written to disk."""
+    path: str
+    format: str
+    mime: str
+    bytes: int
+    cached: bool
+
+
+def parquet_available():
+    return any(importlib.util.find_spec(name) is not None for name in ("pyarrow", "fastparquet"))
+
+
+def available_formats():
+    """Export formats usable with the installed packages."""
+    return [fmt for fmt in EXPORT_FORMATS if fmt != "parquet" or parquet_available()]
+
+
+def content_hash(df):
+    """Hash of a DataFrame's columns, dtypes and values, without serializing it."""
+    digest = hashlib.sha1()
+    digest.update(repr([(str(column), str(dtype)) for column, dtype in df.dtypes.items()]).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+def _write_csv_gz(df, path):
+    # pandas writes CSV in chunks through the gzip stream
+    df.to_csv(path, index=False, compression="gzip", chunksize=CHUNK_ROWS)
+
+
+def _write_csv(df, path):
+    df.to_csv(path, index=False, chunksize=CHUNK_ROWS)
+
+
+def _write_parquet(df, path):
+    df.to_parquet(path, index=False)
+
+
+def _write_jsonl(df, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for start in range(0, len(df), CHUNK_ROWS):
+            chunk = df.iloc[start:start + CHUNK_ROWS]
+            text = chunk.to_json(orient="records", lines=True, force_ascii=False, date_format="iso")
+            # Older pandas leave out the final newline, which would glue chunks together
+            f.write(text if text.endswith("\n") else text + "\n")
+
+
+WRITERS = {
+    "csv.gz": _write_csv_gz,
+    "csv": _write_csv,
+    "parquet": _write_parquet,
+    "jsonl": _write_jsonl,
+}
+
+
+def static_url(path):
+    """Relative URL of a file under STATIC_DIR as served by Streamlit, or None outside it."""
+    relative = os.path.relpath(os.path.abspath(path), STATIC_DIR)
+    if relative.startswith(os.pardir):
+        return None
+    return "app/static/" + relative.replace(os.sep, "/")
+
+
+def format_for_path(path):
+    """Export format implied by a file name, or None."""
+    for fmt, (extension, _) in EXPORT_FORMATS.items():
+        if path.endswith("." + extension):
+            return fmt
+    return None
+
+
+def write_export(df, fmt, path):
+    """Write ``df`` to ``path`` in ``fmt``, replacing the file atomically."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if fmt == "parquet" and not parquet_available():
+        raise ImportError("Parquet export needs pyarrow or fastparquet installed")
+
+    WRITERS[fmt](df, path + ".tmp")
+    os.replace(path + ".tmp", path)
+
+
+class Exporter:
+    """Content-addressed export files in one directory."""
+
+    def __init__(self, directory=DEFAULT_EXPORT_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def export(self, df, fmt):
+        """Write ``df`` in ``fmt`` unless an identical export exists; return an ExportFile."""
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+
+        extension, mime = EXPORT_FORMATS[fmt]
+        path = os.path.join(self.directory, f"{content_hash(df)}.{extension}")
+
+        with self._lock:
+            cached = os.path.exists(path)
+            if cached:
+                # Touch it so eviction keeps recently used exports
+                os.utime(path)
+            else:
+                write_export(df, fmt, path)
+                self._evict(keep=path)
+
+        return ExportFile(path=path, format=fmt, mime=mime, bytes=os.path.getsize(path), cached=cached)
+
+    def _evict(self, keep):
+        files = [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if not name.endswith(".tmp")
+        ]
+        total = sum(os.path.getsize(f) for f in files)
+        for f in sorted(files, key=os.path.getmtime):
+            if total <= self.max_bytes:
+                break
+            if f == keep:
+                continue
+            total -= os.path.getsize(f)
+            os.remove(f)
@@ -1,236 +1,1056 @@
 const puppeteer = require("puppeteer");
 const fs = require("fs");
 const path = require("path");
+const readline = require("readline");
+const { performance } = require("perf_hooks");
 const createCsvWriter = require("csv-writer").createObjectCsvWriter;
+const {
+    CAPTCHA_SELECTORS, CAPTCHA_TITLES, classifyCaptcha, decidedWithoutPage, findCaptchaMarker,
+} = require("./captcha_detector");
 
-// Command line arguments
-const args = process.argv.slice(2);
+// Command line arguments: positional arguments followed by optional --key=value flags
+const rawArgs = process.argv.slice(2);
+const args = rawArgs.filter(arg => !arg.startsWith("--"));
+const options = parseOptions(rawArgs.filter(arg => arg.startsWith("--")));
 const url = args[0] || "https://www.yad2.co.il/realestate/forsale?propertyGroup=apartments&property=1&rooms=4-4&price=-1-4220000&page=2";
+// Listings are appended page by page; a ".jsonl" path writes JSON lines, anything else CSV
 const outputFilename = args[1] || path.join("exports", "yad2_listings.csv");
-const commFilename = args[2]; // File for communication with Streamlit
+const controlMode = args[2] || "none"; // "stdin" to receive commands from Streamlit on stdin
 const maxPages = args[3] ? parseInt(args[3]) : 3; // Maximum number of pages to scrape, default is 3
+// Extraction engine: "dom" walks the rendered cards, "next-data" saves the raw page
+// HTML so the Python side can read the embedded __NEXT_DATA__ JSON instead
+const engine = options.engine || "dom";
+// Number of result pages fetched at the same time in separate tabs
+const concurrency = Math.max(1, parseInt(options.concurrency || "1"));
+// DevTools endpoint of a warm browser started by browser_daemon.js; launch our own if absent
+const browserWSEndpoint = options["browser-ws"];
+// Which requests to let through: "data" (listing data only), "lean" (no media), or "full"
+const blockProfile = options["block-profile"] || "full";
+// Debug screenshots: "off", "on-error" (CAPTCHAs and failures), "viewport" (JPEG), or "full" (full-page PNG)
+const artifactPolicy = options.artifacts || "full";
+// Run without a window (scheduled scrapes); CAPTCHAs can then only be waited out or failed
+const headless = options.headless === "true";
+// Treat a CAPTCHA as solved once it has cleared, without waiting for the "captcha_solved" command
+// (command line runs, where it is solved over remote debugging and nobody clicks the button)
+const captchaWatch = options["captcha-watch"] === "true";
+// JSON file of already stored listings (id -> price); when given, stop at the first page with nothing new
+const knownListings = options["known-ids"] ? loadKnownListings(options["known-ids"]) : null;
+// JSON file of listings whose detail page is cached (id -> price); when given, the detail page of
+// every other listing, or of one whose price changed, is saved after the results pages
+const cachedDetails = options.enrich ? loadKnownListings(options.enrich) : null;
+// Detail pages loaded at the same time, and the most loaded in one run
+const detailConcurrency = Math.max(1, parseInt(options["detail-concurrency"] || "2"));
+const detailLimit = Math.max(0, parseInt(options["detail-limit"] || "200"));
 
 // Global variables
 let browser;
+let context; // Browser context this run opens its tabs in
 let page;
 let data = [];
 let currentPage = 1;
+let outputStarted = false;
+let totalListings = 0;
+let pagesScraped = 0;
+let pageFiles = [];
+let pagesFailed = 0;
+let lastPageRecorded = 0;
+let searchLastPage = null; // last page of the search from __NEXT_DATA__, counted from the first page scraped
+let searchEndReached = false; // set when the search showed it has no more pages
+const runStart = Date.now();
 
-// Function to wait for a signal from Streamlit
-async function waitForSignal(signal) {
-    console.log(`Waiting for ${signal} signal from Streamlit...`);
-    console.log(`Communication file: ${commFilename}`);
+const USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36';
 
-    return new Promise((resolve) => {
-        if (!commFilename) {
-            console.log("No communication file provided, resolving immediately");
-            resolve();
-            return;
-        }
+// Request blocking profiles: resource types to drop and whether third-party trackers are dropped
+const BLOCK_PROFILES = {
+    data: { types: ["image", "media", "font", "stylesheet", "texttrack", "eventsource", "manifest"], trackers: true },
+    lean: { types: ["image", "media", "font"], trackers: true },
+    full: { types: [], trackers: false },
+};
+
+// Hosts of ads, analytics and maps that listing extraction never needs
+const TRACKER_HOSTS = [
+    "doubleclick.net", "googlesyndication.com", "googletagmanager.com", "googletagservices.com",
+    "google-analytics.com", "adservice.google.com", "facebook.net", "facebook.com", "hotjar.com",
+    "clarity.ms", "taboola.com", "outbrain.com", "criteo.com", "tiktok.com", "yahoo.com",
+    "maps.googleapis.com", "maps.gstatic.com", "tile.openstreetmap.org",
+];
+
+// Hosts that must always load so CAPTCHAs can be shown and solved
+const ALLOWED_HOSTS = ["hcaptcha.com", "perfdrive.com", "captcha-assets.yad2.co.il", "recaptcha.net", "gstatic.com/recaptcha"];
+
+// Times the user is asked to solve one CAPTCHA before its page is given up on
+const MAX_CAPTCHA_ATTEMPTS = 3;
+// How long a solved CAPTCHA may take to clear (redirect back), and how often to look
+const CAPTCHA_SETTLE_MS = 5000;
+const CAPTCHA_POLL_MS = 250;
+
+// How long a loaded page may take to show listings different from the page before
+const CONTENT_CHANGE_TIMEOUT_MS = 10000;
+const CONTENT_CHANGE_POLL_MS = 100;
+
+// Typical transfer size of blocked resources, used to estimate the bytes saved
+const ESTIMATED_BYTES = {
+    image: 60000, media: 500000, font: 40000, stylesheet: 30000, script: 50000,
+    xhr: 5000, fetch: 5000, other: 5000,
+};
+
+// Tab number of each worker tab, for timing spans; the main page is tab 0
+const tabIds = new WeakMap();
+
+// HTTP status of the document last loaded in each tab
+const documentStatus = new WeakMap();
+
+// Debug screenshots taken during the run and the captures still being written
+const artifactManifest = [];
+const pendingArtifacts = [];
+
+// Per-run request statistics
+const networkStats = {
+    profile: blockProfile,
+    requests: 0,
+    blocked: 0,
+    blocked_by_type: {},
+    bytes_loaded: 0,
+    estimated_bytes_saved: 0,
+};
+
+// New, updated (price changed) and unchanged listings seen in incremental mode
+const incrementalStats = {
+    known: knownListings ? knownListings.size : 0,
+    new: 0,
+    updated: 0,
+    unchanged: 0,
+    stopped_at_page: null,
+};
+
+// Listings whose detail page is still to be saved, and what enrichment did
+const detailQueue = new Map(); // listing id -> detail page URL
+const detailStats = {
+    cached: cachedDetails ? cachedDetails.size : 0,
+    queued: 0,
+    saved: 0,
+    failed: 0,
+    skipped: 0,
+};
+
+// Columns written for each listing, shared by the CSV and JSONL outputs
+const OUTPUT_COLUMNS = [
+    { id: "title", title: "Title" },
+    { id: "price", title: "Price" },
+    { id: "address", title: "Address" },
+    { id: "rooms", title: "Rooms" },
+    { id: "floor", title: "Floor" },
+    { id: "size", title: "Size" },
+    { id: "url", title: "URL" },
+];
+
+// Control channel state
+let controlChannel = null;
+let paused = false;
+let cancelled = false;
+const pendingCommands = []; // Commands received before anything waited for them
+const commandWaiters = {}; // Command name -> resolvers waiting for it
+const resumeWaiters = [];
+let captchaLock = Promise.resolve();
+
+// Function to emit a structured event as one JSON line on stdout for app.py
+function emitEvent(event, fields = {}) {
+    console.log(JSON.stringify({ event, ts: Date.now(), ...fields }));
+}
+
+// Function to report one timed phase; times are monotonic milliseconds since process start
+function recordTiming(name, start, fields = {}) {
+    const end = performance.now();
+    emitEvent("timing", {
+        name,
+        ...fields,
+        start_ms: Math.round(start * 10) / 10,
+        duration_ms: Math.round((end - start) * 10) / 10,
+    });
+}
+
+// Function to time an async phase, recording it even if it throws
+async function timed(name, fields, task) {
+    const start = performance.now();
+    try {
+        return await task();
+    } finally {
+        recordTiming(name, start, fields);
+    }
+}
+
+// Function to get the tab number of a page for timing spans
+function tabId(targetPage) {
+    return tabIds.get(targetPage) || 0;
+}
+
+// Function to parse --key=value flags into an object
+function parseOptions(flags) {
+    const parsed = {};
+    for (const flag of flags) {
+        const [key, ...rest] = flag.slice(2).split("=");
+        parsed[key] = rest.length > 0 ? rest.join("=") : "true";
+    }
+    return parsed;
+}
 
-        // Check if the file exists initially
-        if (fs.existsSync(commFilename)) {
-            const content = fs.readFileSync(commFilename, 'utf8');
-            console.log(`Initial file content: "${content}"`);
-            if (content.includes(signal)) {
-                console.log(`Signal ${signal} already received`);
-                // Delete the file to reset the signal
-                fs.unlinkSync(commFilename);
-                resolve();
-                return;
+// Function to start reading JSON-line commands from Streamlit on stdin
+function startControlChannel() {
+    if (controlMode !== "stdin") return;
+
+    controlChannel = readline.createInterface({ input: process.stdin });
+    controlChannel.on("line", handleCommand);
+}
+
+// Function to stop reading commands so the process can exit
+function stopControlChannel() {
+    if (controlChannel) {
+        controlChannel.close();
+        process.stdin.destroy();
+        controlChannel = null;
+    }
+}
+
+// Function to handle one command line, e.g. {"cmd": "captcha_solved", "id": 3}
+function handleCommand(line) {
+    if (!line.trim()) return;
+
+    let message;
+    try {
+        message = JSON.parse(line);
+    } catch (error) {
+        message = { cmd: line.trim() };
+    }
+    const { cmd, id } = message;
+
+    // Acknowledge immediately so the sender knows the command was delivered
+    emitEvent("ack", { cmd, id });
+
+    switch (cmd) {
+        case "pause":
+            paused = true;
+            break;
+        case "resume":
+            paused = false;
+            resumeWaiters.splice(0).forEach(resolve => resolve());
+            break;
+        case "cancel":
+            cancelled = true;
+            paused = false;
+            // Release everything that is waiting so the run can wind down
+            resumeWaiters.splice(0).forEach(resolve => resolve());
+            Object.values(commandWaiters).forEach(waiters => waiters.splice(0).forEach(resolve => resolve()));
+            break;
+        default: {
+            const waiters = commandWaiters[cmd];
+            if (waiters && waiters.length > 0) {
+                waiters.shift()();
+            } else {
+                pendingCommands.push(cmd);
             }
-        } else {
-            console.log(`Communication file does not exist yet: ${commFilename}`);
         }
+    }
+}
 
-        console.log(`Setting up file watcher for ${commFilename}`);
-        // Set up a file watcher
-        const checkInterval = setInterval(() => {
-            try {
-                if (fs.existsSync(commFilename)) {
-                    const content = fs.readFileSync(commFilename, 'utf8');
-                    console.log(`File check: "${content}"`);
-                    if (content.includes(signal)) {
-                        console.log(`Signal ${signal} received`);
-                        clearInterval(checkInterval);
-                        // Delete the file to reset the signal
-                        fs.unlinkSync(commFilename);
-                        resolve();
-                    }
-                }
-            } catch (error) {
-                console.error(`Error checking signal file: ${error.message}`);
-            }
-        }, 500); // Check every 500ms
+// Function to wait for a command from Streamlit
+function waitForCommand(cmd) {
+    console.log(`Waiting for ${cmd} command from Streamlit...`);
+
+    if (controlMode !== "stdin") {
+        console.log("No control channel, resolving immediately");
+        return Promise.resolve();
+    }
+
+    // The command may have arrived before we started waiting
+    const index = pendingCommands.indexOf(cmd);
+    if (index !== -1 || cancelled) {
+        if (index !== -1) pendingCommands.splice(index, 1);
+        return Promise.resolve();
+    }
+
+    return new Promise(resolve => {
+        (commandWaiters[cmd] = commandWaiters[cmd] || []).push(resolve);
     });
 }
 
+// Function to block while paused; returns false once the run was cancelled
+async function checkpoint() {
+    if (paused) {
+        emitEvent("phase", { phase: "paused", page: currentPage });
+        await new Promise(resolve => resumeWaiters.push(resolve));
+        emitEvent("phase", { phase: "resumed", page: currentPage });
+    }
+    return !cancelled;
+}
+
+// Function to read the known listing ids and prices written by app.py
+function loadKnownListings(knownPath) {
+    const known = JSON.parse(fs.readFileSync(knownPath, "utf8"));
+    // Accept either {id: price} or a plain list of ids
+    const entries = Array.isArray(known) ? known.map(id => [String(id), null]) : Object.entries(known);
+    return new Map(entries);
+}
+
 // Main scraper function
 async function scrapeYad2() {
     try {
         console.log("Starting Interactive Yad2 scraper...");
+        startControlChannel();
+        emitEvent("phase", { phase: "launch", url, max_pages: maxPages, engine });
+        const launchStart = performance.now();
 
-        // Launch browser in visible mode
-        browser = await puppeteer.launch({
-            headless: false, // Visible browser so user can interact
-            args: [
-                "--no-sandbox",
-                "--disable-setuid-sandbox",
-                "--window-size=1920,1080",
-            ],
-            defaultViewport: {
-                width: 1920,
-                height: 1080,
-            },
-        });
+        if (browserWSEndpoint) {
+            // Reuse the warm browser and isolate this run in its own context
+            console.log(`Connecting to browser at ${browserWSEndpoint}...`);
+            browser = await puppeteer.connect({
+                browserWSEndpoint,
+                defaultViewport: {
+                    width: 1920,
+                    height: 1080,
+                },
+            });
+            context = browser.createBrowserContext
+                ? await browser.createBrowserContext()
+                : await browser.createIncognitoBrowserContext();
+        } else {
+            // Launch browser in visible mode
+            browser = await puppeteer.launch({
+                headless, // Visible browser by default so user can interact
+                args: [
+                    "--no-sandbox",
+                    "--disable-setuid-sandbox",
+                    "--window-size=1920,1080",
+                ],
+                defaultViewport: {
+                    width: 1920,
+                    height: 1080,
+                },
+            });
+            context = browser;
+        }
 
         // Create new page
-        page = await browser.newPage();
+        page = await context.newPage();
+        await applyRequestPolicy(page);
 
         // Set user agent
-        await page.setUserAgent('Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36');
+        await page.setUserAgent(USER_AGENT);
+        recordTiming("launch", launchStart, { tab: 0, shared_browser: Boolean(browserWSEndpoint) });
 
         // Navigate to URL
         console.log(`Navigating to ${url}...`);
-        await page.goto(url, {
+        emitEvent("phase", { phase: "navigate" });
+        await timed("goto", { tab: 0, page: 1 }, () => page.goto(url, {
             waitUntil: "networkidle2",
             timeout: 60000,
-        });
+        }));
 
         console.log("Page loaded successfully");
 
         // Take screenshot
-        const screenshotPath = path.join(path.dirname(outputFilename), "page_loaded.png");
-        await page.screenshot({ path: screenshotPath, fullPage: true });
+        captureArtifact(page, "page_loaded", "debug");
 
         // Check for captcha
-        await handleCaptcha();
+        await timed("captcha_check", { tab: 0, page: 1 }, () => handleCaptcha());
 
         // We'll use the specific class name from the provided element
-        const listingSelector = "div.item-data-content_itemDataContentBox__gvAC2";
-        console.log(`Using selector: ${listingSelector}`);
+        const listingSelector = engine === "next-data"
+            ? "script#__NEXT_DATA__"
+            : "div.item-data-content_itemDataContentBox__gvAC2";
+        console.log(`Using ${engine} engine with selector: ${listingSelector}`);
 
         // Extract listings from all pages
-        let allListings = [];
-        let hasNextPage = true;
-
-        while (hasNextPage && currentPage <= maxPages) {
-            console.log(`Scraping page ${currentPage}...`);
+        emitEvent("phase", { phase: "scrape", concurrency });
+        if (concurrency > 1) {
+            // Page 1 here, the remaining pages in parallel tabs
+            const pageStart = Date.now();
+            const pageTimer = performance.now();
+            emitEvent("page", { status: "start", page: currentPage });
+            const pageResult = await scrapePage(page, currentPage, listingSelector);
+            const hasNew = await recordPage(currentPage, pageResult, pageStart);
+            recordTiming("page", pageTimer, { tab: 0, page: currentPage });
 
-            // Wait for listings to load
-            await page.waitForSelector(listingSelector, { timeout: 10000 })
-                .catch(e => console.log(`No listings found on page ${currentPage}: ${e.message}`));
-
-            // Extract listings from current page
-            const pageListings = await extractListings(listingSelector);
-            console.log(`Extracted ${pageListings.length} listings from page ${currentPage}`);
-
-            // Add to all listings
-            allListings = allListings.concat(pageListings);
-
-            // Check if there's a next page
-            hasNextPage = await goToNextPage();
-            if (hasNextPage) {
-                currentPage++;
-                // Wait for page to load
-                await page.waitForNavigation({ waitUntil: "networkidle2", timeout: 30000 })
-                    .catch(e => console.log(`Error waiting for navigation: ${e.message}`));
+            // In incremental mode a page of already-seen listings ends the run
+            if (hasNew) await scrapeRemainingPagesInParallel(listingSelector);
+        } else {
+            await scrapePagesInOrder(listingSelector);
+        }
 
-                // Check for captcha again
-                await handleCaptcha();
-            }
+        // Save the detail pages of new or re-priced listings
+        if (cachedDetails && detailQueue.size > 0 && !cancelled) {
+            await timed("enrich", { tab: 0 }, () => saveDetailPages());
         }
 
-        if (allListings.length > 0) {
-            // Save to CSV
-            await saveToCSV(allListings);
-            console.log(`Successfully scraped ${allListings.length} listings to ${outputFilename}`);
-            console.log(JSON.stringify({
+        if (engine === "next-data" && pageFiles.length > 0) {
+            console.log(`Successfully saved ${pageFiles.length} pages for __NEXT_DATA__ extraction`);
+            emitEvent("result", {
                 success: true,
+                engine: engine,
+                cancelled,
+                pages: pagesScraped,
+                exhausted: searchExhausted(),
+                pages_failed: pagesFailed,
+                files: pageFiles,
+                incremental: knownListings ? incrementalStats : undefined,
+                enrichment: cachedDetails ? detailStats : undefined,
+                elapsed_ms: Date.now() - runStart
+            });
+        } else if (totalListings > 0) {
+            console.log(`Successfully scraped ${totalListings} listings to ${outputFilename}`);
+            emitEvent("result", {
+                success: true,
+                engine: engine,
+                cancelled,
                 path: outputFilename,
-                count: allListings.length
-            }));
+                count: totalListings,
+                pages: pagesScraped,
+                exhausted: searchExhausted(),
+                pages_failed: pagesFailed,
+                incremental: knownListings ? incrementalStats : undefined,
+                enrichment: cachedDetails ? detailStats : undefined,
+                elapsed_ms: Date.now() - runStart
+            });
         } else {
             console.log("No listings found");
-            console.log(JSON.stringify({
+            emitEvent("result", {
                 success: false,
-                error: "No listings found"
-            }));
+                error: "No listings found",
+                cancelled,
+                pages: pagesScraped,
+                incremental: knownListings ? incrementalStats : undefined,
+                enrichment: cachedDetails ? detailStats : undefined,
+                elapsed_ms: Date.now() - runStart
+            });
         }
 
     } catch (error) {
         console.error("Error during scraping:", error);
-        console.log(JSON.stringify({
+        emitEvent("error", { message: error.message, page: currentPage });
+        if (page) captureArtifact(page, "error", "error");
+        emitEvent("result", {
             success: false,
-            error: error.message
-        }));
+            error: error.message,
+            pages: pagesScraped,
+            files: engine === "next-data" ? pageFiles : undefined,
+            elapsed_ms: Date.now() - runStart
+        });
     } finally {
-        // Close browser
-        if (browser) await browser.close();
+        emitEvent("network", networkStats);
+        await timed("finish_artifacts", { tab: 0 }, () => finishArtifacts());
+
+        // Close our context and leave a shared browser running, or close our own browser
+        const shutdownStart = performance.now();
+        if (browser && browserWSEndpoint) {
+            if (context) await context.close().catch(() => {});
+            browser.disconnect();
+        } else if (browser) {
+            await browser.close();
+        }
+        recordTiming("shutdown", shutdownStart, { tab: 0 });
+        stopControlChannel();
     }
 }
 
-// Function to check for and handle captcha
-async function handleCaptcha() {
-    // Check for common captcha indicators
-    const hasCaptcha = await page.evaluate(() => {
-        const bodyText = document.body.textContent.toLowerCase();
-        return bodyText.includes('captcha') ||
-            bodyText.includes('robot') ||
-            bodyText.includes('human verification') ||
-            bodyText.includes('security check') ||
-            document.querySelector('.security-error') !== null ||
-            document.querySelector('.captcha') !== null ||
-            document.querySelector('.recaptcha') !== null;
+// Function to drop the requests the selected block profile does not need
+async function applyRequestPolicy(targetPage) {
+    const profile = BLOCK_PROFILES[blockProfile] || BLOCK_PROFILES.full;
+
+    // Count what is requested and downloaded either way
+    targetPage.on("request", () => {
+        networkStats.requests++;
     });
+    targetPage.on("response", response => {
+        const length = parseInt(response.headers()["content-length"] || "0");
+        if (length > 0) networkStats.bytes_loaded += length;
 
-    if (hasCaptcha) {
-        console.log("CAPTCHA detected! Please solve it in the browser window.");
+        const request = response.request();
+        if (request.isNavigationRequest() && request.frame() === targetPage.mainFrame()) {
+            documentStatus.set(targetPage, response.status());
+        }
+    });
 
-        // Take screenshot of captcha
-        const captchaScreenshotPath = path.join(path.dirname(outputFilename), "captcha.png");
-        await page.screenshot({ path: captchaScreenshotPath, fullPage: false });
-        console.log(`Captcha screenshot saved to: ${captchaScreenshotPath}`);
+    if (profile.types.length === 0 && !profile.trackers) return;
 
-        // Wait for user to solve captcha (via Streamlit button)
-        await waitForSignal('captcha_solved');
-
-        // Wait a bit for any redirects after captcha
-        await new Promise(resolve => setTimeout(resolve, 3000));
-
-        // Check if we're still on a captcha page
-        const stillHasCaptcha = await page.evaluate(() => {
-            const bodyText = document.body.textContent.toLowerCase();
-            return bodyText.includes('captcha') ||
-                bodyText.includes('robot') ||
-                bodyText.includes('human verification') ||
-                bodyText.includes('security check') ||
-                document.querySelector('.security-error') !== null ||
-                document.querySelector('.captcha') !== null ||
-                document.querySelector('.recaptcha') !== null;
-        });
+    await targetPage.setRequestInterception(true);
+    targetPage.on("request", request => {
+        const requestUrl = request.url();
+        const type = request.resourceType();
+        const allowed = ALLOWED_HOSTS.some(host => requestUrl.includes(host));
+        const blocked = !allowed && (
+            profile.types.includes(type) ||
+            (profile.trackers && TRACKER_HOSTS.some(host => requestUrl.includes(host)))
+        );
 
-        if (stillHasCaptcha) {
-            console.log("Captcha still detected. Trying again...");
-            await handleCaptcha(); // Recursive call to handle captcha again
+        if (blocked) {
+            networkStats.blocked++;
+            networkStats.blocked_by_type[type] = (networkStats.blocked_by_type[type] || 0) + 1;
+            networkStats.estimated_bytes_saved += ESTIMATED_BYTES[type] || ESTIMATED_BYTES.other;
+            request.abort().catch(() => {});
         } else {
-            console.log("Captcha solved successfully!");
+            request.continue().catch(() => {});
+        }
+    });
+}
+
+// Function to start a debug screenshot allowed by the artifact policy without waiting for it
+function captureArtifact(targetPage, name, kind) {
+    if (artifactPolicy === "off") return;
+    if (artifactPolicy === "on-error" && kind !== "error") return;
+
+    // Full-page PNGs are slow to capture and encode; everything else is a viewport JPEG
+    const fullPage = artifactPolicy === "full";
+    const type = fullPage ? "png" : "jpeg";
+    const artifactPath = path.join(path.dirname(outputFilename), `${name}.${type}`);
+    const options = fullPage
+        ? { path: artifactPath, type, fullPage: true }
+        : { path: artifactPath, type, quality: 70, fullPage: false };
+
+    const capture = targetPage.screenshot(options)
+        .then(() => {
+            const artifact = { name, kind, path: artifactPath, type, bytes: fs.statSync(artifactPath).size };
+            artifactManifest.push(artifact);
+            emitEvent("artifact", artifact);
+        })
+        .catch(e => console.log(`Error capturing ${name} screenshot: ${e.message}`));
+    pendingArtifacts.push(capture);
+}
+
+// Function to wait for screenshots still being written and save the artifact manifest
+async function finishArtifacts() {
+    await Promise.allSettled(pendingArtifacts);
+    if (artifactManifest.length === 0) return;
+
+    const manifestPath = path.join(path.dirname(outputFilename), "artifacts.json");
+    fs.writeFileSync(manifestPath, JSON.stringify(artifactManifest, null, 2));
+}
 
-            // Take screenshot after captcha
-            const afterCaptchaPath = path.join(path.dirname(outputFilename), "after_captcha.png");
-            await page.screenshot({ path: afterCaptchaPath, fullPage: true });
+// Function to scrape the page currently loaded in a tab
+async function scrapePage(targetPage, pageNumber, selector) {
+    const spanFields = { tab: tabId(targetPage), page: pageNumber };
+
+    // Wait for listings to load
+    await timed("wait_for_selector", spanFields, () => targetPage.waitForSelector(selector, { timeout: 10000 })
+        .catch(e => console.log(`No listings found on page ${pageNumber}: ${e.message}`)));
+
+    let pageResult;
+    if (engine === "next-data") {
+        // Save the raw HTML; the listings are parsed from its __NEXT_DATA__ JSON in Python
+        const pageFile = await timed("save_html", spanFields, () => savePageHtml(pageNumber, targetPage));
+        console.log(`Saved page ${pageNumber} HTML to ${pageFile}`);
+        pageResult = { listings: null, file: pageFile };
+    } else {
+        // Extract listings from current page
+        const listings = await timed("extract", spanFields, () => extractListings(selector, targetPage));
+        console.log(`Extracted ${listings.length} listings from page ${pageNumber}`);
+        pageResult = { listings, file: null };
+    }
+
+    if (knownListings || cachedDetails) {
+        pageResult.keys = await timed("read_keys", spanFields, () => readListingKeys(targetPage, pageResult));
+    }
+    return pageResult;
+}
+
+// Function to list the id and price of every listing on a scraped page
+async function readListingKeys(targetPage, pageResult) {
+    if (pageResult.listings) {
+        return pageResult.listings.map(listing => {
+            const match = /\/item\/([A-Za-z0-9]+)/.exec(listing.url || "");
+            const digits = String(listing.price || "").replace(/[^\d]/g, "");
+            return { id: match ? match[1] : null, price: digits ? parseInt(digits) : null };
+        }).filter(key => key.id);
+    }
+
+    // The next-data engine only saved the HTML; read the ids from its __NEXT_DATA__
+    return targetPage.evaluate(() => {
+        const script = document.getElementById("__NEXT_DATA__");
+        if (!script) return [];
+        try {
+            const feed = JSON.parse(script.textContent).props.pageProps.feed;
+            return Object.values(feed)
+                .filter(Array.isArray)
+                .flat()
+                .filter(item => item && item.token)
+                .map(item => ({ id: item.token, price: typeof item.price === "number" ? item.price : null }));
+        } catch (error) {
+            return [];
+        }
+    }).catch(() => []);
+}
+
+// Function to count the new, updated and unchanged listings on a page
+function classifyListings(keys) {
+    const counts = { new: 0, updated: 0, unchanged: 0 };
+    for (const { id, price } of keys) {
+        if (!knownListings.has(id)) {
+            counts.new++;
+        } else {
+            const knownPrice = knownListings.get(id);
+            const changed = knownPrice !== null && price !== null && Number(knownPrice) !== price;
+            counts[changed ? "updated" : "unchanged"]++;
         }
+    }
+    return counts;
+}
+
+// Function to write a scraped page to the output and report it; returns false when
+// incremental mode found nothing new on the page and pagination should stop
+async function recordPage(pageNumber, pageResult, pageStart) {
+    const fields = { status: "done", page: pageNumber, elapsed_ms: Date.now() - pageStart };
+
+    if (pageResult.file) {
+        pageFiles.push(pageResult.file);
+        fields.file = pageResult.file;
     } else {
+        // Append this page to the output right away so nothing is lost on a crash
+        await timed("write_output", { tab: 0, page: pageNumber }, () => appendListings(pageResult.listings));
+        totalListings += pageResult.listings.length;
+        fields.listings = pageResult.listings.length;
+        fields.total_listings = totalListings;
+        fields.path = outputFilename;
+    }
+    if (pageResult.error) {
+        fields.error = pageResult.error;
+        pagesFailed++;
+    }
+    lastPageRecorded = Math.max(lastPageRecorded, pageNumber);
+
+    let hasNew = true;
+    if (knownListings && pageResult.keys) {
+        const counts = classifyListings(pageResult.keys);
+        incrementalStats.new += counts.new;
+        incrementalStats.updated += counts.updated;
+        incrementalStats.unchanged += counts.unchanged;
+        Object.assign(fields, counts);
+
+        // Only a page that actually listed something, all of it already known, ends the run
+        if (pageResult.keys.length > 0 && counts.new === 0 && counts.updated === 0) {
+            console.log(`Page ${pageNumber} has no new or updated listings, stopping`);
+            incrementalStats.stopped_at_page = pageNumber;
+            hasNew = false;
+        }
+    }
+
+    if (cachedDetails && pageResult.keys) {
+        queueDetailPages(pageResult.keys);
+    }
+
+    pagesScraped++;
+    emitEvent("page", fields);
+    return hasNew;
+}
+
+// Function to queue the detail pages of listings that are not cached or changed price
+function queueDetailPages(keys) {
+    for (const { id, price } of keys) {
+        if (detailQueue.has(id)) continue;
+        if (cachedDetails.has(id)) {
+            const cachedPrice = cachedDetails.get(id);
+            if (cachedPrice === null || price === null || Number(cachedPrice) === price) continue;
+        }
+        if (detailQueue.size >= detailLimit) {
+            detailStats.skipped++;
+            continue;
+        }
+        detailQueue.set(id, new URL(`/realestate/item/${id}`, url).toString());
+    }
+    detailStats.queued = detailQueue.size;
+}
+
+// Function to save the __NEXT_DATA__ of every queued detail page with a bounded pool of tabs
+async function saveDetailPages() {
+    const detailDir = path.join(path.dirname(outputFilename), "details");
+    fs.mkdirSync(detailDir, { recursive: true });
+
+    const queue = Array.from(detailQueue.entries());
+    const workers = Math.min(detailConcurrency, queue.length);
+    console.log(`Saving ${queue.length} detail pages with ${workers} tabs...`);
+    emitEvent("phase", { phase: "enrich", workers, listings: queue.length });
+
+    async function worker(workerId) {
+        const tab = await context.newPage();
+        tabIds.set(tab, workerId);
+        await tab.setUserAgent(USER_AGENT);
+        await applyRequestPolicy(tab);
+
+        try {
+            while (queue.length > 0 && await checkpoint()) {
+                const [id, detailUrl] = queue.shift();
+                const spanFields = { tab: workerId, listing_id: id };
+                try {
+                    // __NEXT_DATA__ is server-rendered, so the DOM being parsed is enough
+                    await timed("detail_goto", spanFields, () => tab.goto(detailUrl, { waitUntil: "domcontentloaded", timeout: 30000 }));
+                    await handleCaptcha(tab, currentPage);
+                    const payload = await tab.evaluate(() => {
+                        const script = document.getElementById("__NEXT_DATA__");
+                        return script ? script.textContent : null;
+                    });
+                    if (!payload) throw new Error("No __NEXT_DATA__ on the detail page");
+
+                    const detailFile = path.join(detailDir, `${id}.json`);
+                    fs.writeFileSync(detailFile, payload);
+                    detailStats.saved++;
+                    emitEvent("detail", { status: "done", listing_id: id, file: detailFile, saved: detailStats.saved, total: detailStats.queued });
+                } catch (error) {
+                    console.log(`Error saving detail page of ${id}: ${error.message}`);
+                    detailStats.failed++;
+                    emitEvent("detail", { status: "failed", listing_id: id, message: error.message, saved: detailStats.saved, total: detailStats.queued });
+                }
+            }
+        } finally {
+            await tab.close().catch(() => {});
+        }
+    }
+
+    await Promise.all(Array.from({ length: workers }, (_, index) => worker(index + 1)));
+}
+
+// Function to build the URL of a results page, counting from the page the run started on
+function pageUrl(pageNumber) {
+    const pageAddress = new URL(url);
+    const firstPage = parseInt(pageAddress.searchParams.get("page") || "1");
+    pageAddress.searchParams.set("page", String(firstPage + pageNumber - 1));
+    return pageAddress.toString();
+}
+
+// Function to read the total number of result pages from a page's __NEXT_DATA__, or null
+function readTotalPages(targetPage) {
+    return targetPage.evaluate(() => {
+        const script = document.getElementById("__NEXT_DATA__");
+        if (!script) return null;
+        try {
+            const pagination = JSON.parse(script.textContent).props.pageProps.feed.pagination;
+            return pagination.totalPages;
+        } catch (error) {
+            return null;
+        }
+    }).catch(() => null);
+}
+
+// Function to read how many pages of this search are left from the page's __NEXT_DATA__
+async function findLastPage(targetPage) {
+    const totalPages = await readTotalPages(targetPage);
+    if (!totalPages) return maxPages;
+    const firstPage = parseInt(new URL(url).searchParams.get("page") || "1");
+    searchLastPage = totalPages - firstPage + 1;
+    return Math.min(maxPages, searchLastPage);
+}
+
+// Function to tell whether this run saw every page of the search, so that listings
+// it did not find have been removed: it reached the last page and no page failed
+function searchExhausted() {
+    if (cancelled || pagesFailed > 0) return false;
+    return searchEndReached || (searchLastPage !== null && lastPageRecorded >= searchLastPage);
+}
+
+// Function to scrape pages one after another, loading page N+1 in a second tab
+// by its URL while page N is being extracted
+async function scrapePagesInOrder(selector) {
+    // Without a page count in __NEXT_DATA__, fall back to the next-page link
+    const totalPages = await readTotalPages(page);
+    const lastPage = totalPages ? await findLastPage(page) : maxPages;
+
+    let prefetchTab = null;
+    let pageError = null; // set when the current page is stuck behind an unsolved CAPTCHA
+    try {
+        while (currentPage <= lastPage && await checkpoint()) {
+            console.log(`Scraping page ${currentPage}...`);
+            const pageStart = Date.now();
+            const pageTimer = performance.now();
+            emitEvent("page", { status: "start", page: currentPage });
+
+            // Start loading the next page before extracting this one
+            let prefetch = null;
+            const hasNextPage = totalPages ? currentPage < lastPage : await hasNextPageLink(page);
+            if (!totalPages && !hasNextPage) searchEndReached = true;
+            if (currentPage < lastPage && hasNextPage) {
+                if (!prefetchTab) prefetchTab = await openPrefetchTab();
+                prefetch = prefetchPage(prefetchTab, currentPage + 1);
+            }
+
+            const pageResult = pageError
+                ? { listings: [], file: null, error: pageError }
+                : await scrapePage(page, currentPage, selector);
+            pageError = null;
+            const hasNew = await recordPage(currentPage, pageResult, pageStart);
+            recordTiming("page", pageTimer, { tab: tabId(page), page: currentPage });
+
+            // In incremental mode a page of already-seen listings ends the run
+            if (!hasNew || !prefetch) break;
+
+            const navigationStart = performance.now();
+            const previousSignature = await page.evaluate(listingSignature, selector).catch(() => "");
+            if (!await prefetch) break;
+            currentPage++;
+            emitEvent("phase", { phase: "paginate", page: currentPage });
+
+            // The prefetch tab becomes the current page; the old one is reused for the next prefetch
+            [page, prefetchTab] = [prefetchTab, page];
+            try {
+                await timed("captcha_check", { tab: tabId(page), page: currentPage }, () => handleCaptcha(page, currentPage));
+            } catch (error) {
+                // As in a parallel tab, a CAPTCHA that was not solved fails its page, not the run
+                console.log(`Error scraping page ${currentPage}: ${error.message}`);
+                emitEvent("error", { message: error.message, page: currentPage });
+                pageError = error.message;
+                recordTiming("next_page", navigationStart, { tab: tabId(page), page: currentPage });
+                continue;
+            }
+
+            // Make sure the listings actually changed, not the previous page served again
+            const changed = await timed("content_check", { tab: tabId(page), page: currentPage },
+                () => waitForNewListings(page, selector, previousSignature));
+            recordTiming("next_page", navigationStart, { tab: tabId(page), page: currentPage });
+            if (!changed) {
+                console.log(`Page ${currentPage} shows the same listings as the page before, stopping`);
+                break;
+            }
+        }
+    } finally {
+        if (prefetchTab) await prefetchTab.close().catch(() => {});
+    }
+}
+
+// Function to open the second tab pages are prefetched in
+async function openPrefetchTab() {
+    const tabStart = performance.now();
+    const tab = await context.newPage();
+    tabIds.set(tab, 1);
+    await tab.setUserAgent(USER_AGENT);
+    await applyRequestPolicy(tab);
+    recordTiming("open_tab", tabStart, { tab: 1 });
+    return tab;
+}
+
+// Function to start loading a results page by URL; resolves to false if it failed to load
+function prefetchPage(targetPage, pageNumber) {
+    const spanFields = { tab: tabId(targetPage), page: pageNumber };
+    return timed("prefetch", spanFields, () => targetPage.goto(pageUrl(pageNumber), { waitUntil: "networkidle2", timeout: 60000 }))
+        .then(() => true)
+        .catch(error => {
+            // A prefetch abandoned by a stop closes its tab mid-load; that is not an error
+            if (cancelled || targetPage.isClosed()) return false;
+            console.log(`Error loading page ${pageNumber}: ${error.message}`);
+            emitEvent("error", { message: error.message, page: pageNumber });
+            return false;
+        });
+}
+
+// Function to check for the next-page link
+function hasNextPageLink(targetPage) {
+    return targetPage.evaluate(() => document.querySelector('a[aria-label="עבור לעמוד הבא"]') !== null)
+        .catch(() => false);
+}
+
+// Function run inside the page to fingerprint its listings: the first listing
+// tokens when there are any (__NEXT_DATA__ or DOM), else the listing text
+function listingSignature(selector) {
+    const elements = Array.from(document.querySelectorAll(selector)).slice(0, 3);
+    const text = elements.map(element => element.textContent).join("|");
+    const tokens = text.match(/"token":"[A-Za-z0-9]+"/g);
+    return tokens ? tokens.slice(0, 5).join(",") : text.slice(0, 1000);
+}
+
+// Function to wait until a tab's listings differ from the previous page's; returns false if they never do
+async function waitForNewListings(targetPage, selector, previousSignature) {
+    const deadline = Date.now() + CONTENT_CHANGE_TIMEOUT_MS;
+    while (true) {
+        const signature = await targetPage.evaluate(listingSignature, selector).catch(() => "");
+        if (signature !== "" && signature !== previousSignature) return true;
+        if (Date.now() >= deadline) return false;
+        await new Promise(resolve => setTimeout(resolve, CONTENT_CHANGE_POLL_MS));
+    }
+}
+
+// Function to scrape pages 2..N in parallel tabs, writing them out in page order
+async function scrapeRemainingPagesInParallel(selector) {
+    let lastPage = await findLastPage(page);
+    if (lastPage < 2) return;
+
+    const workers = Math.min(concurrency, lastPage - 1);
+    console.log(`Scraping pages 2-${lastPage} with ${workers} parallel tabs...`);
+    emitEvent("phase", { phase: "parallel", workers, last_page: lastPage });
+
+    let nextPage = 2;
+    let nextToRecord = 2;
+    const finishedPages = new Map();
+
+    // Write out every finished page that is next in order
+    async function flushInOrder() {
+        while (nextToRecord <= lastPage && finishedPages.has(nextToRecord)) {
+            const { pageResult, pageStart } = finishedPages.get(nextToRecord);
+            finishedPages.delete(nextToRecord);
+            const pageNumber = nextToRecord;
+            const hasNew = await recordPage(pageNumber, pageResult, pageStart);
+            currentPage = Math.max(currentPage, pageNumber);
+            nextToRecord++;
+
+            // Incremental mode: nothing new here, so later pages are not handed out or recorded
+            if (!hasNew) lastPage = Math.min(lastPage, pageNumber);
+        }
+    }
+
+    async function worker(workerId) {
+        const tabStart = performance.now();
+        const tab = await context.newPage();
+        tabIds.set(tab, workerId);
+        await tab.setUserAgent(USER_AGENT);
+        await applyRequestPolicy(tab);
+        recordTiming("open_tab", tabStart, { tab: workerId });
+
+        try {
+            while (nextPage <= lastPage && await checkpoint()) {
+                const pageNumber = nextPage++;
+                const pageStart = Date.now();
+                const pageTimer = performance.now();
+                const spanFields = { tab: workerId, page: pageNumber };
+                emitEvent("page", { status: "start", page: pageNumber, worker: workerId });
+
+                let pageResult;
+                try {
+                    await timed("goto", spanFields, () => tab.goto(pageUrl(pageNumber), { waitUntil: "networkidle2", timeout: 60000 }));
+                    await timed("captcha_check", spanFields, () => handleCaptcha(tab, pageNumber));
+                    pageResult = await scrapePage(tab, pageNumber, selector);
+                } catch (error) {
+                    console.log(`Error scraping page ${pageNumber}: ${error.message}`);
+                    emitEvent("error", { message: error.message, page: pageNumber });
+                    captureArtifact(tab, `error_page_${pageNumber}`, "error");
+                    pageResult = { listings: [], file: null, error: error.message };
+                }
+
+                // An empty page means the search ran out of results; stop handing out later pages
+                if (pageResult.listings && pageResult.listings.length === 0 && !pageResult.error) {
+                    lastPage = Math.min(lastPage, pageNumber);
+                    searchEndReached = true;
+                }
+
+                recordTiming("page", pageTimer, spanFields);
+                finishedPages.set(pageNumber, { pageResult, pageStart });
+                await flushInOrder();
+            }
+        } finally {
+            // Let screenshots of this tab finish before closing it
+            await Promise.allSettled(pendingArtifacts);
+            await tab.close().catch(() => {});
+        }
+    }
+
+    await Promise.all(Array.from({ length: workers }, (_, index) => worker(index + 1)));
+}
+
+// Function to check for and handle captcha
+async function handleCaptcha(targetPage = page, pageNumber = currentPage) {
+    const marker = await detectCaptcha(targetPage);
+    if (!marker) {
         console.log("No captcha detected, proceeding with scraping");
+        return;
+    }
+
+    // Parallel tabs take turns so the user solves one CAPTCHA at a time
+    await withCaptchaLock(() => solveCaptcha(targetPage, pageNumber, marker));
+}
+
+// Function to walk one CAPTCHA through detected -> waiting for the user -> verifying,
+// asking again at most MAX_CAPTCHA_ATTEMPTS times before giving up on the page
+async function solveCaptcha(targetPage, pageNumber, marker) {
+    for (let attempt = 1; attempt <= MAX_CAPTCHA_ATTEMPTS; attempt++) {
+        console.log(`CAPTCHA detected (${marker}), attempt ${attempt} of ${MAX_CAPTCHA_ATTEMPTS}. Please solve it in the browser window.`);
+        emitEvent("captcha", { status: attempt === 1 ? "detected" : "retry", page: pageNumber, marker, attempt });
+
+        // Bring the tab with the CAPTCHA to the front
+        await targetPage.bringToFront().catch(() => {});
+        if (attempt === 1) captureArtifact(targetPage, `captcha_page_${pageNumber}`, "error");
+
+        // Wait for user to solve captcha (via Streamlit button)
+        await waitForCaptchaSolved(targetPage);
+        if (cancelled) return;
+
+        marker = await waitForCaptchaToClear(targetPage);
+        if (!marker) {
+            console.log("Captcha solved successfully!");
+            emitEvent("captcha", { status: "solved", page: pageNumber, attempt });
+            captureArtifact(targetPage, `after_captcha_page_${pageNumber}`, "debug");
+            return;
+        }
+        console.log(`Captcha still detected (${marker})`);
+    }
+
+    emitEvent("captcha", { status: "failed", page: pageNumber, marker, attempt: MAX_CAPTCHA_ATTEMPTS });
+    captureArtifact(targetPage, `captcha_failed_page_${pageNumber}`, "error");
+    throw new Error(`CAPTCHA on page ${pageNumber} still present after ${MAX_CAPTCHA_ATTEMPTS} attempts`);
+}
+
+// Function to wait for the "captcha_solved" command; with --captcha-watch, also return
+// as soon as the tab no longer shows a CAPTCHA
+async function waitForCaptchaSolved(targetPage) {
+    if (!captchaWatch) return waitForCommand("captcha_solved");
+
+    let solved = false;
+    const waiter = () => { solved = true; };
+    if (controlMode === "stdin") {
+        const index = pendingCommands.indexOf("captcha_solved");
+        if (index !== -1) {
+            pendingCommands.splice(index, 1);
+            return;
+        }
+        (commandWaiters.captcha_solved = commandWaiters.captcha_solved || []).push(waiter);
+    }
+
+    try {
+        // A page that cannot be read is mid-navigation, not solved yet
+        while (!solved && !cancelled && await detectCaptcha(targetPage, "navigating")) {
+            await new Promise(resolve => setTimeout(resolve, CAPTCHA_POLL_MS));
+        }
+    } finally {
+        // Do not leave a waiter behind to swallow a later command
+        const waiters = commandWaiters.captcha_solved || [];
+        if (waiters.includes(waiter)) waiters.splice(waiters.indexOf(waiter), 1);
+    }
+}
+
+// Function to poll until a solved CAPTCHA has gone (the page usually redirects back); returns the marker still seen, or null
+async function waitForCaptchaToClear(targetPage) {
+    const deadline = Date.now() + CAPTCHA_SETTLE_MS;
+    // A page that cannot be read is mid-navigation; keep looking
+    let marker = await detectCaptcha(targetPage, "navigating");
+    while (marker && Date.now() < deadline) {
+        await new Promise(resolve => setTimeout(resolve, CAPTCHA_POLL_MS));
+        marker = await detectCaptcha(targetPage, "navigating");
+    }
+    return marker;
+}
+
+// Function to look for a CAPTCHA on a tab; returns what gave it away
+// ("redirect", "title", "challenge_iframe", "challenge_widget") or null
+async function detectCaptcha(targetPage, unreadable = null) {
+    const status = documentStatus.get(targetPage);
+
+    let pageUrl = "";
+    try {
+        pageUrl = targetPage.url();
+    } catch (error) {
+        // Not a real page (e.g. closed); fall through to the markers
     }
+    if (decidedWithoutPage(pageUrl, status)) return classifyCaptcha({ url: pageUrl, status });
+
+    const marker = await targetPage.evaluate(findCaptchaMarker, CAPTCHA_SELECTORS, CAPTCHA_TITLES)
+        .catch(() => unreadable);
+    return classifyCaptcha({ url: pageUrl, status, marker });
+}
+
+// Function to run CAPTCHA handling for one tab at a time
+function withCaptchaLock(task) {
+    const run = captchaLock.then(task);
+    captchaLock = run.catch(() => {});
+    return run;
 }
 
 // Function to extract listings using the provided selector
-async function extractListings(selector) {
+async function extractListings(selector, targetPage = page) {
     console.log(`Extracting listings using selector: ${selector}`);
 
     // Extract data using the selected selector
-    const listings = await page.evaluate((selector) => {
+    const listings = await targetPage.evaluate((selector) => {
         const items = [];
 
         // Find all elements matching the selector
@@ -324,58 +1144,57 @@ async function extractListings(selector) {
     return listings;
 }
 
-// Function to go to the next page
-async function goToNextPage() {
-    console.log("Checking for next page...");
+// Function to save the raw HTML of the current page next to the output file
+async function savePageHtml(pageNumber, targetPage = page) {
+    const outputDir = path.dirname(outputFilename);
+    if (!fs.existsSync(outputDir)) {
+        fs.mkdirSync(outputDir, { recursive: true });
+    }
 
-    // Check if there's a next page button
-    const hasNextPage = await page.evaluate(() => {
-        // Look for next page button
-        const nextButton = document.querySelector('a[aria-label="עבור לעמוד הבא"]');
-        return !!nextButton;
-    });
+    const pageFile = path.join(outputDir, `page_${pageNumber}.html`);
+    fs.writeFileSync(pageFile, await targetPage.content());
+    return pageFile;
+}
 
-    if (hasNextPage) {
-        console.log("Next page found, clicking...");
+// Function to append one page of listings to the output file
+async function appendListings(listings) {
+    // Start a fresh output file on the first page
+    if (!outputStarted) {
+        const outputDir = path.dirname(outputFilename);
+        if (!fs.existsSync(outputDir)) {
+            fs.mkdirSync(outputDir, { recursive: true });
+        }
+        const header = isJsonlOutput() ? "" : OUTPUT_COLUMNS.map(column => column.title).join(",") + "\n";
+        fs.writeFileSync(outputFilename, header);
+        outputStarted = true;
+    }
 
-        // Click the next page button
-        await page.click('a[aria-label="עבור לעמוד הבא"]')
-            .catch(e => console.log(`Error clicking next page button: ${e.message}`));
+    if (listings.length === 0) return;
 
-        return true;
+    if (isJsonlOutput()) {
+        // One JSON object per listing, keyed by the same column titles as the CSV
+        const lines = listings.map(listing => JSON.stringify(
+            Object.fromEntries(OUTPUT_COLUMNS.map(column => [column.title, listing[column.id]]))
+        ) + "\n");
+        fs.appendFileSync(outputFilename, lines.join(""));
     } else {
-        console.log("No next page found");
-        return false;
+        const csvWriter = createCsvWriter({
+            path: outputFilename,
+            header: OUTPUT_COLUMNS,
+            append: true,
+        });
+        await csvWriter.writeRecords(listings);
     }
 }
 
-// Function to save listings to CSV
-async function saveToCSV(listings) {
-    // Create exports directory if it doesn't exist
-    const outputDir = path.dirname(outputFilename);
-    if (!fs.existsSync(outputDir)) {
-        fs.mkdirSync(outputDir, { recursive: true });
-    }
-
-    // Save to CSV
-    const csvWriter = createCsvWriter({
-        path: outputFilename,
-        header: [
-            { id: "title", title: "Title" },
-            { id: "price", title: "Price" },
-            { id: "address", title: "Address" },
-            { id: "rooms", title: "Rooms" },
-            { id: "floor", title: "Floor" },
-            { id: "size", title: "Size" },
-            { id: "url", title: "URL" },
-        ],
-    });
-
-    await csvWriter.writeRecords(listings);
+// Function to check whether the output should be written as JSON lines
+function isJsonlOutput() {
+    return outputFilename.endsWith(".jsonl");
 }
 
 // Run the scraper
 scrapeYad2().catch(error => {
     console.error("Unhandled error:", error);
+    emitEvent("error", { message: error.message, fatal: true });
     process.exit(1);
 });
\ No newline at end of file
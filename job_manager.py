@@ -0,0 +1,672 @@
+"""Run scrapes as background jobs so the Streamlit script never blocks on them.
+
+A JobManager (one per server, held with ``st.cache_resource``) runs each scrape
+on a worker thread: it starts the scraper, follows its events, loads and
+normalizes the results, and writes them to the listing store and result cache.
+The UI only submits jobs, reads their status and progress on cheap reruns, and
+forwards button clicks (CAPTCHA solved, cancel) to the running scraper.
+
+Batches submit one job per search URL. The worker pool caps how many scrapes
+run at once across all sessions, and a per-host throttle spaces out scraper
+starts against the same site.
+"""
+
+import copy
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import pandas as pd
+
+import scraper_events
+from detail_cache import merge_details
+from memory_budget import FrameStore, LogBuffer, process_rss_bytes
+from next_data import extract_details_from_files, extract_listings_from_files
+from normalize import normalize_listings
+from result_stream import JsonlTail
+from scraper_runner import CANCEL, run_scraper
+
+# Job statuses
+QUEUED = "queued"
+RUNNING = "running"
+CAPTCHA = "captcha"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+ACTIVE_STATUSES = {QUEUED, RUNNING, CAPTCHA}
+
+# Scrapes allowed to run at the same time
+DEFAULT_WORKERS = 2
+
+# Finished jobs kept for the UI before the oldest are forgotten
+FINISHED_JOBS_KEPT = 20
+
+# Minimum seconds between two scraper starts against the same host
+DEFAULT_HOST_SPACING = 10
+
+# Scraper output kept per job: the last lines in memory, everything in <kind>.log next to the results
+LOG_KINDS = ("stdout", "stderr", "events")
+
+# Seconds to wait for the scraper to acknowledge a command
+COMMAND_TIMEOUT = 5
+
+# Scrape options and their defaults
+DEFAULT_OPTIONS = {
+    "engine": "dom",
+    "concurrency": 1,
+    "block_profile": "data",
+    "artifacts": "on-error",
+    "reuse_browser": True,
+    "headless": False,
+    "captcha_watch": False,
+    "incremental": False,
+    "enrich": False,
+    "detail_concurrency": 2,
+    "save_to_history": True,
+    "use_cache": True,
+    "cache_ttl": None,
+}
+
+
+def load_results(output_path, engine="dom", files=None):
+    """Load the listings a finished scraper run wrote next to ``output_path``.
+
+    With the next-data engine only the page ``files`` the scraper reported are
+    read: parallel tabs can save pages past the point where the run stopped
+    recording them.
+    """
+    if engine == "next-data":
+        # The scraper saved each page's HTML; parse the listings from its __NEXT_DATA__ JSON
+        records = extract_listings_from_files([f for f in files or () if os.path.exists(f)])
+        return pd.DataFrame(records) if records else None
+
+    if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+        if output_path.endswith(".jsonl"):
+            return pd.read_json(output_path, lines=True, dtype=False)
+        return pd.read_csv(output_path)
+    return None
+
+
+def parse_url_list(text):
+    """Return the http(s) URLs in ``text``, one per line or CSV row, deduplicated in order.
+
+    Blank lines, ``#`` comments and non-URL cells (such as a CSV header) are skipped.
+    """
+    urls = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        for cell in line.split(","):
+            cell = cell.strip().strip('"')
+            if urlparse(cell).scheme in ("http", "https") and cell not in urls:
+                urls.append(cell)
+    return urls
+
+
+class HostThrottle:
+    """Hands out start slots at least ``spacing`` seconds apart per host."""
+
+    def __init__(self, spacing=DEFAULT_HOST_SPACING):
+        self.spacing = spacing
+        self._next_start = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, url):
+        """Reserve the next start slot for the host of ``url``; return the seconds until it."""
+        host = urlparse(url).hostname or ""
+        with self._lock:
+            now = time.time()
+            slot = max(now, self._next_start.get(host, now))
+            self._next_start[host] = slot + self.spacing
+        return slot - now
+
+
+class ScrapeJob:
+    """One scrape, its live progress and its final results."""
+
+    def __init__(self, job_id, url, max_pages, options, store=None, cache=None, daemon=None,
+                 throttle=None, batch_id=None, detail_cache=None, frames=None):
+        self.id = job_id
+        self.batch_id = batch_id
+        self.throttle = throttle
+        self.url = url
+        self.max_pages = max_pages
+        self.options = {**DEFAULT_OPTIONS, **options}
+        self.store = store
+        self.cache = cache
+        self.daemon = daemon
+        self.detail_cache = detail_cache
+
+        self.status = QUEUED
+        self.message = "Waiting for a free worker..."
+        self.pages_done = 0
+        self.captcha_page = None
+        self.listing_count = 0
+        self.error = None
+        self.cached_age = None
+        self.scrape_id = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.run_handle = None
+
+        # Results live in the manager's FrameStore when there is one, else on the job
+        self._frames = frames
+        self._df = None
+        self._records = []
+        self._page_files = []
+        self._succeeded = False
+        self._exhausted = False
+        self._pages_failed = 0
+        self._cancel_requested = False
+        self._lock = threading.Lock()
+        self._logs = {kind: LogBuffer() for kind in LOG_KINDS}
+        self.debug_info = {"artifacts": []}
+
+    @property
+    def df(self):
+        if self._frames is not None:
+            return self._frames.get(self.id)
+        return self._df
+
+    @df.setter
+    def df(self, df):
+        self.listing_count = len(df) if df is not None else 0
+        if self._frames is not None:
+            self._frames.put(self.id, df)
+        else:
+            self._df = df
+
+    @property
+    def active(self):
+        return self.status in ACTIVE_STATUSES
+
+    @property
+    def progress(self):
+        """Fraction of the requested pages scraped so far."""
+        if self.status == DONE:
+            return 1.0
+        return min(1.0, self.pages_done / max(1, self.max_pages))
+
+    def live_records(self):
+        with self._lock:
+            return list(self._records)
+
+    def debug_snapshot(self):
+        with self._lock:
+            snapshot = copy.deepcopy(self.debug_info)
+            for kind, log in self._logs.items():
+                snapshot[kind] = log.lines()
+                if log.dropped:
+                    snapshot.setdefault("full_logs", {})[kind] = {"path": log.path, "lines": log.total}
+        return snapshot
+
+    def log_lines_held(self):
+        """Log lines of this job held in memory."""
+        return sum(len(log.lines()) for log in self._logs.values())
+
+    def send(self, command, wait=COMMAND_TIMEOUT):
+        """Send a control command to the running scraper; return its id once acknowledged."""
+        if self.run_handle is None or self.run_handle.finished:
+            print(f"Job {self.id} has no running scraper to send '{command}' to")
+            return None
+
+        command_id = self.run_handle.send(command, wait=wait)
+        if command_id is None:
+            print(f"Job {self.id}: scraper did not acknowledge '{command}'")
+        return command_id
+
+    def cancel(self):
+        self._cancel_requested = True
+        if self.status == QUEUED:
+            self._finish(CANCELLED, "Cancelled before it started")
+        elif self.run_handle is not None and not self.run_handle.finished:
+            # Don't wait for the ack; the scraper stops at its next checkpoint
+            self.run_handle.send(CANCEL)
+            self.message = "Cancelling..."
+
+    def _finish(self, status, message):
+        self.status = status
+        self.message = message
+        self.finished = time.time()
+        # Live records were only for progress; the results frame has them all now
+        if self.listing_count:
+            self._records = []
+
+    def run(self):
+        """Worker entry point."""
+        if self._cancel_requested:
+            return
+
+        try:
+            # Wait for this host's next start slot, staying cancellable
+            if self.throttle is not None:
+                delay = self.throttle.reserve(self.url)
+                if delay > 0:
+                    self.message = f"Waiting {delay:.0f}s before contacting {urlparse(self.url).hostname}..."
+                deadline = time.time() + delay
+                while time.time() < deadline:
+                    if self._cancel_requested:
+                        self._finish(CANCELLED, "Cancelled before it started")
+                        return
+                    time.sleep(max(0, min(0.5, deadline - time.time())))
+
+            self.status = RUNNING
+            self.message = "Starting the scraper..."
+            self.started = time.time()
+            self._scrape()
+        except Exception as e:
+            print(f"Job {self.id} failed: {e}")
+            self.error = str(e)
+            self._finish(FAILED, f"Scraping failed: {e}")
+        finally:
+            if self.run_handle is not None and not self.run_handle.finished:
+                self.run_handle.terminate()
+
+    def _scrape(self):
+        options = self.options
+
+        browser_ws = None
+        if options["reuse_browser"] and self.daemon is not None:
+            # Health check the shared browser and restart it if it died
+            try:
+                browser_ws = self.daemon.ensure_running()
+                self.debug_info["browser_daemon"] = self.daemon.status()
+            except (RuntimeError, OSError) as e:
+                print(f"Browser daemon unavailable, launching a browser for this run: {e}")
+
+        # Listings already in the store, so the scraper can stop once a page has nothing new
+        known_listings = None
+        if options["incremental"] and self.store is not None:
+            known_listings = self.store.known_prices()
+
+        # Listings with fresh cached details, so only new or re-priced ones get their page loaded
+        cached_details = None
+        if options["enrich"] and self.detail_cache is not None:
+            cached_details = self.detail_cache.fresh_prices()
+
+        self.run_handle = run_scraper(
+            self.url, self.max_pages, options["engine"],
+            concurrency=options["concurrency"],
+            browser_ws=browser_ws,
+            block_profile=options["block_profile"],
+            artifacts=options["artifacts"],
+            known_listings=known_listings,
+            headless=options["headless"],
+            cached_details=cached_details,
+            detail_concurrency=options["detail_concurrency"],
+            captcha_watch=options["captcha_watch"]
+        )
+        if self._cancel_requested:
+            self.run_handle.send(CANCEL)
+        self.message = "Scraper started. Browser window should open shortly..."
+
+        # Full logs go to disk next to the results; memory keeps the tail
+        log_dir = os.path.dirname(self.run_handle.output_path)
+        with self._lock:
+            for kind, log in self._logs.items():
+                log.spill_to(os.path.join(log_dir, f"{kind}.log"))
+
+        # Follow the output file so results appear page by page
+        dispatcher = self._dispatcher(JsonlTail(self.run_handle.output_path))
+
+        # Poll the output of both pipes, which are drained concurrently by reader threads
+        while not self.run_handle.finished:
+            for kind, item in self.run_handle.poll(timeout=0.1):
+                with self._lock:
+                    if kind == "event":
+                        self._logs["events"].append(item.to_dict())
+                        dispatcher.dispatch(item)
+                    else:
+                        self._logs[kind].append(item)
+
+        self.run_handle.wait()
+        with self._lock:
+            for log in self._logs.values():
+                log.close()
+        if self.run_handle.dropped_lines:
+            self.debug_info["stderr_dropped"] = self.run_handle.dropped_lines
+
+        cancelled = self._cancel_requested or self.debug_info.get("cancelled", False)
+        output_path = self.run_handle.output_path
+
+        # Python side timings, next to the scraper's own spans
+        postprocess_ms = self.debug_info.setdefault("postprocess_ms", {})
+        step_start = time.perf_counter()
+        try:
+            df = load_results(output_path, options["engine"], files=self._page_files)
+        except Exception as e:
+            print(f"Error loading results: {e}")
+            self.debug_info["load_error"] = str(e)
+            df = None
+
+        postprocess_ms["load"] = round((time.perf_counter() - step_start) * 1000, 1)
+
+        if df is None:
+            if cancelled:
+                self._finish(CANCELLED, "Cancelled before any listings were scraped")
+            else:
+                self.error = self.error or "No results found"
+                self._finish(FAILED, "No results found. The scraper may have failed.")
+            return
+
+        # Add timestamp and URL, then parse prices, rooms, floors, sizes and locations
+        df['timestamp'] = pd.Timestamp.now().floor("s")
+        df['source_url'] = self.url
+        step_start = time.perf_counter()
+        df = normalize_listings(df)
+        postprocess_ms["normalize"] = round((time.perf_counter() - step_start) * 1000, 1)
+
+        if cached_details is not None:
+            step_start = time.perf_counter()
+            try:
+                df = self._enrich(df, output_path)
+            except Exception as e:
+                print(f"Error merging listing details: {e}")
+                self.debug_info["enrich_error"] = str(e)
+            postprocess_ms["enrich"] = round((time.perf_counter() - step_start) * 1000, 1)
+
+        # Upsert into the persistent store if enabled
+        if options["save_to_history"] and self.store is not None:
+            step_start = time.perf_counter()
+            try:
+                # Only a run that reached the search's last page can tell which listings were removed;
+                # one capped by max pages, stopped early or failed has not seen the rest
+                scrape_id = self.store.record_scrape(
+                    df, self.url, max_pages=self.max_pages, output_path=output_path,
+                    complete=not cancelled and self._succeeded and self._exhausted and not self._pages_failed
+                    and not options["incremental"]
+                )
+                self.scrape_id = scrape_id
+                self.debug_info["changes"] = self.store.change_counts(scrape_id)
+                print(f"Debug: Stored scrape {scrape_id} with {len(df)} listings")
+            except Exception as e:
+                print(f"Error saving results to store: {e}")
+                self.debug_info["store_error"] = str(e)
+            postprocess_ms["store"] = round((time.perf_counter() - step_start) * 1000, 1)
+
+        # Cache complete runs so the same search can skip the browser; a run that failed
+        # partway or skipped a page (CAPTCHA given up, navigation timeout) would be served
+        # as the whole search
+        if options["use_cache"] and self.cache is not None and not options["incremental"] and not cancelled \
+                and self._succeeded and not self._pages_failed:
+            try:
+                self.cache.put(self.url, self.max_pages, df)
+            except Exception as e:
+                print(f"Error caching results: {e}")
+
+        self.df = df
+        failed_pages = self.debug_info.get("captcha_failed_pages")
+        if cancelled:
+            self._finish(CANCELLED, f"Cancelled after scraping {len(df)} listings")
+        elif not self._succeeded:
+            # The run ended early; its listings are kept, but this is not the whole search
+            self._finish(FAILED, f"Scraped {len(df)} listings before the scraper failed: {self.error}")
+        elif failed_pages:
+            self._finish(DONE, f"Scraped {len(df)} listings; skipped page(s) "
+                               f"{', '.join(map(str, failed_pages))} with an unsolved CAPTCHA")
+        elif self._pages_failed:
+            self._finish(DONE, f"Scraped {len(df)} listings; {self._pages_failed} page(s) failed to load")
+        else:
+            self._finish(DONE, f"Successfully scraped {len(df)} listings!")
+
+    def _enrich(self, df, output_path):
+        """Cache the detail pages this run saved, then merge every cached detail into ``df``."""
+        detail_dir = os.path.join(os.path.dirname(output_path), "details")
+        if os.path.isdir(detail_dir):
+            records = extract_details_from_files(
+                [os.path.join(detail_dir, f) for f in os.listdir(detail_dir) if f.endswith(".json")]
+            )
+            # Remember each listing's price so a price change triggers a fresh detail page
+            priced = df.dropna(subset=["listing_id", "price_numeric"])
+            prices = dict(zip(priced["listing_id"].astype(str), priced["price_numeric"].astype(int)))
+            self.detail_cache.put_many(records, prices)
+        return merge_details(df, self.detail_cache.get_many(df["listing_id"]))
+
+    def _dispatcher(self, result_tail):
+        """Route structured scraper events to job state; called with the job lock held."""
+        dispatcher = scraper_events.EventDispatcher()
+
+        @dispatcher.on(scraper_events.CAPTCHA)
+        def handle_captcha(event):
+            if event.status in ("detected", "retry"):
+                self.status = CAPTCHA
+                self.captcha_page = event.page
+                self.message = "Waiting for you to solve the CAPTCHA..." if event.status == "detected" \
+                    else f"CAPTCHA still there, please try again (attempt {event.get('attempt')})"
+            elif event.status == "solved":
+                self.status = RUNNING
+                self.captcha_page = None
+                self.message = "CAPTCHA solved! Proceeding with scraping..."
+            elif event.status == "failed":
+                # The scraper gave up on this page after its bounded retries and moved on
+                self.status = RUNNING
+                self.captcha_page = None
+                self.debug_info.setdefault("captcha_failed_pages", []).append(event.page)
+                self.message = f"CAPTCHA on page {event.page} was not solved after {event.get('attempt')} attempts"
+
+        @dispatcher.on(scraper_events.PAGE)
+        def handle_page(event):
+            if event.status == "start":
+                self.message = f"Scraping page {event.page}..."
+                return
+
+            # Pick up the listings of the page that just finished
+            if event.get("file"):
+                self._page_files.append(event.get("file"))
+                new_records = extract_listings_from_files([event.get("file")])
+            else:
+                new_records = result_tail.read_new()
+            self._records.extend(new_records)
+            self.pages_done += 1
+            self.message = (
+                f"Page {event.page}: {len(new_records)} listings "
+                f"({len(self._records)} total, {event.get('elapsed_ms', 0) / 1000:.1f}s)"
+            )
+
+        @dispatcher.on(scraper_events.PHASE)
+        def handle_phase(event):
+            if event.phase == "paginate":
+                self.message = "Moving to next page..."
+
+        @dispatcher.on(scraper_events.ERROR)
+        def handle_error(event):
+            self.debug_info.setdefault("errors", []).append(event.to_dict())
+
+        @dispatcher.on(scraper_events.NETWORK)
+        def handle_network(event):
+            self.debug_info["network"] = event.to_dict()
+
+        @dispatcher.on(scraper_events.ARTIFACT)
+        def handle_artifact(event):
+            self.debug_info["artifacts"].append(event.to_dict())
+
+        @dispatcher.on(scraper_events.TIMING)
+        def handle_timing(event):
+            span = event.to_dict()
+            del span["event"], span["ts"]
+            self.debug_info.setdefault("timings", []).append(span)
+
+        @dispatcher.on(scraper_events.DETAIL)
+        def handle_detail(event):
+            self.message = f"Loading listing details ({event.get('saved')} of {event.get('total')})..."
+
+        @dispatcher.on(scraper_events.RESULT)
+        def handle_result(event):
+            self._succeeded = bool(event.get("success"))
+            self._exhausted = bool(event.get("exhausted"))
+            # Pages recorded empty after an unsolved CAPTCHA or a failed tab; the run still succeeds
+            self._pages_failed = int(event.get("pages_failed") or 0)
+            if not event.get("success"):
+                self.error = event.get("error")
+            # The pages the run recorded, in page order
+            if event.get("files") is not None:
+                self._page_files = list(event.get("files"))
+            self.debug_info["cancelled"] = event.get("cancelled", False)
+            if event.get("incremental"):
+                self.debug_info["incremental"] = event.get("incremental")
+            if event.get("enrichment"):
+                self.debug_info["enrichment"] = event.get("enrichment")
+
+        return dispatcher
+
+    def summary(self):
+        """One row for a jobs table."""
+        return {
+            "id": self.id,
+            "batch": self.batch_id,
+            "url": self.url,
+            "status": self.status,
+            "pages": f"{self.pages_done}/{self.max_pages}",
+            "listings": self.listing_count or len(self._records),
+            "started": time.strftime("%H:%M:%S", time.localtime(self.created)),
+        }
+
+
+class BatchJob:
+    """A group of jobs, one per search URL, whose results are merged into one dataset."""
+
+    def __init__(self, batch_id, jobs, frames=None):
+        self.id = batch_id
+        self.jobs = jobs
+        self.created = time.time()
+        self._frames = frames if frames is not None else FrameStore()
+
+    @property
+    def active(self):
+        return any(job.active for job in self.jobs)
+
+    @property
+    def progress(self):
+        return sum(job.progress for job in self.jobs) / max(1, len(self.jobs))
+
+    def counts(self):
+        """Number of jobs in each status."""
+        counts = {}
+        for job in self.jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+    def cancel(self):
+        for job in self.jobs:
+            job.cancel()
+
+    def merged(self):
+        """All finished results in one frame, tagged with their search URL and batch id."""
+        if self.id in self._frames:
+            return self._frames.get(self.id)
+
+        frames = [job.df for job in self.jobs if job.df is not None]
+        if not frames:
+            return None
+
+        # Every row already carries its search in source_url; re-normalize to restore categoricals
+        merged = normalize_listings(pd.concat(frames, ignore_index=True))
+        merged["batch_id"] = self.id
+        if not self.active:
+            self._frames.put(self.id, merged)
+        return merged
+
+
+class JobManager:
+    """Runs ScrapeJobs on a bounded pool of worker threads."""
+
+    def __init__(self, store=None, cache=None, daemon=None, max_workers=DEFAULT_WORKERS,
+                 host_spacing=DEFAULT_HOST_SPACING, detail_cache=None, frames=None):
+        self.store = store
+        self.cache = cache
+        self.detail_cache = detail_cache
+        # Result frames of every job and batch, within a memory budget
+        self.frames = frames if frames is not None else FrameStore()
+        self.daemon = daemon
+        self.throttle = HostThrottle(host_spacing)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scrape-job")
+        self._jobs = OrderedDict()
+        self._batches = OrderedDict()
+        self._ids = itertools.count(1)
+        self._batch_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, url, max_pages, batch_id=None, **options):
+        """Start a scrape in the background and return its job."""
+        with self._lock:
+            job_id = f"job-{next(self._ids)}"
+            job = ScrapeJob(job_id, url, max_pages, options,
+                            store=self.store, cache=self.cache, daemon=self.daemon,
+                            throttle=self.throttle, batch_id=batch_id, detail_cache=self.detail_cache,
+                            frames=self.frames)
+            self._jobs[job_id] = job
+            self._prune()
+
+        # Identical recent searches are served from the result cache without a browser
+        cached = None
+        if job.options["use_cache"] and self.cache is not None:
+            cached = self.cache.get(url, max_pages, ttl=job.options["cache_ttl"])
+
+        if cached is not None:
+            job.df, job.cached_age = cached
+            if job.options["enrich"] and self.detail_cache is not None:
+                job.df = merge_details(job.df, self.detail_cache.get_many(job.df["listing_id"]))
+            job.debug_info["cache"] = {"hit": True, "age_seconds": round(job.cached_age), **self.cache.stats()}
+            job.pages_done = max_pages
+            job._finish(DONE, f"Loaded {len(job.df)} cached listings")
+        else:
+            self._executor.submit(job.run)
+        return job
+
+    def submit_batch(self, urls, max_pages, **options):
+        """Queue one job per URL and return the batch tracking them."""
+        with self._lock:
+            batch_id = f"batch-{next(self._batch_ids)}"
+        jobs = [self.submit(url, max_pages, batch_id=batch_id, **options) for url in urls]
+        batch = BatchJob(batch_id, jobs, frames=self.frames)
+        with self._lock:
+            self._batches[batch_id] = batch
+            while len(self._batches) > FINISHED_JOBS_KEPT:
+                self._batches.popitem(last=False)
+        return batch
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def get_batch(self, batch_id):
+        return self._batches.get(batch_id)
+
+    def results(self, result_id):
+        """Results frame of a job or batch by id, read back from disk if it was spilled.
+
+        Sessions keep only this id, so the frame is held once, within the
+        FrameStore's budget, however many sessions show it.
+        """
+        return self.frames.get(result_id) if result_id else None
+
+    def memory_report(self):
+        """What the server holds in memory: process RSS, result frames and job logs."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            "process_rss_mb": round(process_rss_bytes() / 1e6, 1),
+            "jobs": len(jobs),
+            "log_lines_in_memory": sum(job.log_lines_held() for job in jobs),
+            "frames": self.frames.report(),
+        }
+
+    def jobs(self):
+        return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+
+    def _prune(self):
+        # Jobs of a batch stay reachable through the batch itself
+        finished = [job_id for job_id, job in self._jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(finished) - FINISHED_JOBS_KEPT)]:
+            del self._jobs[job_id]
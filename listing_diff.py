@@ -0,0 +1,73 @@
+"""Changes between a scrape and the listings already in the store.
+
+Each listing's descriptive columns are reduced to one 64-bit hash when it is
+stored, so spotting an edited listing means comparing two integers rather
+than every column. The diff aligns the scrape with the stored rows by listing
+key (a hash join in pandas) and classifies every listing at once: new, price
+changed, attributes changed, or, for listings the same search found before
+but not this time, removed. Unchanged listings produce no row.
+"""
+
+import pandas as pd
+
+NEW = "new"
+REMOVED = "removed"
+PRICE_CHANGED = "price_changed"
+ATTRIBUTES_CHANGED = "attributes_changed"
+
+CHANGE_TYPES = (NEW, REMOVED, PRICE_CHANGED, ATTRIBUTES_CHANGED)
+
+# Store columns whose edits count as an attribute change; price is tracked on its own
+ATTRIBUTE_COLUMNS = [
+    "title", "rooms", "floor", "total_floors", "size", "property_type", "neighborhood", "city", "address",
+]
+
+DIFF_COLUMNS = ["listing_key", "change", "previous_price", "price"]
+
+
+def attributes_hash(values):
+    """One signed 64-bit hash per row of the attribute columns (SQLite INTEGER range)."""
+    columns = values.reindex(columns=ATTRIBUTE_COLUMNS).astype("string")
+    return pd.Series(pd.util.hash_pandas_object(columns, index=False).values.view("int64"), index=values.index)
+
+
+def diff_listings(current, previous, searched=None):
+    """Changes from ``previous`` stored rows to ``current`` rows, both indexed by listing key.
+
+    Both frames have ``price`` and ``attributes_hash`` columns. ``searched`` holds
+    the stored listings of the same search; those missing from ``current`` are
+    reported as removed. Stored rows without a hash never count as edited.
+    """
+    known = pd.Series(current.index.isin(previous.index), index=current.index)
+    previous = previous.reindex(current.index)
+
+    price = pd.to_numeric(current["price"], errors="coerce").astype("Int64")
+    previous_price = pd.to_numeric(previous["price"], errors="coerce").astype("Int64")
+    price_changed = known & price.ne(previous_price).fillna(price.isna() != previous_price.isna())
+
+    current_hash = current["attributes_hash"].astype("Int64")
+    previous_hash = previous["attributes_hash"].astype("Int64")
+    attributes_changed = known & current_hash.ne(previous_hash).fillna(False)
+
+    changes = [
+        pd.DataFrame({"change": NEW, "previous_price": pd.NA, "price": price})[~known],
+        pd.DataFrame({"change": PRICE_CHANGED, "previous_price": previous_price, "price": price})[price_changed],
+        pd.DataFrame({"change": ATTRIBUTES_CHANGED, "previous_price": previous_price, "price": price})[attributes_changed],
+    ]
+    if searched is not None:
+        removed = searched[~searched.index.isin(current.index)]
+        changes.append(pd.DataFrame({
+            "change": REMOVED,
+            "previous_price": pd.to_numeric(removed["price"], errors="coerce").astype("Int64"),
+            "price": pd.NA,
+        }, index=removed.index))
+
+    diff = pd.concat(changes)
+    diff.index.name = "listing_key"
+    return diff.reset_index()[DIFF_COLUMNS]
+
+
+def change_counts(diff):
+    """Number of listings per change type, zero for the types that did not occur."""
+    counts = diff["change"].value_counts()
+    return {change: int(counts.get(change, 0)) for change in CHANGE_TYPES}
@@ -0,0 +1,681 @@
+"""Persistent SQLite store for scraped listings and scrape history.
+
+Every scrape is upserted in bulk into a ``listings`` table keyed by the Yad2
+listing id (or the listing URL when no id is known), with indexes on city,
+price and rooms for range queries. A ``scrapes`` table replaces the in-session
+history list. Reads go through SQL, so history and analytics views never need
+to concatenate DataFrames in memory.
+
+The analytics page reads small ``agg_*`` tables instead of the listings: counts
+and sums per city, neighborhood and rooms, histogram bins of price, size and
+price per m², and per-day counts. Each scrape updates them in the same
+transaction as its upsert, by adding the new values of the listings it touched
+and subtracting their previous ones, so the cost of an ingest depends on the
+scrape and not on the size of the history.
+
+Every scrape is also diffed against the stored listings (see listing_diff):
+its new, removed, re-priced and edited listings go to ``listing_changes``, and
+``price_history`` gains a row only when a listing first appears or its price
+changes, so a listing's price series costs one row per change rather than a
+full row per sighting.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+from listing_diff import CHANGE_TYPES, NEW, PRICE_CHANGED, REMOVED, attributes_hash, diff_listings
+
+# Default location of the store, overridable with YAD2_STORE_PATH
+DEFAULT_STORE_PATH = os.environ.get(
+    "YAD2_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "listings.db")
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scrapes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    url TEXT,
+    count INTEGER,
+    max_pages INTEGER,
+    output_path TEXT
+);
+
+CREATE TABLE IF NOT EXISTS listings (
+    listing_key TEXT PRIMARY KEY,
+    listing_id TEXT,
+    title TEXT,
+    price INTEGER,
+    rooms REAL,
+    floor INTEGER,
+    total_floors INTEGER,
+    size REAL,
+    price_per_sqm REAL,
+    property_type TEXT,
+    neighborhood TEXT,
+    city TEXT,
+    address TEXT,
+    url TEXT,
+    source_url TEXT,
+    lat REAL,
+    lon REAL,
+    attributes_hash INTEGER,
+    first_seen TEXT,
+    last_seen TEXT,
+    last_scrape_id INTEGER REFERENCES scrapes(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_listings_city ON listings(city);
+CREATE INDEX IF NOT EXISTS idx_listings_price ON listings(price);
+CREATE INDEX IF NOT EXISTS idx_listings_rooms ON listings(rooms);
+CREATE INDEX IF NOT EXISTS idx_listings_last_seen ON listings(last_seen);
+CREATE INDEX IF NOT EXISTS idx_listings_source_url ON listings(source_url);
+
+-- What each scrape changed; unchanged listings have no row
+CREATE TABLE IF NOT EXISTS listing_changes (
+    scrape_id INTEGER NOT NULL REFERENCES scrapes(id),
+    listing_key TEXT NOT NULL,
+    change TEXT NOT NULL,
+    previous_price INTEGER,
+    price INTEGER,
+    PRIMARY KEY (scrape_id, listing_key, change)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_listing_changes_change ON listing_changes(change, scrape_id);
+CREATE INDEX IF NOT EXISTS idx_listing_changes_listing ON listing_changes(listing_key, change);
+
+-- Append-only: one row when a listing first appears and one per price change
+CREATE TABLE IF NOT EXISTS price_history (
+    listing_key TEXT NOT NULL,
+    scrape_id INTEGER NOT NULL REFERENCES scrapes(id),
+    observed_at TEXT NOT NULL,
+    price INTEGER,
+    PRIMARY KEY (listing_key, scrape_id)
+) WITHOUT ROWID;
+
+-- Analytics aggregates; unknown city/neighborhood is '', unknown rooms or bin is -1
+CREATE TABLE IF NOT EXISTS agg_segments (
+    city TEXT NOT NULL,
+    neighborhood TEXT NOT NULL,
+    rooms REAL NOT NULL,
+    listings INTEGER NOT NULL,
+    price_count INTEGER NOT NULL,
+    price_sum REAL NOT NULL,
+    size_count INTEGER NOT NULL,
+    size_sum REAL NOT NULL,
+    price_per_sqm_count INTEGER NOT NULL,
+    price_per_sqm_sum REAL NOT NULL,
+    PRIMARY KEY (city, neighborhood, rooms)
+);
+
+CREATE TABLE IF NOT EXISTS agg_price_size (
+    city TEXT NOT NULL,
+    rooms REAL NOT NULL,
+    price_bin INTEGER NOT NULL,
+    size_bin INTEGER NOT NULL,
+    listings INTEGER NOT NULL,
+    PRIMARY KEY (city, rooms, price_bin, size_bin)
+);
+
+CREATE TABLE IF NOT EXISTS agg_price_per_sqm (
+    city TEXT NOT NULL,
+    rooms REAL NOT NULL,
+    price_per_sqm_bin INTEGER NOT NULL,
+    listings INTEGER NOT NULL,
+    PRIMARY KEY (city, rooms, price_per_sqm_bin)
+);
+
+CREATE TABLE IF NOT EXISTS agg_daily (
+    day TEXT NOT NULL,
+    city TEXT NOT NULL,
+    first_seen INTEGER NOT NULL,
+    seen INTEGER NOT NULL,
+    price_per_sqm_count INTEGER NOT NULL,
+    price_per_sqm_sum REAL NOT NULL,
+    PRIMARY KEY (day, city)
+);
+"""
+
+# Store column -> DataFrame column (as produced by normalize_listings)
+LISTING_COLUMNS = {
+    "listing_id": "listing_id",
+    "title": "Title",
+    "price": "price_numeric",
+    "rooms": "rooms_numeric",
+    "floor": "floor_numeric",
+    "total_floors": "total_floors",
+    "size": "size_numeric",
+    "price_per_sqm": "price_per_sqm",
+    "property_type": "property_type",
+    "neighborhood": "neighborhood",
+    "city": "city",
+    "address": "Address",
+    "url": "URL",
+    "source_url": "source_url",
+    "lat": "lat",
+    "lon": "lon",
+}
+
+# Columns refreshed when an existing listing is seen again
+UPSERT_SQL = """
+INSERT INTO listings (listing_key, {columns}, attributes_hash, first_seen, last_seen, last_scrape_id)
+VALUES (?, {placeholders}, ?, ?, ?, ?)
+ON CONFLICT(listing_key) DO UPDATE SET
+    {updates},
+    attributes_hash = excluded.attributes_hash,
+    last_seen = excluded.last_seen,
+    last_scrape_id = excluded.last_scrape_id
+""".format(
+    columns=", ".join(LISTING_COLUMNS),
+    placeholders=", ".join("?" for _ in LISTING_COLUMNS),
+    updates=",\n    ".join(f"{column} = excluded.{column}" for column in LISTING_COLUMNS),
+)
+
+
+# Histogram bin widths of the aggregates (₪, m², ₪/m²)
+PRICE_BIN = 100_000
+SIZE_BIN = 5
+PRICE_PER_SQM_BIN = 1_000
+
+# Values past the last bin are counted in it, so outliers cannot grow the tables
+MAX_PRICE_BIN = 200
+MAX_SIZE_BIN = 100
+MAX_PRICE_PER_SQM_BIN = 100
+
+# Aggregate table -> (key columns, summed columns)
+AGGREGATES = {
+    "agg_segments": (
+        ("city", "neighborhood", "rooms"),
+        ("listings", "price_count", "price_sum", "size_count", "size_sum", "price_per_sqm_count", "price_per_sqm_sum"),
+    ),
+    "agg_price_size": (("city", "rooms", "price_bin", "size_bin"), ("listings",)),
+    "agg_price_per_sqm": (("city", "rooms", "price_per_sqm_bin"), ("listings",)),
+    "agg_daily": (("day", "city"), ("first_seen", "seen", "price_per_sqm_count", "price_per_sqm_sum")),
+}
+
+# Store columns the aggregates are computed from
+AGGREGATE_SOURCE_COLUMNS = ["city", "neighborhood", "rooms", "price", "size", "price_per_sqm"]
+
+# Segment columns the analytics page can group by, and how an unknown value is stored
+UNKNOWN_SEGMENT = {"city": "''", "neighborhood": "''", "rooms": "-1"}
+
+
+def _add_sql(table):
+    keys, measures = AGGREGATES[table]
+    columns = keys + measures
+    return "INSERT INTO {table} ({columns}) VALUES ({placeholders}) ON CONFLICT({keys}) DO UPDATE SET {updates}".format(
+        table=table,
+        columns=", ".join(columns),
+        placeholders=", ".join("?" for _ in columns),
+        keys=", ".join(keys),
+        updates=", ".join(f"{measure} = {measure} + excluded.{measure}" for measure in measures),
+    )
+
+
+def _bins(values, width, last):
+    return (values // width).clip(upper=last).fillna(-1).astype("int64")
+
+
+def _measures(rows, sign):
+    """Aggregate keys and signed measures of listing rows, one row per listing."""
+    price = pd.to_numeric(rows["price"], errors="coerce").astype("float64")
+    size = pd.to_numeric(rows["size"], errors="coerce").astype("float64")
+    price_per_sqm = pd.to_numeric(rows["price_per_sqm"], errors="coerce").astype("float64")
+    return pd.DataFrame({
+        "city": rows["city"].fillna("").astype(str),
+        "neighborhood": rows["neighborhood"].fillna("").astype(str),
+        "rooms": pd.to_numeric(rows["rooms"], errors="coerce").astype("float64").fillna(-1),
+        "price_bin": _bins(price, PRICE_BIN, MAX_PRICE_BIN),
+        "size_bin": _bins(size, SIZE_BIN, MAX_SIZE_BIN),
+        "price_per_sqm_bin": _bins(price_per_sqm, PRICE_PER_SQM_BIN, MAX_PRICE_PER_SQM_BIN),
+        "listings": sign,
+        "price_count": sign * price.notna(),
+        "price_sum": sign * price.fillna(0),
+        "size_count": sign * size.notna(),
+        "size_sum": sign * size.fillna(0),
+        "price_per_sqm_count": sign * price_per_sqm.notna(),
+        "price_per_sqm_sum": sign * price_per_sqm.fillna(0),
+    }, index=rows.index)
+
+
+def _daily_measures(rows, day, counted, first):
+    """Per-day counts of ``rows`` seen on ``day``; ``counted`` marks rows not yet counted that day."""
+    price_per_sqm = pd.to_numeric(rows["price_per_sqm"], errors="coerce").astype("float64")
+    return pd.DataFrame({
+        "day": day,
+        "city": rows["city"].fillna("").astype(str),
+        "first_seen": first.astype("int64"),
+        "seen": counted.astype("int64"),
+        "price_per_sqm_count": (counted & price_per_sqm.notna()).astype("int64"),
+        "price_per_sqm_sum": price_per_sqm.where(counted).fillna(0),
+    }, index=rows.index)
+
+
+def listing_keys(df):
+    """Return the store key of each row: listing id, else URL, else a content hash."""
+    keys = pd.Series(pd.NA, index=df.index, dtype="object")
+    if "listing_id" in df.columns:
+        keys = keys.fillna(df["listing_id"].astype("object").where(df["listing_id"].notna()))
+    if "URL" in df.columns:
+        urls = df["URL"].astype("object")
+        keys = keys.fillna(urls.where(urls.notna() & (urls != "N/A")))
+
+    missing = keys.isna()
+    if missing.any():
+        content = df.loc[missing, [c for c in ("Title", "Address", "Rooms", "Floor", "Size") if c in df.columns]]
+        keys[missing] = [
+            "sha1:" + hashlib.sha1("|".join(map(str, row)).encode("utf-8")).hexdigest()
+            for row in content.itertuples(index=False, name=None)
+        ]
+    return keys
+
+
+class ListingStore:
+    """Thread-safe wrapper around the SQLite listing store."""
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._conn.commit()
+
+        # Stores written before the aggregates existed get them built once
+        has_listings = self._conn.execute("SELECT EXISTS (SELECT 1 FROM listings)").fetchone()[0]
+        has_aggregates = self._conn.execute("SELECT EXISTS (SELECT 1 FROM agg_segments)").fetchone()[0]
+        if has_listings and not has_aggregates:
+            self.rebuild_aggregates()
+
+    def _migrate(self):
+        """Bring stores created by earlier versions up to the current schema."""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(listings)")}
+        if "attributes_hash" not in columns:
+            # Existing rows keep a NULL hash and are not reported as edited on their next sighting
+            self._conn.execute("ALTER TABLE listings ADD COLUMN attributes_hash INTEGER")
+
+        # Price series of listings stored before the history existed start at their last sighting
+        has_history = self._conn.execute("SELECT EXISTS (SELECT 1 FROM price_history)").fetchone()[0]
+        if not has_history:
+            self._conn.execute(
+                "INSERT INTO price_history (listing_key, scrape_id, observed_at, price) "
+                "SELECT listing_key, last_scrape_id, last_seen, price FROM listings WHERE last_scrape_id IS NOT NULL"
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def record_scrape(self, df, url, max_pages=None, output_path=None, timestamp=None, complete=True):
+        """Store one scrape and upsert its listings in a single transaction; return the scrape id.
+
+        Only a ``complete`` scrape, one that reached the last page of its search,
+        reports the listings its search found before but not this time as
+        removed; a scrape capped by ``max_pages``, cancelled, failed or
+        incremental has not seen every page.
+        """
+        timestamp = pd.Timestamp(timestamp or pd.Timestamp.now()).isoformat(sep=" ", timespec="seconds")
+
+        # Build all rows up front: missing columns become NULL, pandas NA becomes None
+        values = pd.DataFrame(index=df.index)
+        for store_column, frame_column in LISTING_COLUMNS.items():
+            if frame_column in df.columns:
+                values[store_column] = df[frame_column].astype("object")
+            else:
+                values[store_column] = None
+        values = values.where(values.notna(), None)
+        keys = listing_keys(df)
+        hashes = attributes_hash(values)
+
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO scrapes (timestamp, url, count, max_pages, output_path) VALUES (?, ?, ?, ?, ?)",
+                (timestamp, url, len(df), max_pages, output_path)
+            )
+            scrape_id = cursor.lastrowid
+
+            # The diff and the aggregates both start from the listings' stored rows
+            latest = values.assign(listing_key=keys.values, attributes_hash=hashes.values)[
+                ~keys.duplicated(keep="last").values
+            ]
+            previous = self._stored_rows(latest["listing_key"].tolist())
+            searched = self._search_snapshot(url, scrape_id) if complete else None
+
+            rows = [
+                (key, *row, listing_hash, timestamp, timestamp, scrape_id)
+                for key, row, listing_hash in zip(keys, values.itertuples(index=False, name=None), hashes.tolist())
+            ]
+            self._conn.executemany(UPSERT_SQL, rows)
+
+            diff = diff_listings(latest.set_index("listing_key"), previous, searched)
+            self._record_changes(scrape_id, timestamp, diff)
+            self._update_aggregates(latest, previous, timestamp[:10])
+
+        return scrape_id
+
+    def _stored_rows(self, keys):
+        """Stored aggregate source columns, hash and last_seen of ``keys``, indexed by key."""
+        columns = ["listing_key", "last_seen", "attributes_hash"] + AGGREGATE_SOURCE_COLUMNS
+        rows = []
+        # Stay under SQLite's limit on bound parameters
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows.extend(self._conn.execute(
+                f"SELECT {', '.join(columns)} FROM listings WHERE listing_key IN ({','.join('?' * len(chunk))})",
+                chunk
+            ).fetchall())
+        # Object columns keep 64-bit hashes exact next to NULLs
+        return pd.DataFrame(rows, columns=columns, dtype=object).set_index("listing_key")
+
+    def _search_snapshot(self, url, scrape_id):
+        """Key and price of the stored listings of search ``url`` not yet reported removed.
+
+        Every earlier scrape of the search counts, not only the last one: a
+        listing a partial scrape did not reach is still expected on the next
+        complete one. A listing seen again after its removal is expected again.
+        """
+        rows = self._conn.execute(
+            """
+            SELECT l.listing_key, l.price FROM listings l
+            WHERE l.source_url = ? AND l.last_scrape_id < ? AND NOT EXISTS (
+                SELECT 1 FROM listing_changes c
+                WHERE c.listing_key = l.listing_key AND c.change = ? AND c.scrape_id > l.last_scrape_id
+            )
+            """,
+            (url, scrape_id, REMOVED)
+        ).fetchall()
+        return pd.DataFrame(rows, columns=["listing_key", "price"], dtype=object).set_index("listing_key")
+
+    def _record_changes(self, scrape_id, timestamp, diff):
+        """Append a scrape's diff to listing_changes and its new prices to price_history."""
+        # Object dtype turns numpy scalars and NA into Python values sqlite3 can bind
+        diff = diff.astype(object).where(diff.notna(), None)
+        self._conn.executemany(
+            "INSERT INTO listing_changes (scrape_id, listing_key, change, previous_price, price) VALUES (?, ?, ?, ?, ?)",
+            [(scrape_id, *row) for row in diff.itertuples(index=False, name=None)]
+        )
+        priced = diff[diff["change"].isin([NEW, PRICE_CHANGED])]
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO price_history (listing_key, scrape_id, observed_at, price) VALUES (?, ?, ?, ?)",
+            [(key, scrape_id, timestamp, price) for key, price in zip(priced["listing_key"], priced["price"])]
+        )
+
+    def _update_aggregates(self, latest, previous, day):
+        """Apply one scrape's listings (``latest``) over their ``previous`` stored rows."""
+        latest = latest.set_index("listing_key")
+        known = latest.index.isin(previous.index)
+        previous_day = previous["last_seen"].str[:10].reindex(latest.index)
+        measures = pd.concat([_measures(latest, 1), _measures(previous, -1)])
+
+        deltas = {
+            table: measures.groupby(list(keys), sort=False)[list(sums)].sum()
+            for table, (keys, sums) in AGGREGATES.items() if table != "agg_daily"
+        }
+        # A listing is counted once per day however many scrapes see it
+        first = pd.Series(~known, index=latest.index)
+        daily = _daily_measures(latest, day, first | (previous_day != day), first)
+        deltas["agg_daily"] = daily.groupby(["day", "city"], sort=False)[list(AGGREGATES["agg_daily"][1])].sum()
+        self._apply_aggregates(deltas)
+
+    def _apply_aggregates(self, deltas):
+        for table, delta in deltas.items():
+            # Listings seen again unchanged cancel out and cost no write
+            delta = delta[(delta != 0).any(axis=1)]
+            if delta.empty:
+                continue
+            # Object dtype turns numpy scalars into Python ones sqlite3 can bind
+            rows = delta.reset_index().astype(object).values.tolist()
+            self._conn.executemany(_add_sql(table), rows)
+            if "listings" in delta.columns:
+                self._conn.execute(f"DELETE FROM {table} WHERE listings <= 0")
+
+    def rebuild_aggregates(self, chunksize=50_000):
+        """Recompute every aggregate table from the stored listings."""
+        columns = ["first_seen", "last_seen"] + AGGREGATE_SOURCE_COLUMNS
+        with self._lock, self._conn:
+            for table in AGGREGATES:
+                self._conn.execute(f"DELETE FROM {table}")
+            cursor = self._conn.execute(f"SELECT {', '.join(columns)} FROM listings")
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                if not rows:
+                    break
+                chunk = pd.DataFrame(rows, columns=columns)
+                measures = _measures(chunk, 1)
+                deltas = {
+                    table: measures.groupby(list(keys), sort=False)[list(sums)].sum()
+                    for table, (keys, sums) in AGGREGATES.items() if table != "agg_daily"
+                }
+                # Only the first and the last sighting of each listing are stored
+                everyone = pd.Series(True, index=chunk.index)
+                nobody = ~everyone
+                first_day = chunk["first_seen"].str[:10]
+                last_day = chunk["last_seen"].str[:10]
+                daily = pd.concat([
+                    _daily_measures(chunk, first_day, first_day != last_day, everyone),
+                    _daily_measures(chunk, last_day, everyone, nobody),
+                ])
+                deltas["agg_daily"] = daily.groupby(["day", "city"], sort=False)[list(AGGREGATES["agg_daily"][1])].sum()
+                self._apply_aggregates(deltas)
+
+    def query(self, sql, params=(), chunksize=None):
+        """Run a read query and return a DataFrame (or an iterator of them with ``chunksize``)."""
+        with self._lock:
+            if chunksize is None:
+                return pd.read_sql_query(sql, self._conn, params=params)
+            # Materialize chunk by chunk outside the lock
+            cursor = self._conn.execute(sql, params)
+            columns = [d[0] for d in cursor.description]
+
+        def chunks():
+            while True:
+                with self._lock:
+                    rows = cursor.fetchmany(chunksize)
+                if not rows:
+                    break
+                yield pd.DataFrame(rows, columns=columns)
+        return chunks()
+
+    def scrape_history(self, limit=50):
+        return self.query(
+            "SELECT id, timestamp, url, count, max_pages FROM scrapes ORDER BY id DESC LIMIT ?",
+            (limit,)
+        )
+
+    def listings(self, city=None, min_price=None, max_price=None, min_rooms=None, max_rooms=None,
+                 limit=None, chunksize=None):
+        """Query listings with indexed filters on city, price and rooms."""
+        clauses = []
+        params = []
+        for clause, value in (
+            ("city = ?", city),
+            ("price >= ?", min_price),
+            ("price <= ?", max_price),
+            ("rooms >= ?", min_rooms),
+            ("rooms <= ?", max_rooms),
+        ):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+
+        sql = "SELECT * FROM listings"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY last_seen DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self.query(sql, tuple(params), chunksize=chunksize)
+
+    def known_prices(self):
+        """Return {listing_id: price} for every stored listing with a Yad2 id."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT listing_id, price FROM listings WHERE listing_id IS NOT NULL"
+            ).fetchall()
+        return dict(rows)
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM listings").fetchone()[0]
+
+    def scrape_changes(self, scrape_id):
+        """What scrape ``scrape_id`` changed, one row per listing and change type."""
+        return self.query(
+            """
+            SELECT c.change, c.listing_key, l.listing_id, l.title, l.city, l.neighborhood,
+                c.previous_price, c.price, l.url
+            FROM listing_changes c LEFT JOIN listings l USING (listing_key)
+            WHERE c.scrape_id = ?
+            ORDER BY c.change, c.listing_key
+            """,
+            (scrape_id,)
+        )
+
+    def change_counts(self, scrape_id):
+        """Number of listings per change type in scrape ``scrape_id``."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT change, COUNT(*) FROM listing_changes WHERE scrape_id = ? GROUP BY change", (scrape_id,)
+            ).fetchall()
+        counts = dict(rows)
+        return {change: counts.get(change, 0) for change in CHANGE_TYPES}
+
+    def price_changes(self, since=None, city=None, drops_only=False, limit=None):
+        """Price changes seen since ``since`` (a timestamp), latest first, with the amount changed."""
+        clauses = ["c.change = ?"]
+        params = [PRICE_CHANGED]
+        if since is not None:
+            clauses.append("s.timestamp >= ?")
+            params.append(pd.Timestamp(since).isoformat(sep=" ", timespec="seconds"))
+        if city is not None:
+            clauses.append("l.city = ?")
+            params.append(city)
+        if drops_only:
+            clauses.append("c.price < c.previous_price")
+        sql = f"""
+            SELECT s.timestamp, c.listing_key, l.listing_id, l.title, l.city, l.neighborhood,
+                c.previous_price, c.price, c.price - c.previous_price AS price_change, l.url
+            FROM listing_changes c
+            JOIN scrapes s ON s.id = c.scrape_id
+            LEFT JOIN listings l USING (listing_key)
+            WHERE {' AND '.join(clauses)}
+            ORDER BY s.timestamp DESC
+        """
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self.query(sql, tuple(params))
+
+    def price_history(self, listing_key):
+        """Every recorded price of one listing, oldest first."""
+        return self.query(
+            "SELECT observed_at, price, scrape_id FROM price_history WHERE listing_key = ? ORDER BY scrape_id",
+            (listing_key,)
+        )
+
+    def last_scrape_id(self):
+        """Id of the latest scrape; the aggregates only change when it does."""
+        with self._lock:
+            return self._conn.execute("SELECT MAX(id) FROM scrapes").fetchone()[0]
+
+    @staticmethod
+    def _segment_filter(city=None, rooms=None, conditions=()):
+        """WHERE clause and parameters for an optional city and rooms plus fixed ``conditions``."""
+        clauses = list(conditions)
+        params = []
+        for clause, value in (("city = ?", city), ("rooms = ?", rooms)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def segment_stats(self, by=("city",), city=None, rooms=None):
+        """Listings and mean price, size and price per m² per segment, largest first; ``by=()`` for totals."""
+        unknown = [column for column in by if column not in UNKNOWN_SEGMENT]
+        if unknown:
+            raise ValueError(f"Cannot group by {', '.join(unknown)}")
+        where, params = self._segment_filter(city, rooms)
+        keys = "".join(f"NULLIF({column}, {UNKNOWN_SEGMENT[column]}) AS {column}, " for column in by)
+        group_by = f"GROUP BY {', '.join(by)}" if by else ""
+        return self.query(
+            f"""
+            SELECT {keys}
+                COALESCE(SUM(listings), 0) AS listings,
+                SUM(price_sum) / NULLIF(SUM(price_count), 0) AS avg_price,
+                SUM(size_sum) / NULLIF(SUM(size_count), 0) AS avg_size,
+                SUM(price_per_sqm_sum) / NULLIF(SUM(price_per_sqm_count), 0) AS avg_price_per_sqm
+            FROM agg_segments{where}
+            {group_by}
+            ORDER BY listings DESC
+            """,
+            tuple(params)
+        )
+
+    def price_distribution(self, city=None, rooms=None):
+        """Listings per price bin (``price_from`` in ₪)."""
+        where, params = self._segment_filter(city, rooms, ["price_bin >= 0"])
+        df = self.query(
+            f"SELECT price_bin, SUM(listings) AS listings FROM agg_price_size{where} GROUP BY price_bin ORDER BY price_bin",
+            tuple(params)
+        )
+        df["price_from"] = df.pop("price_bin") * PRICE_BIN
+        return df
+
+    def price_per_sqm_distribution(self, city=None, rooms=None):
+        """Listings per price-per-m² bin (``price_per_sqm_from`` in ₪/m²)."""
+        where, params = self._segment_filter(city, rooms, ["price_per_sqm_bin >= 0"])
+        df = self.query(
+            f"""
+            SELECT price_per_sqm_bin, SUM(listings) AS listings FROM agg_price_per_sqm{where}
+            GROUP BY price_per_sqm_bin ORDER BY price_per_sqm_bin
+            """,
+            tuple(params)
+        )
+        df["price_per_sqm_from"] = df.pop("price_per_sqm_bin") * PRICE_PER_SQM_BIN
+        return df
+
+    def price_size_bins(self, city=None, rooms=None):
+        """Listings per (size, price) cell, for a binned size/price scatter."""
+        where, params = self._segment_filter(city, rooms, ["price_bin >= 0", "size_bin >= 0"])
+        df = self.query(
+            f"""
+            SELECT size_bin, price_bin, SUM(listings) AS listings FROM agg_price_size{where}
+            GROUP BY size_bin, price_bin
+            """,
+            tuple(params)
+        )
+        df["size_from"] = df.pop("size_bin") * SIZE_BIN
+        df["price_from"] = df.pop("price_bin") * PRICE_BIN
+        return df
+
+    def daily_counts(self, city=None):
+        """Per day: listings first seen, listings seen, and their mean price per m²."""
+        where, params = self._segment_filter(city)
+        return self.query(
+            f"""
+            SELECT day, SUM(first_seen) AS first_seen, SUM(seen) AS seen,
+                SUM(price_per_sqm_sum) / NULLIF(SUM(price_per_sqm_count), 0) AS avg_price_per_sqm
+            FROM agg_daily{where}
+            GROUP BY day ORDER BY day
+            """,
+            tuple(params)
+        )
+
+    def price_size_points(self, city=None, rooms=None, limit=None):
+        """Size, price, rooms and neighborhood of listings with both a size and a price."""
+        where, params = self._segment_filter(city, rooms, ["price IS NOT NULL", "size IS NOT NULL"])
+        sql = f"SELECT size, price, rooms, neighborhood FROM listings{where}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self.query(sql, tuple(params))
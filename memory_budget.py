@@ -0,0 +1,199 @@
+"""Memory limits for the logs and result frames the server keeps between reruns.
+
+A LogBuffer holds only the last lines of a scraper log in memory and appends
+every line to a file, so a long run's debug output stays readable without
+growing with it. A FrameStore keeps recently used result DataFrames in memory
+up to a byte budget; the least recently used ones are spilled to compressed
+pickles and read back the next time they are asked for.
+"""
+
+import itertools
+import json
+import os
+import resource
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict, deque
+
+import pandas as pd
+
+# Default location of spilled frames, overridable with YAD2_SPILL_DIR
+DEFAULT_SPILL_DIR = os.environ.get(
+    "YAD2_SPILL_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "spill")
+)
+
+# Log lines of each kind kept in memory per job
+LOG_LINES_KEPT = 500
+
+# Bytes of result frames kept in memory before the least recently used are spilled
+DEFAULT_FRAME_BUDGET = 256 * 1024 * 1024
+
+# Bytes of spilled frames kept on disk before the oldest are deleted
+DEFAULT_SPILL_BUDGET = 2 * 1024 * 1024 * 1024
+
+# Fast gzip: spilled frames are written often and read back rarely
+SPILL_COMPRESSION = {"method": "gzip", "compresslevel": 1}
+
+
+def frame_bytes(df):
+    """In-memory size of a DataFrame, including object and string values."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def process_rss_bytes():
+    """Current resident memory of this process, or its peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS; close enough for a report
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class LogBuffer:
+    """The last ``max_lines`` lines of a log in memory, every line in a file once one is set."""
+
+    def __init__(self, max_lines=LOG_LINES_KEPT):
+        self._lines = deque(maxlen=max_lines)
+        self.total = 0
+        self.path = None
+        self._file = None
+
+    def spill_to(self, path):
+        """Append this log to ``path`` from now on, starting with the lines still held."""
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        for line in self._lines:
+            self._write(line)
+
+    def append(self, line):
+        self._lines.append(line)
+        self.total += 1
+        if self._file is not None:
+            self._write(line)
+
+    def _write(self, line):
+        # Events are dicts; they are written as JSON lines like the scraper prints them
+        self._file.write((line if isinstance(line, str) else json.dumps(line, ensure_ascii=False)) + "\n")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def lines(self):
+        return list(self._lines)
+
+    @property
+    def dropped(self):
+        """Lines only found in the file."""
+        return self.total - len(self._lines)
+
+
+class FrameStore:
+    """LRU of result frames within a memory budget, spilling the rest to compressed files."""
+
+    def __init__(self, directory=DEFAULT_SPILL_DIR, max_bytes=DEFAULT_FRAME_BUDGET,
+                 max_disk_bytes=DEFAULT_SPILL_BUDGET):
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        os.makedirs(directory, exist_ok=True)
+        # One directory per store, removed with it, so restarts leave nothing behind
+        self.directory = tempfile.mkdtemp(prefix="frames-", dir=directory)
+        weakref.finalize(self, shutil.rmtree, self.directory, True)
+
+        self._memory = OrderedDict()  # key -> (DataFrame, bytes), least recently used first
+        self._files = OrderedDict()   # key -> (path, bytes on disk), oldest first
+        self._names = itertools.count(1)
+        self._lock = threading.Lock()
+        self.spills = 0
+        self.reloads = 0
+
+    def put(self, key, df):
+        """Keep ``df`` under ``key``; ``None`` removes the key."""
+        with self._lock:
+            self._discard(key)
+            if df is None:
+                return
+            self._memory[key] = (df, frame_bytes(df))
+            self._spill_over_budget(keep=key)
+
+    def get(self, key):
+        """The frame under ``key``, read back from disk if it was spilled, or None."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key][0]
+            if key not in self._files:
+                return None
+
+            path, _ = self._files[key]
+            df = pd.read_pickle(path, compression=SPILL_COMPRESSION["method"])
+            self.reloads += 1
+            # The file stays, so spilling this frame again costs nothing
+            self._memory[key] = (df, frame_bytes(df))
+            self._spill_over_budget(keep=key)
+            return df
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._memory or key in self._files
+
+    def discard(self, key):
+        with self._lock:
+            self._discard(key)
+
+    def _discard(self, key):
+        self._memory.pop(key, None)
+        entry = self._files.pop(key, None)
+        if entry is not None and os.path.exists(entry[0]):
+            os.remove(entry[0])
+
+    def _spill_over_budget(self, keep):
+        memory_bytes = sum(size for _, size in self._memory.values())
+        for key in list(self._memory):
+            if memory_bytes <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            df, size = self._memory.pop(key)
+            if key not in self._files:
+                path = os.path.join(self.directory, f"{next(self._names)}.pkl.gz")
+                df.to_pickle(path, compression=SPILL_COMPRESSION)
+                self._files[key] = (path, os.path.getsize(path))
+                self.spills += 1
+            memory_bytes -= size
+
+        # Oldest spilled frames go first once the disk budget is used up
+        disk_bytes = sum(size for _, size in self._files.values())
+        for key in list(self._files):
+            if disk_bytes <= self.max_disk_bytes:
+                break
+            if key in self._memory:
+                continue
+            path, size = self._files.pop(key)
+            if os.path.exists(path):
+                os.remove(path)
+            disk_bytes -= size
+
+    def report(self):
+        """Frames and bytes held in memory and on disk."""
+        with self._lock:
+            return {
+                "frames_in_memory": len(self._memory),
+                "memory_bytes": sum(size for _, size in self._memory.values()),
+                "memory_budget_bytes": self.max_bytes,
+                "frames_spilled": sum(1 for key in self._files if key not in self._memory),
+                "disk_bytes": sum(size for _, size in self._files.values()),
+                "spills": self.spills,
+                "reloads": self.reloads,
+            }
+
+    def close(self):
+        with self._lock:
+            self._memory.clear()
+            self._files.clear()
+            shutil.rmtree(self.directory, ignore_errors=True)
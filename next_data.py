@@ -0,0 +1,212 @@
+"""Extract Yad2 listings from the __NEXT_DATA__ JSON embedded in results pages.
+
+Every Yad2 results page is server-rendered by Next.js and ships the full feed
+payload in a ``<script id="__NEXT_DATA__">`` tag. Reading that JSON gives typed
+fields (price, rooms, floor, size, listing id, coordinates) without a rendered
+DOM and without depending on the hashed CSS class names used by
+``extractListings`` in interactive_scraper.js.
+"""
+
+import json
+import os
+
+# Marker of the script tag that holds the Next.js page payload
+NEXT_DATA_MARKER = 'id="__NEXT_DATA__"'
+
+# Feed sections that contain regular listings (yad1 holds new-project ads)
+FEED_SECTIONS = (
+    "private",
+    "agency",
+    "platinum",
+    "kingOfTheHar",
+    "trio",
+    "booster",
+    "leadingBroker",
+)
+
+# Public URL of a single listing
+ITEM_URL = "https://www.yad2.co.il/realestate/item/{token}"
+
+# Text Yad2 shows when a listing has no price
+NO_PRICE_TEXT = "לא צוין מחיר"
+
+
+def find_next_data(html):
+    """Return the parsed __NEXT_DATA__ payload of a page, or None if missing."""
+    # Locate the script tag with plain string search, which is much cheaper
+    # than running a regex over the whole document
+    marker = html.find(NEXT_DATA_MARKER)
+    if marker == -1:
+        return None
+    start = html.find(">", marker)
+    end = html.find("</script>", start)
+    if start == -1 or end == -1:
+        return None
+
+    try:
+        return json.loads(html[start + 1:end])
+    except ValueError:
+        return None
+
+
+def _text(node, key):
+    # Yad2 wraps most labels as {"text": "..."}
+    value = node.get(key)
+    if isinstance(value, dict):
+        return value.get("text")
+    return None
+
+
+def _floor_text(floor):
+    if floor is None:
+        return "N/A"
+    if floor == 0:
+        return "קומה קרקע"
+    return f"קומה {floor}"
+
+
+def parse_listing(item):
+    """Turn one feed item into a flat record.
+
+    The record carries the same display columns the DOM scraper writes to CSV
+    (Title, Price, Address, Rooms, Floor, Size, URL) plus typed columns.
+    """
+    address = item.get("address") or {}
+    house = address.get("house") or {}
+    coords = address.get("coords") or {}
+    details = item.get("additionalDetails") or {}
+
+    token = item.get("token")
+    price = item.get("price") or None
+    rooms = details.get("roomsCount")
+    floor = house.get("floor")
+    size = details.get("squareMeter")
+    street = _text(address, "street")
+    city = _text(address, "city")
+    neighborhood = _text(address, "neighborhood")
+    property_type = _text(details, "property")
+
+    # Build the display strings the same way the results page renders them
+    title = " ".join(str(part) for part in (street, house.get("number")) if part)
+    address_text = ", ".join(part for part in (property_type, neighborhood, city) if part)
+
+    return {
+        "Title": title or "N/A",
+        "Price": f"{price:,} ₪" if price else NO_PRICE_TEXT,
+        "Address": address_text or "N/A",
+        "Rooms": f"{rooms:g} חדרים" if rooms is not None else "N/A",
+        "Floor": _floor_text(floor),
+        "Size": f"{size} מ״ר" if size is not None else "N/A",
+        "URL": ITEM_URL.format(token=token) if token else "N/A",
+        "listing_id": token,
+        "ad_type": item.get("adType"),
+        "property_type": property_type,
+        "city": city,
+        "neighborhood": neighborhood,
+        "street": street,
+        "price_numeric": float(price) if price else None,
+        "rooms_numeric": float(rooms) if rooms is not None else None,
+        "floor_numeric": floor,
+        "size_numeric": float(size) if size is not None else None,
+        "lat": coords.get("lat"),
+        "lon": coords.get("lon"),
+    }
+
+
+def extract_listings(html):
+    """Extract listing records from the raw HTML of a Yad2 results page.
+
+    Returns an empty list when the page has no __NEXT_DATA__ payload
+    (for example a CAPTCHA page).
+    """
+    data = find_next_data(html)
+    if not data:
+        return []
+
+    feed = data.get("props", {}).get("pageProps", {}).get("feed") or {}
+
+    listings = []
+    for section in FEED_SECTIONS:
+        for item in feed.get(section) or []:
+            listings.append(parse_listing(item))
+
+    return listings
+
+
+def extract_pagination(html):
+    """Return (total listings, total pages) from the page payload, or (None, None)."""
+    data = find_next_data(html)
+    if not data:
+        return None, None
+
+    feed = data.get("props", {}).get("pageProps", {}).get("feed") or {}
+    pagination = feed.get("pagination") or {}
+    return pagination.get("total"), pagination.get("totalPages")
+
+
+def extract_listings_from_files(paths):
+    """Extract and concatenate listings from saved page HTML files, in order."""
+    listings = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            listings.extend(extract_listings(f.read()))
+    return listings
+
+
+# Fields read from a listing's detail page: output column -> path inside the listing node
+DETAIL_FIELDS = {
+    "elevator": ("inProperty", "includeElevator"),
+    "parking": ("inProperty", "includeParking"),
+    "balcony": ("inProperty", "includeBalcony"),
+    "description": ("metaData", "description"),
+    "seller_type": ("adType",),
+    "published_at": ("dates", "createdAt"),
+}
+
+# Yad2 ad types -> who is selling
+SELLER_TYPES = {"private": "private", "agency": "agent"}
+
+
+def _find_item(payload, token):
+    # The detail payload nests the listing inside React Query state; find the node by its token
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if node.get("token") == token and ("inProperty" in node or "metaData" in node):
+                return node
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return None
+
+
+def parse_detail(payload, token):
+    """Return the DETAIL_FIELDS of listing ``token`` from its detail page payload, or None."""
+    item = _find_item(payload, token)
+    if item is None:
+        return None
+
+    record = {"listing_id": token}
+    for column, path in DETAIL_FIELDS.items():
+        value = item
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        record[column] = value
+    record["seller_type"] = SELLER_TYPES.get(record["seller_type"], record["seller_type"])
+    return record
+
+
+def extract_details_from_files(paths):
+    """Parse detail records from saved detail payloads named ``<listing id>.json``."""
+    details = []
+    for path in paths:
+        token = os.path.splitext(os.path.basename(path))[0]
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = parse_detail(json.load(f), token)
+        except (OSError, ValueError):
+            continue
+        if record is not None:
+            details.append(record)
+    return details
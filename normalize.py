@@ -0,0 +1,159 @@
+"""Turn raw scraped listing columns into compact typed columns.
+
+The scraper produces display strings such as "970,000 ₪", "1.5 חדרים",
+"קומה 3 מתוך 8" and "דירת גן, הרצליה, חיפה". normalize_listings parses them in
+one vectorized pass into nullable integers/floats, categoricals and a real
+datetime column.
+
+Scraped histories repeat the same strings over and over (every 4-room listing
+says "4 חדרים"), so each column is factorized first and only its unique values
+are parsed; the results are then broadcast back with the factorization codes.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+# Compiled patterns, shared by every call
+NUMBER_PATTERN = re.compile(r"(\d+(?:\.\d+)?)")
+FLOOR_PATTERN = re.compile(r"(-?\d+)(?:\s*מתוך\s*(\d+))?")
+LISTING_ID_PATTERN = re.compile(r"/item/([A-Za-z0-9]+)")
+DIRECTION_MARKS = re.compile(r"[\u200e\u200f\u202a-\u202e]")
+
+# Floors Yad2 writes as words
+GROUND_FLOOR = "קרקע"
+BASEMENT_FLOOR = "מרתף"
+
+# Typed columns produced by normalize_listings
+TYPED_COLUMNS = {
+    "listing_id": "string",
+    "price_numeric": "Int64",
+    "rooms_numeric": "Float32",
+    "floor_numeric": "Int16",
+    "total_floors": "Int16",
+    "size_numeric": "Float32",
+    "price_per_sqm": "Float64",
+    "property_type": "category",
+    "neighborhood": "category",
+    "city": "category",
+}
+
+
+def _parse_unique(series, parse):
+    """Apply a vectorized ``parse`` to the unique values of ``series`` only."""
+    codes, uniques = pd.factorize(series)
+    parsed = parse(pd.Series(uniques, dtype="object"))
+    if not isinstance(parsed, pd.DataFrame):
+        parsed = parsed.to_frame()
+
+    # Broadcast back to every row; code -1 marks missing values
+    taken = parsed.reindex(codes)
+    taken.index = series.index
+    return taken
+
+
+def _parse_price(values):
+    digits = values.astype("string").str.replace(r"[^\d]", "", regex=True)
+    return pd.to_numeric(digits.mask(digits == ""), errors="coerce")
+
+
+def _parse_number(values):
+    return pd.to_numeric(
+        values.astype("string").str.extract(NUMBER_PATTERN, expand=False),
+        errors="coerce"
+    )
+
+
+def _parse_floor(values):
+    text = values.astype("string").str.replace(DIRECTION_MARKS, "", regex=True)
+    parts = text.str.extract(FLOOR_PATTERN)
+    floor = pd.to_numeric(parts[0], errors="coerce")
+    floor = floor.mask(text.str.contains(GROUND_FLOOR, na=False), 0)
+    floor = floor.mask(text.str.contains(BASEMENT_FLOOR, na=False), -1)
+    return pd.DataFrame({
+        "floor_numeric": floor,
+        "total_floors": pd.to_numeric(parts[1], errors="coerce"),
+    })
+
+
+def _parse_address(values):
+    # "property type, neighborhood[, sub-area], city"
+    parts = values.astype("string").str.split(",")
+    count = parts.str.len()
+    first = parts.str[0].str.strip()
+    last = parts.str[-1].str.strip()
+    return pd.DataFrame({
+        "property_type": first.where(count >= 2),
+        # astype: a column of only one-part addresses comes back all-NaN float
+        "neighborhood": parts.str[1].astype("string").str.strip().where(count >= 3),
+        "city": last.where(count >= 2),
+    })
+
+
+def _typed(df, column, raw_column, parse):
+    """Use an already typed column when present, otherwise parse the raw one."""
+    if column in df.columns:
+        return pd.to_numeric(df[column], errors="coerce")
+    if raw_column in df.columns:
+        return _parse_unique(df[raw_column], parse).iloc[:, 0]
+    return pd.Series(np.nan, index=df.index)
+
+
+def normalize_listings(df):
+    """Return a copy of ``df`` with typed listing columns added.
+
+    Raw display columns are kept as they are; the typed columns listed in
+    TYPED_COLUMNS are added (or replaced). Missing values become <NA>.
+    """
+    result = df.copy()
+    na_strings = ["N/A", ""]
+
+    # Numeric columns
+    price = _typed(result, "price_numeric", "Price", _parse_price)
+    rooms = _typed(result, "rooms_numeric", "Rooms", _parse_number)
+    size = _typed(result, "size_numeric", "Size", _parse_number)
+
+    if "Floor" in result.columns:
+        floors = _parse_unique(result["Floor"].replace(na_strings, np.nan), _parse_floor)
+        if "floor_numeric" in result.columns:
+            floors["floor_numeric"] = pd.to_numeric(result["floor_numeric"], errors="coerce").fillna(floors["floor_numeric"])
+    else:
+        floors = pd.DataFrame({
+            "floor_numeric": pd.to_numeric(result.get("floor_numeric", pd.Series(np.nan, index=result.index)), errors="coerce"),
+            "total_floors": np.nan,
+        }, index=result.index)
+
+    result["price_numeric"] = price.round()
+    result["rooms_numeric"] = rooms
+    result["size_numeric"] = size
+    result["floor_numeric"] = floors["floor_numeric"]
+    result["total_floors"] = floors["total_floors"]
+
+    # Price per square meter, only where both sides are known and positive
+    result["price_per_sqm"] = price.astype("float64") / size.astype("float64").where(size > 0)
+
+    # Location columns as categoricals
+    if "Address" in result.columns:
+        address = _parse_unique(result["Address"].replace(na_strings, np.nan), _parse_address)
+        for column in ("property_type", "neighborhood", "city"):
+            if column in result.columns:
+                # Prefer structured values (e.g. from __NEXT_DATA__) where available
+                result[column] = result[column].astype("object").fillna(address[column])
+            else:
+                result[column] = address[column]
+
+    # Stable listing id from the listing URL
+    if "listing_id" not in result.columns and "URL" in result.columns:
+        result["listing_id"] = result["URL"].astype("string").str.extract(LISTING_ID_PATTERN, expand=False)
+
+    # Compact dtypes for every typed column
+    for column, dtype in TYPED_COLUMNS.items():
+        if column in result.columns:
+            result[column] = result[column].astype(dtype)
+
+    # Real datetime instead of formatted strings
+    if "timestamp" in result.columns:
+        result["timestamp"] = pd.to_datetime(result["timestamp"], errors="coerce")
+
+    return result
@@ -0,0 +1,249 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from listing_store import ListingStore, PRICE_BIN, SIZE_BIN, PRICE_PER_SQM_BIN
+
+# Set page configuration
+st.set_page_config(
+    page_title="Yad2 Analytics",
+    page_icon="📊",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+# Listings drawn one by one in the size/price chart; larger selections are binned
+SCATTER_MAX_POINTS = 5000
+
+# Bars shown in the per-city and per-neighborhood charts
+TOP_SEGMENTS = 25
+
+# Most recent price changes listed
+PRICE_CHANGES_SHOWN = 500
+
+
+# Persistent listing store shared by every session of this server
+@st.cache_resource
+def get_listing_store():
+    return ListingStore()
+
+# Every chart reads the store's aggregate tables, which only change with a new scrape,
+# so results are cached per scrape id and reused across reruns and sessions
+@st.cache_data(max_entries=64)
+def load_segments(version, by, city=None, rooms=None):
+    return get_listing_store().segment_stats(by=by, city=city, rooms=rooms)
+
+@st.cache_data(max_entries=64)
+def load_distributions(version, city=None, rooms=None):
+    store = get_listing_store()
+    return store.price_distribution(city, rooms), store.price_per_sqm_distribution(city, rooms)
+
+@st.cache_data(max_entries=64)
+def load_price_size(version, city=None, rooms=None):
+    store = get_listing_store()
+    bins = store.price_size_bins(city, rooms)
+    if bins["listings"].sum() > SCATTER_MAX_POINTS:
+        return bins, None
+    return bins, store.price_size_points(city, rooms, limit=SCATTER_MAX_POINTS)
+
+@st.cache_data(max_entries=64)
+def load_daily(version, city=None):
+    return get_listing_store().daily_counts(city)
+
+@st.cache_data(max_entries=64)
+def load_price_changes(version, since, city=None, drops_only=True):
+    return get_listing_store().price_changes(since=since, city=city, drops_only=drops_only, limit=PRICE_CHANGES_SHOWN)
+
+@st.cache_data(max_entries=64)
+def load_price_history(version, listing_key):
+    return get_listing_store().price_history(listing_key)
+
+# Function to format a possibly missing number for st.metric
+def format_metric(value, fmt):
+    return fmt.format(value) if value is not None and not pd.isna(value) else "N/A"
+
+# Function to show binned listings as a density heatmap of size against price
+def price_size_heatmap(bins):
+    fig = go.Figure(go.Heatmap(
+        x=bins["size_from"] + SIZE_BIN / 2,
+        y=bins["price_from"] + PRICE_BIN / 2,
+        z=bins["listings"],
+        colorscale="Blues",
+        colorbar=dict(title="Listings"),
+        hovertemplate="%{x:.0f} m², ₪%{y:,.0f}: %{z} listings<extra></extra>"
+    ))
+    fig.update_layout(xaxis_title="Size (m²)", yaxis_title="Price (₪)")
+    return fig
+
+
+st.title("📊 Market Analytics")
+st.caption("Statistics over every listing saved to history (\"Save results to history\" on the main page).")
+
+store = get_listing_store()
+version = store.last_scrape_id()
+if version is None:
+    st.info("No saved listings yet. Run a scrape with \"Save results to history\" enabled.")
+    st.stop()
+
+# Filters
+cities = load_segments(version, ("city",))
+rooms_options = load_segments(version, ("rooms",))
+with st.sidebar:
+    st.header("Filters")
+    city = st.selectbox("City", ["All cities"] + cities["city"].dropna().tolist())
+    city = None if city == "All cities" else city
+    rooms = st.selectbox("Rooms", ["Any"] + sorted(rooms_options["rooms"].dropna().tolist()))
+    rooms = None if rooms == "Any" else rooms
+
+# Headline numbers
+totals = load_segments(version, (), city, rooms).iloc[0]
+segments = load_segments(version, ("neighborhood",) if city else ("city",), city, rooms)
+col1, col2, col3, col4 = st.columns(4)
+with col1:
+    st.metric("Listings", f"{totals['listings']:,}")
+with col2:
+    st.metric("Average Price", format_metric(totals["avg_price"], "₪{:,.0f}"))
+with col3:
+    st.metric("Average Price per m²", format_metric(totals["avg_price_per_sqm"], "₪{:,.0f}"))
+with col4:
+    st.metric("Average Size", format_metric(totals["avg_size"], "{:.1f} m²"))
+
+if totals["listings"] == 0:
+    st.info("No saved listings match these filters.")
+    st.stop()
+
+# Price per m² by city, or by neighborhood within the chosen city
+segment = "neighborhood" if city else "city"
+top = segments.head(TOP_SEGMENTS).copy()
+top[segment] = top[segment].fillna("Unknown")
+st.subheader(f"Price per m² by {segment}")
+fig = px.bar(
+    top.sort_values("avg_price_per_sqm"),
+    x="avg_price_per_sqm",
+    y=segment,
+    orientation="h",
+    hover_data={"listings": True, "avg_price": ":,.0f"},
+    labels={"avg_price_per_sqm": "Average price per m² (₪)", segment: "", "avg_price": "Average price", "listings": "Listings"}
+)
+fig.update_layout(height=max(300, 24 * len(top)))
+st.plotly_chart(fig, use_container_width=True)
+if len(segments) > TOP_SEGMENTS:
+    st.caption(f"Showing the {TOP_SEGMENTS} {segment}s with the most listings out of {len(segments)}.")
+
+# Price per m² by number of rooms
+by_rooms = load_segments(version, ("rooms",), city).dropna(subset=["rooms"]).sort_values("rooms")
+col1, col2 = st.columns(2)
+with col1:
+    st.subheader("Price per m² by rooms")
+    fig = px.bar(
+        by_rooms,
+        x=by_rooms["rooms"].astype(str),
+        y="avg_price_per_sqm",
+        hover_data={"listings": True},
+        labels={"x": "Rooms", "avg_price_per_sqm": "Average price per m² (₪)", "listings": "Listings"}
+    )
+    st.plotly_chart(fig, use_container_width=True)
+with col2:
+    st.subheader("Listings by rooms")
+    st.dataframe(
+        by_rooms.set_index("rooms")[["listings", "avg_price", "avg_size", "avg_price_per_sqm"]].round(0),
+        use_container_width=True
+    )
+
+# Distributions from the pre-binned histograms
+prices, prices_per_sqm = load_distributions(version, city, rooms)
+col1, col2 = st.columns(2)
+with col1:
+    st.subheader("Price distribution")
+    fig = go.Figure(go.Bar(
+        x=prices["price_from"] + PRICE_BIN / 2,
+        y=prices["listings"],
+        width=PRICE_BIN,
+        hovertemplate="₪%{x:,.0f}: %{y} listings<extra></extra>"
+    ))
+    fig.update_layout(xaxis_title="Price (₪)", yaxis_title="Listings", bargap=0)
+    st.plotly_chart(fig, use_container_width=True)
+with col2:
+    st.subheader("Price per m² distribution")
+    fig = go.Figure(go.Bar(
+        x=prices_per_sqm["price_per_sqm_from"] + PRICE_PER_SQM_BIN / 2,
+        y=prices_per_sqm["listings"],
+        width=PRICE_PER_SQM_BIN,
+        marker_color="#34A853",
+        hovertemplate="₪%{x:,.0f}/m²: %{y} listings<extra></extra>"
+    ))
+    fig.update_layout(xaxis_title="Price per m² (₪)", yaxis_title="Listings", bargap=0)
+    st.plotly_chart(fig, use_container_width=True)
+
+# Size against price: individual listings with a trend line while there are few,
+# a density heatmap of the pre-binned counts beyond that
+st.subheader("Size vs. price")
+bins, points = load_price_size(version, city, rooms)
+if points is None:
+    st.caption(f"{bins['listings'].sum():,} listings, binned by {SIZE_BIN} m² and ₪{PRICE_BIN:,}.")
+    st.plotly_chart(price_size_heatmap(bins), use_container_width=True)
+elif not points.empty:
+    fig = px.scatter(
+        points,
+        x="size",
+        y="price",
+        color=points["rooms"].astype(str),
+        hover_data=["neighborhood"],
+        trendline="ols",
+        trendline_scope="overall",
+        labels={"size": "Size (m²)", "price": "Price (₪)", "color": "Rooms"}
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+# Listings over time
+daily = load_daily(version, city)
+if not daily.empty:
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Listings over time")
+        fig = go.Figure([
+            go.Scatter(x=daily["day"], y=daily["seen"], name="Seen", mode="lines+markers"),
+            go.Scatter(x=daily["day"], y=daily["first_seen"], name="New", mode="lines+markers"),
+        ])
+        fig.update_layout(xaxis_title="Day", yaxis_title="Listings")
+        st.plotly_chart(fig, use_container_width=True)
+    with col2:
+        st.subheader("Price per m² over time")
+        fig = px.line(
+            daily,
+            x="day",
+            y="avg_price_per_sqm",
+            markers=True,
+            labels={"day": "Day", "avg_price_per_sqm": "Average price per m² (₪)"}
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+# Listings whose price changed recently, and the price history of one of them
+st.subheader("Price changes")
+col1, col2 = st.columns([1, 3])
+with col1:
+    days = st.selectbox("Within the last", [7, 30, 90, 365], format_func=lambda d: f"{d} days")
+    drops_only = st.checkbox("Price drops only", value=True)
+since = (pd.Timestamp.now() - pd.Timedelta(days=days)).floor("D")
+changes = load_price_changes(version, since, city, drops_only)
+with col2:
+    if changes.empty:
+        st.info("No price changes in this period.")
+    else:
+        st.dataframe(changes.drop(columns=["listing_key"]), use_container_width=True)
+        if len(changes) == PRICE_CHANGES_SHOWN:
+            st.caption(f"Showing the {PRICE_CHANGES_SHOWN} most recent changes.")
+
+if not changes.empty:
+    titles = dict(zip(changes["listing_key"], changes["title"].fillna(changes["listing_key"])))
+    listing_key = st.selectbox("Price history of", list(titles), format_func=titles.get)
+    history = load_price_history(version, listing_key)
+    fig = px.line(
+        history,
+        x="observed_at",
+        y="price",
+        markers=True,
+        line_shape="hv",
+        labels={"observed_at": "Seen", "price": "Price (₪)"}
+    )
+    st.plotly_chart(fig, use_container_width=True)
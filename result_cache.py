@@ -0,0 +1,170 @@
+"""On-disk cache of scrape results keyed by search URL and page count.
+
+Two presses of "Start Scraping" on the same search should not both drive a
+browser. Results are stored per canonical Yad2 URL (query parameters sorted,
+``page`` dropped) plus ``max_pages``, expire after a TTL, and the least
+recently used entries are evicted once the cache grows past its size limit.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import pandas as pd
+
+# Default location of the cache, next to the listing store
+DEFAULT_CACHE_DIR = os.environ.get(
+    "YAD2_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "result_cache")
+)
+
+# Seconds a cached result stays fresh
+DEFAULT_TTL = 30 * 60
+
+# Total size of cached results before the least recently used are evicted
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+INDEX_FILE = "index.json"
+
+
+def canonical_url(url):
+    """Normalize a search URL: lower-case host, sorted query, no ``page`` parameter."""
+    parts = urlsplit(url.strip())
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key != "page")
+    return urlunsplit((
+        parts.scheme.lower() or "https",
+        parts.netloc.lower(),
+        parts.path.rstrip("/") or "/",
+        urlencode(query),
+        ""
+    ))
+
+
+def cache_key(url, max_pages):
+    return hashlib.sha1(f"{canonical_url(url)}|{int(max_pages)}".encode("utf-8")).hexdigest()
+
+
+def format_age(seconds):
+    """Human readable age such as "45s", "12 min" or "3.5 h"."""
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min"
+    return f"{seconds / 3600:.1f} h"
+
+
+class ResultCache:
+    """TTL + LRU cache of result DataFrames persisted as pickles in one directory."""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._index = self._load_index()
+
+    def _load_index(self):
+        path = os.path.join(self.directory, INDEX_FILE)
+        try:
+            with open(path, encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Drop entries whose data file is gone
+        return {key: entry for key, entry in index.items() if os.path.exists(self._path(key))}
+
+    def _save_index(self):
+        path = os.path.join(self.directory, INDEX_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(path + ".tmp", path)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def _remove(self, key):
+        self._index.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def get(self, url, max_pages, ttl=None):
+        """Return ``(df, age_seconds)`` for a fresh entry, or None."""
+        ttl = self.ttl if ttl is None else ttl
+        key = cache_key(url, max_pages)
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            age = time.time() - entry["created"]
+            if age > ttl:
+                self._remove(key)
+                self._save_index()
+                self.misses += 1
+                return None
+
+            try:
+                df = pd.read_pickle(self._path(key))
+            except (OSError, ValueError, EOFError) as e:
+                print(f"Dropping unreadable cache entry {key}: {e}")
+                self._remove(key)
+                self._save_index()
+                self.misses += 1
+                return None
+
+            entry["last_access"] = time.time()
+            self._save_index()
+            self.hits += 1
+            return df, age
+
+    def put(self, url, max_pages, df):
+        key = cache_key(url, max_pages)
+        with self._lock:
+            path = self._path(key)
+            df.to_pickle(path + ".tmp")
+            os.replace(path + ".tmp", path)
+
+            now = time.time()
+            self._index[key] = {
+                "url": canonical_url(url),
+                "max_pages": int(max_pages),
+                "rows": len(df),
+                "bytes": os.path.getsize(path),
+                "created": now,
+                "last_access": now,
+            }
+            self._evict()
+            self._save_index()
+
+    def _evict(self):
+        # Least recently used first, until the cache fits again
+        total = sum(entry["bytes"] for entry in self._index.values())
+        for key in sorted(self._index, key=lambda k: self._index[k]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            total -= self._index[key]["bytes"]
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+            self._save_index()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._index),
+                "bytes": sum(entry["bytes"] for entry in self._index.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,40 @@
+"""Follow the scraper's JSONL output as it grows.
+
+interactive_scraper.js appends each page's listings to its output file as soon
+as the page is extracted. JsonlTail remembers how far it has read and returns
+only the records appended since the last call, so the UI can fill in results
+page by page without re-reading the whole file.
+"""
+
+import json
+import os
+
+
+class JsonlTail:
+    """Incrementally read complete JSON lines appended to a file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self._partial = b""
+
+    def read_new(self):
+        """Return the records appended since the previous call."""
+        if not os.path.exists(self.path):
+            return []
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            chunk = f.read()
+        self.offset += len(chunk)
+
+        # Keep an unterminated last line until the writer finishes it
+        data = self._partial + chunk
+        lines = data.split(b"\n")
+        self._partial = lines.pop()
+
+        records = []
+        for line in lines:
+            if line.strip():
+                records.append(json.loads(line))
+        return records
@@ -0,0 +1,92 @@
+"""JSON-lines event protocol spoken by interactive_scraper.js.
+
+Every state change in the scraper is printed to stdout as one JSON object on
+its own line, e.g.::
+
+    {"event": "page", "status": "done", "page": 2, "listings": 40, "elapsed_ms": 812, "ts": 1734028345398}
+
+Other stdout lines are free-form debug logs. Event lines are recognised by
+their leading ``{`` so ordinary log lines cost a single character check.
+"""
+
+import json
+from dataclasses import dataclass, field
+
+# Event types emitted by the scraper
+PHASE = "phase"        # the scraper entered a new phase (launch, navigate, scrape, paginate, save)
+PAGE = "page"          # a results page started or finished
+CAPTCHA = "captcha"    # a CAPTCHA was detected, solved, is still present, or was given up on
+ERROR = "error"        # a recoverable or fatal error
+RESULT = "result"      # final outcome of the run
+ACK = "ack"            # a control command sent on stdin was received
+NETWORK = "network"    # request counts and bytes loaded/saved by request blocking
+ARTIFACT = "artifact"  # a debug screenshot was written
+TIMING = "timing"      # a timed phase finished (name, tab, page, start_ms, duration_ms)
+DETAIL = "detail"      # a listing's detail page was saved or failed (enrichment)
+
+EVENT_TYPES = (PHASE, PAGE, CAPTCHA, ERROR, RESULT, ACK, NETWORK, ARTIFACT, TIMING, DETAIL)
+
+
+@dataclass
+class ScraperEvent:
+    event: str
+    ts: int = None
+    phase: str = None
+    page: int = None
+    status: str = None
+    data: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, payload):
+        payload = dict(payload)
+        return cls(
+            event=payload.pop("event"),
+            ts=payload.pop("ts", None),
+            phase=payload.pop("phase", None),
+            page=payload.pop("page", None),
+            status=payload.pop("status", None),
+            data=payload,
+        )
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def to_dict(self):
+        payload = {"event": self.event}
+        for key in ("ts", "phase", "page", "status"):
+            value = getattr(self, key)
+            if value is not None:
+                payload[key] = value
+        payload.update(self.data)
+        return payload
+
+
+def parse_event(line):
+    """Parse a stdout line into a ScraperEvent, or return None for log lines."""
+    if not line.startswith("{"):
+        return None
+    try:
+        payload = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(payload, dict) or "event" not in payload:
+        return None
+    return ScraperEvent.from_dict(payload)
+
+
+class EventDispatcher:
+    """Route scraper events to handlers registered per event type."""
+
+    def __init__(self):
+        self._handlers = {}
+
+    def on(self, event_type):
+        """Decorator registering a handler for ``event_type``."""
+        def register(handler):
+            self._handlers.setdefault(event_type, []).append(handler)
+            return handler
+        return register
+
+    def dispatch(self, event):
+        for handler in self._handlers.get(event.event, ()):
+            handler(event)
@@ -0,0 +1,230 @@
+"""Run interactive_scraper.js and drain its output without blocking.
+
+The scraper process writes JSON events and debug logs to stdout and
+Node/Chromium noise to stderr. Both pipes are drained at the same time by
+reader threads, so a chatty stderr can never fill its pipe buffer and stall the
+scraper. Parsed events and log lines are pushed onto a bounded queue that the
+UI polls between reruns of its own work.
+
+Commands travel the other way as JSON lines on the scraper's stdin, e.g.
+``{"cmd": "captcha_solved", "id": 1}``. The scraper answers each one with an
+``ack`` event carrying the same id, so delivery is immediate and confirmed.
+"""
+
+import itertools
+import json
+import os
+import queue
+import subprocess
+import tempfile
+import threading
+
+from scraper_events import ACK, parse_event
+
+# Path of the Node scraper next to this module
+SCRAPER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "interactive_scraper.js")
+
+# Maximum number of lines buffered between the reader threads and the UI
+DEFAULT_QUEUE_SIZE = 1000
+
+# Commands understood by the scraper's control channel
+CAPTCHA_SOLVED = "captcha_solved"
+ELEMENT_SELECTED = "element_selected"
+PAUSE = "pause"
+RESUME = "resume"
+CANCEL = "cancel"
+
+
+class ScraperRun:
+    """A running scraper process and the queue its output is drained into."""
+
+    def __init__(self, cmd, output_path, queue_size=DEFAULT_QUEUE_SIZE):
+        self.cmd = cmd
+        self.output_path = output_path
+        self.output_dir = os.path.dirname(output_path)
+        self.lines = queue.Queue(maxsize=queue_size)
+        self.dropped_lines = 0
+        self._open_streams = 2
+
+        # Control channel state
+        self._command_ids = itertools.count(1)
+        self._stdin_lock = threading.Lock()
+        self._acks = set()
+        self._acks_changed = threading.Condition()
+
+        self.process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+            universal_newlines=True
+        )
+
+        # One reader per pipe so neither can block the other
+        self._readers = [
+            threading.Thread(target=self._read, args=("stdout", self.process.stdout), daemon=True),
+            threading.Thread(target=self._read, args=("stderr", self.process.stderr), daemon=True),
+        ]
+        for reader in self._readers:
+            reader.start()
+
+    def _read(self, stream, pipe):
+        for line in iter(pipe.readline, ''):
+            if stream == "stdout":
+                # Events and progress lines carry state, so wait for room in the queue
+                event = parse_event(line)
+                if event is not None and event.event == ACK:
+                    self._record_ack(event.get("id"))
+                if event is not None:
+                    self.lines.put(("event", event))
+                else:
+                    self.lines.put((stream, line))
+            else:
+                # Diagnostics are dropped rather than allowed to back up the pipe
+                try:
+                    self.lines.put_nowait((stream, line))
+                except queue.Full:
+                    self.dropped_lines += 1
+        pipe.close()
+        self.lines.put((stream, None))
+
+    def poll(self, timeout=0.1):
+        """Return the (kind, item) pairs available now.
+
+        Waits up to ``timeout`` seconds for the first item, then drains whatever
+        else is already queued without blocking. ``kind`` is "event" for parsed
+        ScraperEvents, otherwise "stdout" or "stderr" with the raw log line.
+        """
+        items = []
+        try:
+            items.append(self.lines.get(timeout=timeout))
+            while True:
+                items.append(self.lines.get_nowait())
+        except queue.Empty:
+            pass
+
+        # End-of-stream markers are consumed here and never returned
+        result = []
+        for stream, line in items:
+            if line is None:
+                self._open_streams -= 1
+            else:
+                result.append((stream, line))
+        return result
+
+    def _record_ack(self, command_id):
+        with self._acks_changed:
+            self._acks.add(command_id)
+            self._acks_changed.notify_all()
+
+    def send(self, command, wait=None, **fields):
+        """Send a control command to the scraper and return its id.
+
+        With ``wait`` set, block up to that many seconds for the scraper's
+        acknowledgement and return None if it never arrives.
+        """
+        command_id = next(self._command_ids)
+        message = json.dumps({"cmd": command, "id": command_id, **fields})
+        try:
+            with self._stdin_lock:
+                self.process.stdin.write(message + "\n")
+                self.process.stdin.flush()
+        except (BrokenPipeError, ValueError, OSError) as e:
+            # The scraper already exited or closed its end of the channel
+            print(f"Could not send '{command}' to the scraper: {e}")
+            return None
+
+        if wait is not None and not self.wait_for_ack(command_id, wait):
+            return None
+        return command_id
+
+    def wait_for_ack(self, command_id, timeout=None):
+        """Block until the scraper acknowledges ``command_id``; return True if it did."""
+        with self._acks_changed:
+            return self._acks_changed.wait_for(lambda: command_id in self._acks, timeout)
+
+    def pause(self):
+        return self.send(PAUSE)
+
+    def resume(self):
+        return self.send(RESUME)
+
+    def cancel(self):
+        return self.send(CANCEL)
+
+    @property
+    def finished(self):
+        """True once both pipes hit EOF and everything queued was polled."""
+        return self._open_streams == 0 and self.lines.empty()
+
+    def wait(self, timeout=None):
+        for reader in self._readers:
+            reader.join(timeout)
+        return self.process.wait(timeout)
+
+    def terminate(self):
+        if self.process.poll() is None:
+            self.process.terminate()
+
+
+def run_scraper(url, max_pages=3, engine="dom", concurrency=1, browser_ws=None,
+                block_profile="data", artifacts="on-error", known_listings=None,
+                headless=False, cached_details=None, detail_concurrency=2,
+                captcha_watch=False, queue_size=DEFAULT_QUEUE_SIZE):
+    """Start the scraper for ``url`` and return a ScraperRun draining its output.
+
+    With ``browser_ws`` set, the scraper connects to that already running
+    browser (see browser_daemon.py) instead of launching its own.
+    ``block_profile`` selects which requests the scraper drops: "data",
+    "lean" or "full". ``artifacts`` selects which debug screenshots are taken:
+    "off", "on-error", "viewport" or "full". ``known_listings`` maps listing
+    ids to their last known price; when given, the scraper runs incrementally
+    and stops at the first page without new or re-priced listings.
+    ``headless`` launches the scraper's own browser without a window.
+    ``cached_details`` maps listing ids to the price their cached detail page
+    was fetched at; when given, the scraper saves the detail pages of all
+    other (or re-priced) listings into a ``details`` directory next to the
+    output, ``detail_concurrency`` at a time. With ``captcha_watch`` a
+    CAPTCHA counts as solved once the page no longer shows it, without the
+    CAPTCHA_SOLVED command.
+    """
+    # Check if the scraper exists
+    if not os.path.exists(SCRAPER_PATH):
+        raise FileNotFoundError(f"Scraper not found at {SCRAPER_PATH}")
+
+    # Create a temporary directory for the output and debug files
+    output_dir = tempfile.mkdtemp()
+    output_path = os.path.join(output_dir, "yad2_listings.jsonl")
+
+    # Commands are sent to the scraper over its stdin
+    cmd = [
+        "node", SCRAPER_PATH, url, output_path, "stdin", str(max_pages),
+        f"--engine={engine}",
+        f"--concurrency={int(concurrency)}",
+        f"--block-profile={block_profile}",
+        f"--artifacts={artifacts}",
+    ]
+    if browser_ws:
+        cmd.append(f"--browser-ws={browser_ws}")
+    if headless:
+        cmd.append("--headless")
+    if captcha_watch:
+        cmd.append("--captcha-watch")
+    if known_listings is not None:
+        known_path = os.path.join(output_dir, "known_ids.json")
+        with open(known_path, "w", encoding="utf-8") as f:
+            json.dump(known_listings, f, separators=(",", ":"))
+        cmd.append(f"--known-ids={known_path}")
+    if cached_details is not None:
+        cached_path = os.path.join(output_dir, "cached_details.json")
+        with open(cached_path, "w", encoding="utf-8") as f:
+            json.dump(cached_details, f, separators=(",", ":"))
+        cmd.append(f"--enrich={cached_path}")
+        cmd.append(f"--detail-concurrency={int(detail_concurrency)}")
+
+    # Print the command for debugging
+    print(f"Running command: {' '.join(cmd)}")
+
+    return ScraperRun(cmd, output_path, queue_size=queue_size)
@@ -0,0 +1,64 @@
+// The in-page CAPTCHA markers against the saved pages in the repository root.
+// Each fixture is loaded with page.setContent in headless Chromium, with
+// scripts disabled and every request aborted, so only the saved markup counts.
+const test = require("node:test");
+const assert = require("node:assert");
+const fs = require("fs");
+const path = require("path");
+const puppeteer = require("puppeteer");
+
+const { CAPTCHA_SELECTORS, CAPTCHA_TITLES, classifyCaptcha, findCaptchaMarker } = require("../captcha_detector");
+
+const ROOT = path.join(__dirname, "..");
+const RESULTS_URL = "https://www.yad2.co.il/realestate/forsale";
+
+let browser;
+let page;
+
+test.before(async () => {
+    browser = await puppeteer.launch({ headless: true, args: ["--no-sandbox"] });
+    page = await browser.newPage();
+    await page.setJavaScriptEnabled(false);
+    await page.setRequestInterception(true);
+    page.on("request", request => request.abort());
+});
+
+test.after(async () => {
+    if (browser) await browser.close();
+});
+
+// Function to load a fixture and return the marker the scraper would find on it
+async function markerOf(fixture, mutate = null) {
+    let html = fs.readFileSync(path.join(ROOT, fixture), "utf8");
+    if (mutate) html = mutate(html);
+    await page.setContent(html, { waitUntil: "domcontentloaded" });
+    return page.evaluate(findCaptchaMarker, CAPTCHA_SELECTORS, CAPTCHA_TITLES);
+}
+
+test("page-content.html, a ShieldSquare bot wall, is a CAPTCHA", async () => {
+    const marker = await markerOf("page-content.html");
+    assert.strictEqual(marker, "title");
+    assert.strictEqual(classifyCaptcha({ url: RESULTS_URL, status: 200, marker }), "title");
+});
+
+test("page-content.html is still recognised by its challenge without the title", async () => {
+    const marker = await markerOf("page-content.html", html => html.replace(/<title>[^<]*<\/title>/gi, ""));
+    assert.ok(["challenge_iframe", "challenge_widget"].includes(marker), marker);
+});
+
+test("page-source.html, an ordinary results page, is not a CAPTCHA", async () => {
+    // It mentions robots and carries a hidden reCAPTCHA frame
+    const marker = await markerOf("page-source.html");
+    assert.strictEqual(marker, null);
+    assert.strictEqual(classifyCaptcha({ url: RESULTS_URL, status: 200, marker }), null);
+});
+
+for (const fixture of ["error-page.html", "error-page-content.html"]) {
+    test(`${fixture}, an empty error page, is a CAPTCHA only when served with a bot-wall status`, async () => {
+        const marker = await markerOf(fixture);
+        assert.strictEqual(marker, null);
+        assert.strictEqual(classifyCaptcha({ url: RESULTS_URL, status: 200, marker }), null);
+        assert.strictEqual(classifyCaptcha({ url: RESULTS_URL, status: 503, marker }), null);
+        assert.strictEqual(classifyCaptcha({ url: RESULTS_URL, status: 403, marker }), "status_403");
+    });
+}
@@ -0,0 +1,54 @@
+// URL and document-status rules of the CAPTCHA detector; no browser needed.
+const test = require("node:test");
+const assert = require("node:assert");
+
+const { CAPTCHA_URL_PATTERN, classifyCaptcha, decidedWithoutPage } = require("../captcha_detector");
+
+test("bot-wall redirects match the URL pattern", () => {
+    for (const url of [
+        "https://validate.perfdrive.com/?ssa=1&ssb=2",
+        "http://perfdrive.com/captcha",
+        "https://www.yad2.co.il/captcha",
+        "https://www.yad2.co.il/captcha?return=%2Frealestate",
+    ]) {
+        assert.ok(CAPTCHA_URL_PATTERN.test(url), url);
+    }
+});
+
+test("results pages do not match the URL pattern", () => {
+    for (const url of [
+        "https://www.yad2.co.il/realestate/forsale?page=2",
+        "https://www.yad2.co.il/realestate/forsale?captcha=1",
+        "https://www.yad2.co.il/realestate/captcha-free-listings",
+        "https://notperfdrive.com.example.org/",
+        "",
+    ]) {
+        assert.ok(!CAPTCHA_URL_PATTERN.test(url), url);
+    }
+});
+
+test("a redirect is a CAPTCHA whatever the page shows", () => {
+    assert.strictEqual(classifyCaptcha({ url: "https://validate.perfdrive.com/", status: 200 }), "redirect");
+    assert.ok(decidedWithoutPage("https://validate.perfdrive.com/", 200));
+});
+
+test("error statuses are never a CAPTCHA", () => {
+    for (const status of [500, 502, 503, 504]) {
+        assert.strictEqual(classifyCaptcha({ url: "https://validate.perfdrive.com/", status, marker: "title" }), null);
+        assert.ok(decidedWithoutPage("https://www.yad2.co.il/realestate/forsale", status));
+    }
+});
+
+test("bot-wall statuses are a CAPTCHA even without a marker", () => {
+    assert.strictEqual(classifyCaptcha({ status: 403 }), "status_403");
+    assert.strictEqual(classifyCaptcha({ status: 429 }), "status_429");
+    assert.strictEqual(classifyCaptcha({ status: 403, marker: "challenge_iframe" }), "challenge_iframe");
+});
+
+test("other statuses only report the page's marker", () => {
+    assert.strictEqual(classifyCaptcha({ status: 200 }), null);
+    assert.strictEqual(classifyCaptcha({ status: 404 }), null);
+    assert.strictEqual(classifyCaptcha({ status: undefined }), null);
+    assert.strictEqual(classifyCaptcha({ status: 200, marker: "title" }), "title");
+    assert.ok(!decidedWithoutPage("https://www.yad2.co.il/realestate/forsale", 200));
+});
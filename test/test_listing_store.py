@@ -0,0 +1,66 @@
+# Removed listings reported by ListingStore.record_scrape for complete and partial scrapes.
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from listing_store import ListingStore
+
+SEARCH_URL = "https://www.yad2.co.il/realestate/forsale?city=5000"
+
+
+def listings(count, start=0, price=2000000):
+    """A search's results: ``count`` listings with ids from ``start``, 20 to a page."""
+    ids = [f"item{number}" for number in range(start, start + count)]
+    return pd.DataFrame({
+        "listing_id": ids,
+        "Title": [f"Apartment {number}" for number in range(start, start + count)],
+        "price_numeric": price,
+        "rooms_numeric": 4.0,
+        "size_numeric": 100.0,
+        "city": "Tel Aviv",
+        "URL": [f"https://www.yad2.co.il/item/{listing_id}" for listing_id in ids],
+        "source_url": SEARCH_URL,
+    })
+
+
+@pytest.fixture
+def store():
+    store = ListingStore(":memory:")
+    yield store
+    store.close()
+
+
+def test_scrape_capped_by_max_pages_removes_nothing(store):
+    store.record_scrape(listings(60), SEARCH_URL, max_pages=3)
+    scrape_id = store.record_scrape(listings(20), SEARCH_URL, max_pages=1, complete=False)
+    assert store.change_counts(scrape_id)["removed"] == 0
+
+
+def test_complete_scrape_reports_listings_gone_from_the_search(store):
+    store.record_scrape(listings(60), SEARCH_URL, max_pages=3)
+    scrape_id = store.record_scrape(listings(55), SEARCH_URL, max_pages=3)
+    changes = store.scrape_changes(scrape_id)
+    assert store.change_counts(scrape_id)["removed"] == 5
+    assert sorted(changes.loc[changes["change"] == "removed", "listing_id"]) == [f"item{n}" for n in range(55, 60)]
+
+
+def test_complete_scrape_after_a_partial_one_reports_what_the_partial_one_missed(store):
+    store.record_scrape(listings(60), SEARCH_URL, max_pages=3)
+    store.record_scrape(listings(20), SEARCH_URL, max_pages=1, complete=False)
+    scrape_id = store.record_scrape(listings(19), SEARCH_URL, max_pages=1)
+    assert store.change_counts(scrape_id)["removed"] == 41
+
+
+def test_removed_listing_is_reported_once_until_it_comes_back(store):
+    store.record_scrape(listings(60), SEARCH_URL, max_pages=3)
+    store.record_scrape(listings(50), SEARCH_URL, max_pages=3)
+    scrape_id = store.record_scrape(listings(50), SEARCH_URL, max_pages=3)
+    assert store.change_counts(scrape_id)["removed"] == 0
+
+    store.record_scrape(listings(60), SEARCH_URL, max_pages=3)
+    scrape_id = store.record_scrape(listings(55), SEARCH_URL, max_pages=3)
+    assert store.change_counts(scrape_id)["removed"] == 5
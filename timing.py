@@ -0,0 +1,72 @@
+"""Summaries and trace export for the scraper's per-phase timings.
+
+interactive_scraper.js reports every timed phase (launch, goto, captcha_check,
+wait_for_selector, extract or save_html, write_output, next_page, ...) as a
+``timing`` event with a monotonic ``start_ms``, its ``duration_ms``, the tab it
+ran in and the results page it belongs to. These helpers turn a list of those
+spans into a per-phase summary table and a Chrome trace-event file that opens
+in chrome://tracing or https://ui.perfetto.dev.
+"""
+
+import json
+
+import pandas as pd
+
+SPAN_COLUMNS = ["name", "tab", "page", "start_ms", "duration_ms"]
+
+
+def spans_frame(spans):
+    """Spans as a DataFrame with start times relative to the first span."""
+    df = pd.DataFrame(spans, columns=SPAN_COLUMNS)
+    if df.empty:
+        return df
+    df["tab"] = df["tab"].fillna(0).astype(int)
+    df["start_ms"] = df["start_ms"] - df["start_ms"].min()
+    df["end_ms"] = df["start_ms"] + df["duration_ms"]
+    return df.sort_values("start_ms", ignore_index=True)
+
+
+def phase_summary(spans):
+    """Count, total, p50, p95 and max duration per phase, slowest total first."""
+    df = spans_frame(spans)
+    if df.empty:
+        return df
+    grouped = df.groupby("name")["duration_ms"]
+    summary = pd.DataFrame({
+        "count": grouped.count(),
+        "total_ms": grouped.sum(),
+        "p50_ms": grouped.quantile(0.5),
+        "p95_ms": grouped.quantile(0.95),
+        "max_ms": grouped.max(),
+    })
+    summary["share"] = summary["total_ms"] / (df["end_ms"].max() or 1)
+    return summary.sort_values("total_ms", ascending=False).round(1)
+
+
+def chrome_trace(spans, process_name="interactive_scraper.js"):
+    """Chrome trace-event JSON (complete "X" events, one thread per tab)."""
+    events = [{"name": "process_name", "ph": "M", "pid": 1, "tid": 0, "args": {"name": process_name}}]
+    for tab in sorted({int(span.get("tab") or 0) for span in spans}):
+        events.append({
+            "name": "thread_name", "ph": "M", "pid": 1, "tid": tab,
+            "args": {"name": "main tab" if tab == 0 else f"worker tab {tab}"},
+        })
+    for span in spans:
+        args = {key: value for key, value in span.items()
+                if key not in ("name", "tab", "start_ms", "duration_ms", "event", "ts")}
+        events.append({
+            "name": span["name"],
+            "cat": "scraper",
+            "ph": "X",
+            "ts": round(span["start_ms"] * 1000),
+            "dur": round(span["duration_ms"] * 1000),
+            "pid": 1,
+            "tid": int(span.get("tab") or 0),
+            "args": args,
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def write_chrome_trace(spans, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(chrome_trace(spans), f)